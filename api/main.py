@@ -1,15 +1,43 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
 
-from edge_tools.load import ny_open_30_minute_by_date
+from edge_tools.load import (
+    ny_open_30_minute_by_date,
+    ny_open_30_minute_columns,
+    minute_bars_range_query,
+)
 from edge_tools.utils.logger import setup_logging
-from edge_tools.db import get_duckdb_connection
+from edge_tools.db import CursorPool, PoolTimeout, QUERIES, get_data_version
+from edge_tools.utils.date import is_past_day, split_date_range
+from edge_tools.analytics.utils import convert_to_timestamp
+from edge_tools.constants import DUCKDB_POOL_SIZE, API_DISK_CACHE_DIR
+from edge_tools.utils.dir import SQL_DIR
 from edge_tools.analytics.context_replay import (
     fetch_context_replay_data_and_calculate_metrics,
+    fetch_context_replay_columns,
+    fetch_context_replay_range,
 )
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
+from duckdb import DuckDBPyConnection
+from pathlib import Path
+import pandas as pd
+import edge_tools
+import json
 
-from .utils import Cache
+from .utils import (
+    Cache,
+    DiskCache,
+    QueryRunner,
+    ClientDisconnected,
+    source_fingerprint,
+    to_arrow_ipc,
+    import_pyarrow,
+    ndjson_chunks,
+    arrow_chunks,
+)
 
 import logging
 
@@ -19,22 +47,66 @@ setup_logging(logging.DEBUG)
 
 cache = Cache()
 
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+# records: one object per bar with ISO times
+# columnar: one array per field with epoch second times
+# arrow: Arrow IPC stream, /candles only
+PAYLOAD_FORMATS = ("records", "columnar", "arrow")
+# records only: epoch seconds (default) or ISO UTC strings
+TIME_FORMATS = ("epoch", "iso")
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# longest span /context_replay/range serves in one response
+MAX_RANGE_DAYS = 92
+# /bars streams NDJSON lines or one Arrow IPC stream
+STREAM_FORMATS = ("ndjson", "arrow")
+# /bars runs one ordered query per slice, DuckDB only sorts a slice at a time
+STREAM_SLICE_DAYS = 7
+STREAM_BATCH_ROWS = 50_000
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("🚀 Connecting DuckDB...")
-    app.state.con = get_duckdb_connection(read_only=True)
+    app.state.pool = CursorPool(size=DUCKDB_POOL_SIZE, read_only=True)
+    # one thread per cursor, DuckDB work never waits on the default threadpool
+    app.state.executor = ThreadPoolExecutor(
+        max_workers=DUCKDB_POOL_SIZE, thread_name_prefix="duckdb"
+    )
+    app.state.runner = QueryRunner(app.state.pool, app.state.executor)
+    # render the hot path SQL once, requests only bind parameters
+    QUERIES.load_all()
+    app.state.disk_cache = None
+    if API_DISK_CACHE_DIR:
+        code_version = source_fingerprint(
+            Path(edge_tools.__file__).parent, SQL_DIR, Path(__file__).parent
+        )
+        app.state.disk_cache = DiskCache(API_DISK_CACHE_DIR, code_version)
+        logger.info(f"Disk cache at {API_DISK_CACHE_DIR}, code version {code_version}")
 
     yield
 
     # Shutdown
     logger.info("🛑 Closing DuckDB...")
-    app.state.con.close()
+    app.state.executor.shutdown(wait=True, cancel_futures=True)
+    app.state.pool.close()
 
 
 app = FastAPI(lifespan=lifespan)
 
+
+@app.exception_handler(PoolTimeout)
+async def pool_timeout_handler(request: Request, e: PoolTimeout):
+    logger.warning(f"DuckDB pool exhausted: {e}")
+    return JSONResponse(status_code=503, content={"detail": "Database busy, retry shortly."})
+
+
+@app.exception_handler(ClientDisconnected)
+async def client_disconnected_handler(request: Request, e: ClientDisconnected):
+    # nobody reads this, the status only shows up in the access log
+    return JSONResponse(status_code=499, content={"detail": "Client closed request."})
+
+
 #
 # origins = [
 #      "http://localhost:5173",
@@ -51,18 +123,14 @@ app.add_middleware(
 )
 
 
-@app.get("/candles")
-def get_candles(date: str, request: Request):
-    con = request.app.state.con
-    # caching
-    key = f"/candles?symbol=US500&date{date}"
-    cached = cache.get(key)
-    if cached is not None:
-        logger.debug("Returning from cached values")
-        # return {"cached": True, "data": cached}
-        return cached
-
-    df = ny_open_30_minute_by_date(con, date)
+def build_candles_response(
+    con: DuckDBPyConnection, date: str, time_format: str = "epoch"
+) -> dict:
+    if time_format == "epoch":
+        # epoch seconds come straight from DuckDB
+        df = ny_open_30_minute_columns(con, date).df()
+    else:
+        df = ny_open_30_minute_by_date(con, date)
     if df is None:
         return {
             "data": {},
@@ -75,10 +143,8 @@ def get_candles(date: str, request: Request):
     ###################
     # Time Conversion #
     ###################
-    if df["time"].dt.tz is None:
-        df["time"] = df["time"].dt.tz_localize("America/New_York")
-    df["time"] = df["time"].dt.tz_convert("UTC")
-    df["time"] = df["time"].dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+    if time_format == "iso":
+        df = convert_to_timestamp(df)
     logger.debug(f"/candles for {date}: \n {df.head(10)}")
 
     df = df.to_dict("records")
@@ -93,28 +159,237 @@ def get_candles(date: str, request: Request):
                  {response}
     """
     )
-    cache.set(key, response)
-
     return response
 
 
+def build_candles_columns(con: DuckDBPyConnection, date: str) -> dict:
+    arrays = ny_open_30_minute_columns(con, date).fetchnumpy()
+    return {
+        "format": "columnar",
+        "data": {name: values.tolist() for name, values in arrays.items()},
+        "metrics": "",
+    }
+
+
+def build_candles_arrow(con: DuckDBPyConnection, date: str) -> bytes:
+    return to_arrow_ipc(ny_open_30_minute_columns(con, date))
+
+
+def negotiate_format(request: Request, format: str | None, time_format: str) -> str:
+    """Pick the payload format from ?format= or else the Accept header, returns the
+    variant used in cache keys, e.g. "records_epoch" or "columnar"."""
+    if format is None:
+        accept = request.headers.get("accept", "")
+        format = "arrow" if ARROW_MEDIA_TYPE in accept else "records"
+    if format not in PAYLOAD_FORMATS:
+        raise HTTPException(
+            status_code=400, detail=f"format must be one of {PAYLOAD_FORMATS}"
+        )
+    if time_format not in TIME_FORMATS:
+        raise HTTPException(
+            status_code=400, detail=f"time_format must be one of {TIME_FORMATS}"
+        )
+    return f"records_{time_format}" if format == "records" else format
+
+
+def render(data, variant: str):
+    """Columnar payloads hold plain lists, json.dumps can take them as is."""
+    if variant == "arrow":
+        return Response(content=data, media_type=ARROW_MEDIA_TYPE)
+    if variant == "columnar":
+        return JSONResponse(content=data)
+    return data
+
+
+def cache_ttl(date: str) -> int | None:
+    """Past days only change through ingest, which bumps the data version in the
+    key, so they never expire. Today keeps the cache TTL."""
+    return None if is_past_day(date) else cache.ttl
+
+
+def with_disk_cache(request: Request, endpoint: str, date: str, version: int, fn):
+    """Wrap `fn(con, *args)` to read and write the disk cache, for past days only."""
+    disk = request.app.state.disk_cache
+    if disk is None or not is_past_day(date):
+        return fn
+
+    def compute(con: DuckDBPyConnection, *args):
+        return disk.get_or_compute(
+            endpoint, "US500", date, version, lambda: fn(con, *args)
+        )
+
+    return compute
+
+
+def query_latest_date(con: DuckDBPyConnection) -> str:
+    df = con.execute("SELECT max(time)::date as max_date from ohlcv_minute").df()
+    return df.iloc[0]["max_date"].strftime("%Y-%m-%d")
+
+
+@app.get("/candles")
+async def get_candles(
+    date: str,
+    request: Request,
+    format: str | None = None,
+    time_format: str = "epoch",
+):
+    variant = negotiate_format(request, format, time_format)
+    runner = request.app.state.runner
+    version = await runner.run(
+        request, f"version:US500:{date}", get_data_version, "US500", date
+    )
+    key = f"/candles?symbol=US500&date{date}&v{version}&{variant}"
+    args = (date,)
+    if variant == "arrow":
+        build = build_candles_arrow
+    elif variant == "columnar":
+        build = build_candles_columns
+    else:
+        build = build_candles_response
+        args = (date, time_format)
+    if variant != "arrow":
+        build = with_disk_cache(request, f"/candles/{variant}", date, version, build)
+    data = await runner.run_cached(
+        request, cache, key, build, *args, ttl_secs=cache_ttl(date)
+    )
+    return render(data, variant)
+
+
 @app.get("/context_replay")
-def get_context_replay(date: str, request: Request):
-    con = request.app.state.con
+async def get_context_replay(
+    date: str,
+    request: Request,
+    format: str | None = None,
+    time_format: str = "epoch",
+):
+    variant = negotiate_format(request, format, time_format)
+    if variant == "arrow":
+        raise HTTPException(
+            status_code=406, detail="/context_replay serves records or columnar."
+        )
+    runner = request.app.state.runner
+    # the replay reaches back into the previous session
+    prev_date = (pd.Timestamp(date) - pd.Timedelta(days=1)).date()
+    version = await runner.run(
+        request,
+        f"version:US500:{prev_date}:{date}",
+        get_data_version,
+        "US500",
+        prev_date,
+        date,
+    )
+    key = f"/context_replay?symbol=US500&date{date}&v{version}&{variant}"
+    if variant == "columnar":
+        build, args = fetch_context_replay_columns, (date,)
+    else:
+        build, args = fetch_context_replay_data_and_calculate_metrics, (date, time_format)
+    build = with_disk_cache(request, f"/context_replay/{variant}", date, version, build)
+    data = await runner.run_cached(
+        request, cache, key, build, *args, ttl_secs=cache_ttl(date)
+    )
+    return render(data, variant)
 
-    key = f"/context_replay?symbol=US500&date{date}"
 
-    response = fetch_context_replay_data_and_calculate_metrics(con, date)
-    cache.set(key, response)
-    logger.debug(response.keys())
-    return response
+@app.get("/context_replay/range")
+async def get_context_replay_range(
+    start: str,
+    end: str,
+    request: Request,
+    format: str | None = None,
+    time_format: str = "epoch",
+):
+    """
+    Stream one replay payload per date as NDJSON, all dates come from one scan.
+    The scan is read in batches and a date is sent once its rows are complete,
+    memory holds about one date instead of the whole range.
+    """
+    variant = negotiate_format(request, format, time_format)
+    if variant == "arrow":
+        raise HTTPException(
+            status_code=406, detail="/context_replay/range serves records or columnar."
+        )
+    try:
+        span = (pd.Timestamp(end) - pd.Timestamp(start)).days
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start and end must be dates.")
+    if not 0 <= span < MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"end must be on or after start and at most {MAX_RANGE_DAYS} days later.",
+        )
+
+    format = "columnar" if variant == "columnar" else "records"
+
+    def lines(con: DuckDBPyConnection, ranges: list[tuple[str, str]], batch_rows: int):
+        for first, last in ranges:
+            payloads = fetch_context_replay_range(
+                con, first, last, format, time_format, batch_rows=batch_rows
+            )
+            for payload in payloads:
+                if format == "records":
+                    payload = jsonable_encoder(payload)
+                yield (json.dumps(payload) + "\n").encode()
+
+    chunks = await request.app.state.runner.stream(
+        lines, [(start, end)], STREAM_BATCH_ROWS
+    )
+    return StreamingResponse(chunks, media_type=NDJSON_MEDIA_TYPE)
+
+
+@app.get("/bars")
+async def get_bars(
+    start: str,
+    end: str,
+    request: Request,
+    format: str | None = None,
+):
+    """
+    Stream every minute bar from `start` to `end` (New York days) with epoch
+    second times, as NDJSON or, on request, an Arrow IPC stream. Rows are sent
+    as DuckDB produces them, the range length does not change peak memory.
+    """
+    if format is None:
+        accept = request.headers.get("accept", "")
+        format = "arrow" if ARROW_MEDIA_TYPE in accept else "ndjson"
+    if format not in STREAM_FORMATS:
+        raise HTTPException(
+            status_code=400, detail=f"format must be one of {STREAM_FORMATS}"
+        )
+    try:
+        slices = split_date_range(start, end, STREAM_SLICE_DAYS)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start and end must be dates.")
+    if not slices:
+        raise HTTPException(status_code=400, detail="end must be on or after start.")
+
+    if format == "arrow":
+        import_pyarrow()
+        encode, media_type = arrow_chunks, ARROW_MEDIA_TYPE
+    else:
+        encode, media_type = ndjson_chunks, NDJSON_MEDIA_TYPE
+    queries = [minute_bars_range_query(first, last) for first, last in slices]
+    chunks = await request.app.state.runner.stream(encode, queries, STREAM_BATCH_ROWS)
+    return StreamingResponse(chunks, media_type=media_type)
 
 
 @app.get("/utils/latest_date")
-def get_latest_date(request: Request):
-    con = request.app.state.con
+async def get_latest_date(request: Request):
+    return await request.app.state.runner.run(
+        request, "/utils/latest_date", query_latest_date
+    )
 
-    df = con.execute("SELECT max(time)::date as max_date from ohlcv_minute").df()
 
-    response = df.iloc[0]["max_date"].strftime("%Y-%m-%d")
-    return response
+@app.get("/utils/pool_stats")
+def get_pool_stats(request: Request):
+    return request.app.state.pool.stats()
+
+
+@app.get("/utils/cache_stats")
+def get_cache_stats(request: Request):
+    disk = request.app.state.disk_cache
+    return {**cache.stats(), "disk": disk.stats() if disk else None}
+
+
+@app.get("/utils/query_stats")
+def get_query_stats(request: Request):
+    return {**request.app.state.runner.stats(), "registry": QUERIES.stats()}
@@ -1,55 +1,584 @@
+from collections import OrderedDict
+from concurrent.futures import Executor
+from fastapi import Request, HTTPException
+from fastapi.encoders import jsonable_encoder
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Tuple
+import threading
+import asyncio
+import logging
+import hashlib
+import gzip
+import json
 import time
-from typing import Any, Dict, Tuple
+import sys
+import os
+
+from edge_tools.db import CursorPool
+
+logger = logging.getLogger(__name__)
+
+# list and dict items looked at by `estimate_size`
+SIZE_SAMPLE = 8
+
+
+def estimate_size(data: Any) -> int:
+    """
+    Rough size of a payload in bytes, close to its JSON encoding for the
+    records and columns the API caches. Lists and dicts are sized from up to
+    SIZE_SAMPLE evenly spread items, so the cost does not grow with the payload.
+    """
+    if isinstance(data, (bytes, bytearray, str)):
+        return len(data)
+    if isinstance(data, (int, float, bool)) or data is None:
+        return 8
+    if isinstance(data, dict):
+        if not data:
+            return 2
+        keys = list(data)[:: max(1, len(data) // SIZE_SAMPLE)][:SIZE_SAMPLE]
+        sampled = sum(len(str(key)) + 4 + estimate_size(data[key]) for key in keys)
+        return 2 + len(data) * sampled // len(keys)
+    if isinstance(data, (list, tuple)):
+        if not data:
+            return 2
+        sample = data[:: max(1, len(data) // SIZE_SAMPLE)][:SIZE_SAMPLE]
+        sampled = sum(estimate_size(item) + 1 for item in sample)
+        return 2 + len(data) * sampled // len(sample)
+    nbytes = getattr(data, "nbytes", None)  # numpy arrays
+    if nbytes is not None:
+        return int(nbytes)
+    return sys.getsizeof(data)
 
 
 class Cache:
-    def __init__(self, ttl_secs: int = 21600, max_items=500):
+    """
+    Thread safe LRU cache with TTL and a memory budget.
+
+    Entries expire `ttl_secs` after being set (None keeps them until evicted).
+    The least recently used entries are evicted once `max_items` or `max_bytes`
+    is exceeded, sizes are estimated by `estimate_size`.
+    `get_or_compute` lets only one caller per key build a missing value.
+    """
+
+    def __init__(
+        self,
+        ttl_secs: int | None = 21600,
+        max_items: int = 500,
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
         self.ttl = ttl_secs
         self.max_items = max_items
-        self.store: Dict[str, Tuple[float, Any]] = {}
+        self.max_bytes = max_bytes
+        # key -> (expires_at, size, data), ordered from least to most recently used
+        self.store: OrderedDict[str, Tuple[float | None, int, Any]] = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.RLock()
+        # key -> [lock, number of callers holding or waiting for it]
+        self.key_locks: Dict[str, list] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
 
-    def _is_expired(self, timestamp: float) -> bool:
-        return (time.time() - timestamp) > self.ttl
+    def _remove(self, key: str) -> None:
+        _, size, _ = self.store.pop(key)
+        self.bytes -= size
 
-    def get(self, key: str):
+    def _lookup(self, key: str):
+        """Return the live value of `key` or None, without touching the stats."""
         item = self.store.get(key)
-        if not item:
+        if item is None:
             return None
-        ts, data = item
-        if self._is_expired(ts):
-            del self.store[key]
+        expires_at, _, data = item
+        if expires_at is not None and time.time() > expires_at:
+            self._remove(key)
+            self.expirations += 1
             return None
+        self.store.move_to_end(key)
         return data
 
-    def set(self, key: str, data: Any):
-        if len(self.store) >= self.max_items:
-            # remove something arbitrary or oldest
-            self.store.pop(next(iter(self.store)))
-        self.store[key] = (time.time(), data)
+    def get(self, key: str):
+        with self.lock:
+            data = self._lookup(key)
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return data
+
+    def set(self, key: str, data: Any, ttl_secs: int | None = ...):
+        """Store `data`, `ttl_secs` overrides the cache TTL for this entry."""
+        ttl = self.ttl if ttl_secs is ... else ttl_secs
+        size = estimate_size(data)
+        if size > self.max_bytes:
+            logger.warning(f"Not caching {key}, {size} bytes exceed the cache budget")
+            return
+        with self.lock:
+            if key in self.store:
+                self._remove(key)
+            expires_at = time.time() + ttl if ttl is not None else None
+            self.store[key] = (expires_at, size, data)
+            self.bytes += size
+            while len(self.store) > self.max_items or self.bytes > self.max_bytes:
+                oldest = next(iter(self.store))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def fill(self, key: str, compute: Callable[[], Any], ttl_secs: int | None = ...):
+        """
+        Compute and store `key` unless another caller already did. Concurrent
+        callers of the same key wait for the first one instead of computing it
+        again.
+        """
+        with self.lock:
+            entry = self.key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                with self.lock:
+                    data = self._lookup(key)
+                if data is None:
+                    data = compute()
+                    self.set(key, data, ttl_secs)
+                return data
+        finally:
+            with self.lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self.key_locks[key]
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl_secs: int | None = ...):
+        """Return the cached value of `key`, computing it once on a miss."""
+        data = self.get(key)
+        if data is not None:
+            return data
+        return self.fill(key, compute, ttl_secs)
 
     def clear(self):
-        self.store.clear()
+        with self.lock:
+            self.store.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "items": len(self.store),
+                "bytes": self.bytes,
+                "max_items": self.max_items,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+def source_fingerprint(*folders: Path) -> str:
+    """Hash every .py and .sql file below `folders`, changes to the code that
+    builds a payload give it a new fingerprint."""
+    digest = hashlib.sha256()
+    for folder in folders:
+        for path in sorted(folder.rglob("*")):
+            if path.suffix in (".py", ".sql") and "__pycache__" not in path.parts:
+                digest.update(path.relative_to(folder).as_posix().encode())
+                digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
+
+
+def import_pyarrow():
+    """pyarrow is optional, it is only imported when a client asks for Arrow."""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise HTTPException(
+            status_code=406, detail="Arrow responses need pyarrow installed."
+        ) from None
+    return pa
+
+
+def to_arrow_ipc(relation) -> bytes:
+    """Serialize a DuckDB result as an Arrow IPC stream."""
+    pa = import_pyarrow()
+    table = relation.fetch_arrow_table()
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+# end-of-stream marker of the Arrow IPC streaming format
+ARROW_STREAM_EOS = b"\xff\xff\xff\xff\x00\x00\x00\x00"
+
+
+def ndjson_chunks(
+    con, queries: list[tuple[str, dict]], batch_rows: int
+) -> Iterator[bytes]:
+    """Run the (sql, params) `queries` one after the other and yield their rows as
+    NDJSON, `batch_rows` lines per chunk. DuckDB encodes the rows, Python only joins
+    them."""
+    for query, params in queries:
+        con.execute(f"SELECT to_json(q)::VARCHAR FROM ({query}) q", params)
+        while rows := con.fetchmany(batch_rows):
+            yield ("\n".join(row[0] for row in rows) + "\n").encode()
+
+
+def arrow_chunks(
+    con, queries: list[tuple[str, dict]], batch_rows: int
+) -> Iterator[bytes]:
+    """Run the (sql, params) `queries` one after the other and yield one Arrow IPC
+    stream: the schema of the first query, every record batch as DuckDB hands it
+    over, then the end-of-stream marker. All queries must return the same columns."""
+    schema = None
+    for query, params in queries:
+        reader = con.execute(query, params).to_arrow_reader(batch_rows)
+        if schema is None:
+            schema = reader.schema
+            yield schema.serialize().to_pybytes()
+        for batch in reader:
+            yield batch.serialize().to_pybytes()
+    yield ARROW_STREAM_EOS
+
+
+class DiskCache:
+    """
+    Persistent cache of JSON payloads as gzip files, for payloads that never
+    change (past days at a given data version). Survives API restarts, so warm
+    starts read files instead of rebuilding frames.
+
+    Files are named {endpoint}/{symbol}_{date}_v{data_version}_{code_version}.json.gz,
+    writing a new version removes older files of the same endpoint, symbol and date.
+    """
+
+    def __init__(self, directory: str | Path, code_version: str):
+        self.directory = Path(directory).expanduser()
+        self.code_version = code_version
+        # get and set run on executor threads
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def _count(self, counter: str) -> None:
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _prefix(self, endpoint: str, symbol: str, date: str) -> Path:
+        return self.directory / endpoint.strip("/").replace("/", "_") / f"{symbol}_{date}_"
+
+    def _path(self, endpoint: str, symbol: str, date: str, data_version: int) -> Path:
+        prefix = self._prefix(endpoint, symbol, date)
+        return prefix.with_name(
+            f"{prefix.name}v{data_version}_{self.code_version}.json.gz"
+        )
+
+    def get(self, endpoint: str, symbol: str, date: str, data_version: int):
+        path = self._path(endpoint, symbol, date, data_version)
+        try:
+            with gzip.open(path, "rb") as f:
+                data = json.loads(f.read())
+        except FileNotFoundError:
+            self._count("misses")
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Dropping unreadable cache file {path}: {e}")
+            path.unlink(missing_ok=True)
+            self._count("misses")
+            return None
+        self._count("hits")
+        return data
+
+    def set(self, endpoint: str, symbol: str, date: str, data_version: int, data: Any):
+        path = self._path(endpoint, symbol, date, data_version)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        prefix = self._prefix(endpoint, symbol, date)
+        for old in path.parent.glob(f"{prefix.name}v*.json.gz"):
+            if old != path:
+                old.unlink(missing_ok=True)
+
+        payload = json.dumps(jsonable_encoder(data)).encode()
+        tmp = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+        with gzip.open(tmp, "wb", compresslevel=5) as f:
+            f.write(payload)
+        # readers never see a half written file
+        os.replace(tmp, path)
+        self._count("writes")
+
+    def get_or_compute(
+        self,
+        endpoint: str,
+        symbol: str,
+        date: str,
+        data_version: int,
+        compute: Callable[[], Any],
+    ):
+        data = self.get(endpoint, symbol, date, data_version)
+        if data is None:
+            data = compute()
+            self.set(endpoint, symbol, date, data_version, data)
+        return data
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "directory": str(self.directory),
+                "code_version": self.code_version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+            }
+
+
+class ClientDisconnected(Exception):
+    """Every client waiting for a query went away before it finished."""
+
+
+class _InflightQuery:
+    """One running query and the requests waiting for its result."""
+
+    def __init__(self):
+        self.future: asyncio.Future = None
+        self.cursor = None
+        self.waiters = 0
+        self.cancelled = False
+        self.lock = threading.Lock()
+
+    def interrupt(self):
+        with self.lock:
+            self.cancelled = True
+            if self.cursor is not None:
+                self.cursor.interrupt()
+
+
+class _StreamedQuery:
+    """Chunks of one streamed result, pulled one at a time on the executor."""
+
+    def __init__(
+        self,
+        runner: "QueryRunner",
+        encode: Callable,
+        queries: list[tuple[str, dict]],
+        batch_rows: int,
+    ):
+        self.runner = runner
+        self.call = _InflightQuery()
+        self.chunks = self._produce(encode, queries, batch_rows)
+        self.pending = None
+        self.closed = False
+
+    def _produce(
+        self, encode: Callable, queries: list[tuple[str, dict]], batch_rows: int
+    ):
+        with self.runner.pool.checkout() as con:
+            with self.call.lock:
+                if self.call.cancelled:
+                    raise ClientDisconnected()
+                self.call.cursor = con
+            try:
+                yield from encode(con, queries, batch_rows)
+            finally:
+                with self.call.lock:
+                    self.call.cursor = None
+
+    async def next(self) -> bytes | None:
+        """The next chunk, None once the result is exhausted."""
+        self.pending = self.runner.executor.submit(next, self.chunks, None)
+        try:
+            return await asyncio.wrap_future(self.pending)
+        except asyncio.CancelledError:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        """Give the cursor back, a chunk still being built is interrupted first."""
+        if self.closed:
+            return
+        self.closed = True
+        self.runner.streaming -= 1
+        pending = self.pending
+        if pending is not None and not pending.done():
+            logger.info("Interrupting a streamed query, the response was closed")
+            self.runner.cancelled += 1
+            self.call.interrupt()
+            pending.add_done_callback(lambda _: self.chunks.close())
+        else:
+            self.chunks.close()
+
+
+class QueryRunner:
+    """
+    Run blocking DuckDB work off the event loop.
+
+    `fn(con, *args)` runs on `executor` with a cursor from `pool`, so the query,
+    the pandas transforms and building the response all stay off the loop.
+    Concurrent calls with the same key share one execution. A waiter whose
+    client disconnects stops waiting, and once no waiter is left the query is
+    interrupted.
+    """
+
+    def __init__(self, pool: CursorPool, executor: Executor, poll_secs: float = 0.1):
+        self.pool = pool
+        self.executor = executor
+        self.poll_secs = poll_secs
+        self.inflight: Dict[str, _InflightQuery] = {}
+        self.executed = 0
+        self.coalesced = 0
+        self.cancelled = 0
+        self.streamed = 0
+        self.streaming = 0
+
+    def _execute(self, call: _InflightQuery, fn: Callable, args: tuple):
+        with self.pool.checkout() as con:
+            with call.lock:
+                if call.cancelled:
+                    raise ClientDisconnected()
+                call.cursor = con
+            try:
+                return fn(con, *args)
+            finally:
+                with call.lock:
+                    call.cursor = None
+
+    def _start(self, key: str, fn: Callable, args: tuple) -> _InflightQuery:
+        call = _InflightQuery()
+        loop = asyncio.get_running_loop()
+        call.future = loop.run_in_executor(self.executor, self._execute, call, fn, args)
+
+        def _done(future):
+            if self.inflight.get(key) is call:
+                del self.inflight[key]
+            # an interrupted query may have nobody left to read its error
+            if not future.cancelled():
+                future.exception()
+
+        call.future.add_done_callback(_done)
+        self.inflight[key] = call
+        self.executed += 1
+        return call
+
+    async def run(self, request: Request, key: str, fn: Callable, *args) -> Any:
+        """
+        Run `fn(con, *args)` once per `key` at a time and wait for its result.
+
+        Args:
+            request: The request to watch for a client disconnect.
+            key: Identity of the work, equal keys share one execution.
+            fn: Blocking function taking a cursor as first argument.
+
+        Returns:
+            Whatever `fn` returns.
+
+        Raises:
+            ClientDisconnected: The client of `request` went away.
+        """
+        call = self.inflight.get(key)
+        if call is None:
+            call = self._start(key, fn, args)
+        else:
+            self.coalesced += 1
+            logger.debug(f"Joining running query for {key}")
+
+        call.waiters += 1
+        try:
+            while True:
+                done, _ = await asyncio.wait({call.future}, timeout=self.poll_secs)
+                if done:
+                    return call.future.result()
+                if await request.is_disconnected():
+                    raise ClientDisconnected()
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.future.done():
+                logger.info(f"Interrupting {key}, no client is waiting anymore")
+                self.cancelled += 1
+                if self.inflight.get(key) is call:
+                    del self.inflight[key]
+                call.interrupt()
+
+    async def run_cached(
+        self, request: Request, cache: Cache, key: str, fn: Callable, *args, ttl_secs=...
+    ) -> Any:
+        """Serve `key` from `cache`, on a miss run `fn(con, *args)` and store it."""
+        data = cache.get(key)
+        if data is not None:
+            return data
+
+        def compute(con, *args):
+            return cache.fill(key, lambda: fn(con, *args), ttl_secs)
+
+        return await self.run(request, key, compute, *args)
+
+    async def stream(
+        self, encode: Callable, queries: list[tuple[str, dict]], batch_rows: int = 50_000
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream the results of `queries` from one pooled cursor, chunk by chunk.
+
+        The cursor is checked out, the first query runs and its first chunk is
+        encoded before this returns, so pool timeouts and SQL errors still become
+        error responses. Every further chunk is built on `executor` once the
+        response asks for it, memory holds one batch whatever the size of the
+        result. A response that is closed early (client gone) interrupts the
+        query and returns the cursor to the pool.
+
+        Args:
+            encode: `encode(con, queries, batch_rows)` yielding bytes, e.g.
+                `ndjson_chunks` or `arrow_chunks`.
+            queries: Work items passed to `encode` and run on the same cursor,
+                (sql, params) pairs for `ndjson_chunks` and `arrow_chunks`.
+            batch_rows: Rows per chunk.
+
+        Returns:
+            An async iterator of chunks for a `StreamingResponse`.
+        """
+        self.streaming += 1
+        stream = _StreamedQuery(self, encode, queries, batch_rows)
+        try:
+            first = await stream.next()
+        except BaseException:
+            stream.close()
+            raise
+        self.streamed += 1
+
+        async def chunks():
+            try:
+                chunk = first
+                while chunk is not None:
+                    yield chunk
+                    chunk = await stream.next()
+            finally:
+                stream.close()
+
+        return chunks()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self.inflight),
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled,
+            "streamed": self.streamed,
+            "streaming": self.streaming,
+        }
 
 
 """ How to use:
 
-from fastapi import FastAPI, Depends
-from utils.cache import Cache
+from fastapi import FastAPI, Request
+from api.utils import Cache, QueryRunner
 
 app = FastAPI()
-cache = Cache(ttl_secs=300)
+cache = Cache(ttl_secs=300, max_bytes=64 * 1024 * 1024)
 
 @app.get("/ohlcv")
-def get_ohlcv(symbol: str, date: str):
+async def get_ohlcv(symbol: str, date: str, request: Request):
     key = f"{symbol}:{date}"
-    cached = cache.get(key)
-    if cached is not None:
-        return {"cached": True, "data": cached}
-
-    data = compute_ohlcv(symbol, date)
-    cache.set(key, data)
-    return {"cached": False, "data": data}
-
+    # app.state.runner = QueryRunner(pool, executor), see api/main.py
+    return await request.app.state.runner.run_cached(
+        request, cache, key, compute_ohlcv, symbol, date
+    )
 
+# sync code uses cache.get_or_compute(key, lambda: compute_ohlcv(con, symbol, date))
 
 """
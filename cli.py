@@ -1,6 +1,15 @@
 # cli.py
 
 from src.edge_tools.database import insert_minute_file_data
+from src.edge_tools.ingest import insert_file_data_bulk
+from src.edge_tools.rollup import rebuild_rollups
+from src.edge_tools.sessions import rebuild_sessions
+from src.edge_tools.metrics import backfill_metrics
+from src.edge_tools.db import (
+    get_duckdb_connection,
+    compact_ohlcv,
+    rowgroup_stats,
+)
 from src.edge_tools.utils.logger import setup_logging
 import typer
 import subprocess
@@ -101,12 +110,64 @@ def ingest(
     # date: str = typer.Option(None, help="Date to ingest (YYYY-MM-DD)"),
     # symbol: str = typer.Option("US500", help="Symbol to ingest"),
     # limit: int = typer.Option(0, help="Limit rows (0 = all)"),
+    bulk: bool = typer.Option(
+        False, help="Read all files of a timeframe at once and merge once per table"
+    ),
 ):
     """Ingest OHLCV data into DuckDB."""
+    if bulk:
+        insert_file_data_bulk()
+        return
     insert_minute_file_data()
     # actual_ingest(symbol=symbol, date=date, limit=limit)
 
 
+@app.command()
+def rollup(
+    symbol: list[str] = typer.Option(None, help="Symbols to rebuild (default: all)"),
+):
+    """Rebuild the hour/daily/weekly rollups from ohlcv_minute."""
+    with get_duckdb_connection() as con:
+        rebuild_rollups(con, symbols=symbol)
+
+
+@app.command()
+def sessions():
+    """Rebuild the session calendar for every date in ohlcv_minute."""
+    with get_duckdb_connection() as con:
+        rebuild_sessions(con)
+
+
+@app.command()
+def compact(
+    table: list[str] = typer.Option(None, help="Tables to rewrite (default: ohlcv_*)"),
+    stats_only: bool = typer.Option(False, help="Only report row group statistics"),
+):
+    """Re-sort the OHLCV tables by (symbol, time) and report row group statistics."""
+    with get_duckdb_connection() as con:
+        if stats_only:
+            for name in table or ["ohlcv_minute"]:
+                typer.echo(rowgroup_stats(con, name))
+            return
+        for result in compact_ohlcv(con, tables=table):
+            typer.echo(f"{result['before']} -> {result['after']} ({result['seconds']}s)")
+
+
+@app.command()
+def metrics(
+    symbol: str = typer.Option("US500", help="Symbol to compute metrics for"),
+    start: str = typer.Option(None, help="First date (default: first date of data)"),
+    end: str = typer.Option(None, help="Last date (default: last date of data)"),
+    full: bool = typer.Option(False, help="Recompute every date, not only changed"),
+):
+    """Compute missing and outdated metric values and store them in metric_events."""
+    with get_duckdb_connection() as con:
+        written = backfill_metrics(
+            con, symbol=symbol, start_date=start, end_date=end, full=full
+        )
+    typer.echo(f"{written} metric values written")
+
+
 # ───────────── SUBCOMMAND: ANALYTICS ─────────────
 @app.command()
 def analytics(
@@ -59,6 +59,73 @@ export async function fetchContextReplayDataForDate(date: string): Promise<Conte
   return await res.json() as ContextReplayResponse;
 }
 
+export interface CandleColumns {
+  time: number[];  // epoch seconds, UTC
+  open: number[];
+  high: number[];
+  low: number[];
+  close: number[];
+  volume: number[];
+}
+
+export interface ColumnarCandleResponse {
+  format: "columnar";
+  data: CandleColumns;
+  metrics: CandleMetrics;
+}
+
+export interface ColumnarContextReplayResponse {
+  symbol: string;
+  format: "columnar";
+  data: {
+    all: CandleColumns;
+    t_minus_60: CandleColumns;
+    prev_day_business_hours: CandleColumns;
+    m15: CandleColumns;
+    h1: CandleColumns;
+  };
+  metrics: {
+    prev_day: PrevDayMetrics;
+  };
+}
+
+export async function fetchCandleColumnsForDate(date: string): Promise<ColumnarCandleResponse> {
+  const res = await fetch(`${API_BASE}/candles?date=${date}&format=columnar`);
+  if (!res.ok) throw new Error("Failed to load candles");
+  return await res.json() as ColumnarCandleResponse;
+}
+
+export async function fetchContextReplayColumnsForDate(date: string): Promise<ColumnarContextReplayResponse> {
+  const res = await fetch(`/context_replay?date=${date}&format=columnar`);
+  if (!res.ok) throw new Error("Failed to load candles");
+  return await res.json() as ColumnarContextReplayResponse;
+}
+
+export type DatedContextReplayResponse = ContextReplayResponse & { date: string };
+
+// one request for many dates, payloads arrive one NDJSON line per date
+export async function* streamContextReplayRange(
+  start: string,
+  end: string
+): AsyncGenerator<DatedContextReplayResponse> {
+  const res = await fetch(`/context_replay/range?start=${start}&end=${end}`);
+  if (!res.ok || !res.body) throw new Error("Failed to load candles");
+
+  const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = "";
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += value;
+    const lines = buffer.split("\n");
+    buffer = lines.pop() ?? "";
+    for (const line of lines) {
+      if (line) yield JSON.parse(line) as DatedContextReplayResponse;
+    }
+  }
+  if (buffer) yield JSON.parse(buffer) as DatedContextReplayResponse;
+}
+
 export async function fetchLatestDate(): Promise<string> {
   const res = await fetch(`/utils/latest_date`);
     if (!res.ok) throw new Error("Failed to load candles");
@@ -76,10 +143,16 @@ export interface TimeCandleRow {
 
 export type TimeCandlesInput = TimeCandleRow[] | TimeCandleCollection;
 
+// the API sends epoch seconds, ISO strings only with ?time_format=iso
+export function toEpochSeconds(time: string | number): number {
+  if (typeof time === "number") return time;
+  return Math.floor(new Date(time).getTime() / 1000);
+}
+
 export function convertTimeCandles(data: TimeCandlesInput): Candle[] {
   const rows = Array.isArray(data) ? data : Object.values(data);
   return rows.map((row) => ({
-    time: Math.floor(new Date(row.time).getTime() / 1000),
+    time: toEpochSeconds(row.time),
     open: Number(row.open),
     high: Number(row.high),
     low: Number(row.low),
@@ -87,3 +160,19 @@ export function convertTimeCandles(data: TimeCandlesInput): Candle[] {
     volume: Number(row.volume ?? 0)
   }));
 }
+
+export function convertColumnarCandles(columns: CandleColumns): Candle[] {
+  const { time, open, high, low, close, volume } = columns;
+  const candles: Candle[] = new Array(time.length);
+  for (let i = 0; i < time.length; i++) {
+    candles[i] = {
+      time: time[i],
+      open: open[i],
+      high: high[i],
+      low: low[i],
+      close: close[i],
+      volume: volume[i] ?? 0
+    };
+  }
+  return candles;
+}
@@ -0,0 +1,60 @@
+"""
+Benchmark: SQL-first context replay vs. the pandas resampling path.
+
+    uv run python scripts/dev/bench_context_replay.py              # latest date
+    uv run python scripts/dev/bench_context_replay.py 2025-11-06
+"""
+
+from edge_tools.utils import setup_logging
+from edge_tools.db import get_duckdb_connection
+from edge_tools.analytics.context_replay import (
+    build_context_replay_frames,
+    build_context_replay_frames_pandas,
+)
+
+import statistics
+import logging
+import time
+import sys
+
+logger = logging.getLogger(__name__)
+
+REPEATS = 20
+
+
+def time_builder(build) -> list[float]:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        build()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    setup_logging(logging.INFO)
+    # the builders log every call, keep the output to the results
+    logging.getLogger("edge_tools").setLevel(logging.WARNING)
+
+    with get_duckdb_connection(read_only=True) as con:
+        if len(sys.argv) > 1:
+            date = sys.argv[1]
+        else:
+            date = str(con.execute("SELECT max(time)::date FROM ohlcv_minute").fetchone()[0])
+
+        pandas_path = time_builder(lambda: build_context_replay_frames_pandas(con, date))
+        sql_path = time_builder(lambda: build_context_replay_frames(con, date))
+
+    logger.info(f"context replay {date}, {REPEATS} runs")
+    for name, timings in (("pandas", pandas_path), ("sql", sql_path)):
+        logger.info(
+            f"{name:6}: median {statistics.median(timings) * 1000:.1f}ms, "
+            f"min {min(timings) * 1000:.1f}ms, max {max(timings) * 1000:.1f}ms"
+        )
+    logger.info(
+        f"speedup (median): {statistics.median(pandas_path) / statistics.median(sql_path):.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
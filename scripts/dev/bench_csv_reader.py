@@ -0,0 +1,104 @@
+"""
+Benchmark: typed read_csv (declared schema) vs. read_csv_auto + CAST.
+
+    uv run python scripts/dev/bench_csv_reader.py                  # synthetic 3y minute file
+    uv run python scripts/dev/bench_csv_reader.py path/to/US500_Minute_xxx.csv
+"""
+
+from edge_tools.utils import setup_logging
+from edge_tools.ingest.schema import get_csv_schema
+
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import tempfile
+import logging
+import duckdb
+import time
+import sys
+
+logger = logging.getLogger(__name__)
+
+REPEATS = 5
+
+AUTO_QUERY = """
+SELECT
+    'US500' AS symbol,
+    (CAST(Time AS TIMESTAMP) AT TIME ZONE 'UTC') AS time,
+    CAST(Open AS DOUBLE) AS open,
+    CAST(High AS DOUBLE) AS high,
+    CAST(Low AS DOUBLE) AS low,
+    CAST(Close AS DOUBLE) AS close,
+    CAST(Volume AS BIGINT) AS volume
+FROM read_csv_auto('{path}')
+"""
+
+TYPED_QUERY = """
+SELECT
+    'US500' AS symbol,
+    Time AT TIME ZONE 'UTC' AS time,
+    Open AS open,
+    High AS high,
+    Low AS low,
+    Close AS close,
+    Volume AS volume
+FROM read_csv('{path}', {reader_options})
+"""
+
+
+def write_synthetic_minute_file(folder: Path, years: int = 3) -> Path:
+    """Write a broker style minute export covering `years` of 24h bars."""
+    index = pd.date_range("2022-01-03", periods=years * 252 * 1380, freq="1min")
+    close = 4000 + np.cumsum(np.random.randn(len(index)))
+    df = pd.DataFrame(
+        {
+            "Time": index.strftime("%Y-%m-%d %H:%M:%S"),
+            "Open": close.round(2),
+            "High": (close + 1).round(2),
+            "Low": (close - 1).round(2),
+            "Close": close.round(2),
+            "Volume": np.random.randint(1, 500, len(index)),
+        }
+    )
+    path = folder / "US500_Minute_20220103_0000.csv"
+    df.to_csv(path, index=False)
+    return path
+
+
+def time_query(con: duckdb.DuckDBPyConnection, query: str) -> float:
+    """Best of REPEATS wall time for materializing `query`."""
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        con.execute(f"CREATE OR REPLACE TEMP TABLE bench AS {query}")
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    setup_logging(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if len(sys.argv) > 1:
+            path = Path(sys.argv[1]).expanduser().resolve()
+        else:
+            path = write_synthetic_minute_file(Path(tmp))
+
+        reader_options = get_csv_schema(path).reader_options()
+        con = duckdb.connect()
+        rows = con.execute(f"SELECT count(*) FROM read_csv_auto('{path}')").fetchone()[0]
+
+        auto = time_query(con, AUTO_QUERY.format(path=path))
+        typed = time_query(
+            con, TYPED_QUERY.format(path=path, reader_options=reader_options)
+        )
+        con.close()
+
+    logger.info(f"{path.name}: {rows} rows, best of {REPEATS}")
+    logger.info(f"read_csv_auto + CAST : {auto:.3f}s ({rows / auto:,.0f} rows/sec)")
+    logger.info(f"typed read_csv       : {typed:.3f}s ({rows / typed:,.0f} rows/sec)")
+    logger.info(f"speedup              : {auto / typed:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark: per-date metric loop (one query, one registration and one insert per
+metric and date, as scripts/dev/dev_metrics.py does) vs. the batch backfill
+engine. Runs on an in-memory copy of the minute bars and sessions.
+
+    uv run python scripts/dev/bench_metric_backfill.py                # all history
+    uv run python scripts/dev/bench_metric_backfill.py 2025-01-01 2025-06-30
+"""
+
+from edge_tools.utils import setup_logging
+from edge_tools.utils.dir import get_sql_query
+from edge_tools.db.migrations import HERE as MIGRATIONS
+from edge_tools.metrics.backfill import backfill_metrics
+from edge_tools.sessions import rebuild_sessions
+from edge_tools.metrics.registry import ALL_METRICS, ensure_metric_registered
+from edge_tools.db.versions import bump_data_version
+
+from datetime import timedelta
+import duckdb
+import logging
+import time
+import sys
+
+logger = logging.getLogger(__name__)
+
+SYMBOL = "US500"
+# the per-date loop can only run metrics with a Python compute
+PER_DAY_METRICS = [metric for metric in ALL_METRICS if metric.compute is not None]
+SQL_METRICS = [metric for metric in ALL_METRICS if metric.sql is not None]
+
+
+def copy_database(path: str) -> duckdb.DuckDBPyConnection:
+    con = duckdb.connect()
+    tables = ("ohlcv_minute", "sessions", "metrics", "data_versions")
+    for table in tables:
+        con.execute((MIGRATIONS / f"create_table_{table}.sql").read_text())
+    con.execute(f"ATTACH '{path}' AS source (READ_ONLY)")
+    con.execute(
+        "INSERT INTO ohlcv_minute (symbol, time, open, high, low, close, volume) "
+        "SELECT symbol, time, open, high, low, close, volume FROM source.ohlcv_minute"
+    )
+    con.execute("DETACH source")
+    rebuild_sessions(con)
+    return con
+
+
+def per_date_loop(con: duckdb.DuckDBPyConnection, dates: list[str]) -> int:
+    inserted = 0
+    for metric in PER_DAY_METRICS:
+        for day in dates:
+            query = get_sql_query(
+                "query_us_open_30_min_m1_by_symbol_and_date", symbol=SYMBOL, datestring=day
+            )
+            data = con.execute(query).df()
+            if data.empty:
+                continue
+            metric_id = ensure_metric_registered(con, metric)
+            row = con.execute(
+                """
+                INSERT OR IGNORE INTO metric_events (date, symbol, metric_id, metric_value)
+                VALUES (?, ?, ?, ?)
+                RETURNING date
+                """,
+                [day, SYMBOL, metric_id, metric.compute(data)],
+            ).fetchall()
+            inserted += len(row)
+    return inserted
+
+
+def main():
+    setup_logging(logging.INFO)
+    logging.getLogger("edge_tools").setLevel(logging.WARNING)
+
+    con = copy_database("local.duckdb")
+    if len(sys.argv) > 2:
+        start, end = sys.argv[1], sys.argv[2]
+    else:
+        start, end = (
+            str(value)
+            for value in con.execute(
+                "SELECT min(time)::DATE, max(time)::DATE FROM ohlcv_minute"
+            ).fetchone()
+        )
+    dates = [
+        str(day)
+        for (day,) in con.execute(
+            "SELECT date FROM sessions WHERE date BETWEEN ?::DATE AND ?::DATE ORDER BY date",
+            [start, end],
+        ).fetchall()
+    ]
+
+    started = time.perf_counter()
+    loop_rows = per_date_loop(con, dates)
+    loop_seconds = time.perf_counter() - started
+    loop_values = con.execute(
+        "SELECT metric_id, date, metric_value FROM metric_events ORDER BY ALL"
+    ).fetchall()
+
+    con.execute("DELETE FROM metric_events")
+    started = time.perf_counter()
+    batch_rows = backfill_metrics(
+        con, PER_DAY_METRICS, symbol=SYMBOL, start_date=start, end_date=end
+    )
+    batch_seconds = time.perf_counter() - started
+    batch_values = con.execute(
+        "SELECT metric_id, date, metric_value FROM metric_events ORDER BY ALL"
+    ).fetchall()
+
+    started = time.perf_counter()
+    sql_rows = backfill_metrics(
+        con, SQL_METRICS, symbol=SYMBOL, start_date=start, end_date=end
+    )
+    sql_seconds = time.perf_counter() - started
+
+    logger.info(f"{len(PER_DAY_METRICS)} metrics, {len(dates)} dates from {start} to {end}")
+    logger.info(f"per-date loop: {loop_rows} rows in {loop_seconds:.2f}s")
+    logger.info(f"batch engine : {batch_rows} rows in {batch_seconds:.2f}s")
+    logger.info(f"speedup: {loop_seconds / batch_seconds:.1f}x, same values: {loop_values == batch_values}")
+    logger.info(f"{len(SQL_METRICS)} SQL metrics: {sql_rows} rows in {sql_seconds:.2f}s")
+
+    # incremental runs over all dates: nothing changed, then one re-ingested hour
+    backfill_metrics(con, symbol=SYMBOL)
+    started = time.perf_counter()
+    noop_rows = backfill_metrics(con, symbol=SYMBOL)
+    noop_seconds = time.perf_counter() - started
+    (ny_open,) = con.execute(
+        """
+        SELECT ny_open FROM sessions
+        WHERE is_trading_day AND ny_close <= (SELECT max(time) FROM ohlcv_minute)
+        ORDER BY date DESC
+        LIMIT 1
+        """
+    ).fetchone()
+    bump_data_version(con, SYMBOL, ny_open, ny_open + timedelta(hours=1))
+    started = time.perf_counter()
+    ingest_rows = backfill_metrics(con, symbol=SYMBOL)
+    ingest_seconds = time.perf_counter() - started
+    logger.info(f"{len(ALL_METRICS)} metrics, unchanged data: {noop_rows} rows in {noop_seconds:.2f}s")
+    logger.info(f"after an ingest of the last open: {ingest_rows} rows in {ingest_seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
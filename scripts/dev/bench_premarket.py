@@ -0,0 +1,78 @@
+"""
+Benchmark: premarket prices per day (PremarketPriceCalculator on a two day slice)
+vs. the batch engine over the whole range.
+
+    uv run python scripts/dev/bench_premarket.py          # synthetic 1y minute bars
+"""
+
+from edge_tools.utils import setup_logging
+from edge_tools.premarket import (
+    compute_premarket_prices_and_changes,
+    compute_premarket_prices_batch,
+)
+from edge_tools.time import preprocess_for_premarket_analysis
+
+import numpy as np
+import pandas as pd
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+DAYS = 365
+
+
+def synthetic_bars(days: int = DAYS) -> pd.DataFrame:
+    """24h minute bars, weekends left out."""
+    index = pd.date_range("2024-01-01", periods=days * 1440, freq="1min")
+    index = index[index.dayofweek < 5]
+    close = 4000 + np.cumsum(np.random.randn(len(index)))
+    return pd.DataFrame(
+        {
+            "time": index,
+            "open": close,
+            "high": close + 1,
+            "low": close - 1,
+            "close": close,
+            "volume": 1,
+        }
+    )
+
+
+def per_day(bars: pd.DataFrame) -> int:
+    """What compute_metrics does for every date, minus the query."""
+    computed = 0
+    for day in pd.date_range(bars["time"].iloc[0], bars["time"].iloc[-1], freq="D"):
+        window = bars[
+            (bars["time"] >= day - pd.Timedelta(days=1))
+            & (bars["time"] < day + pd.Timedelta(days=1))
+        ].set_index("time", drop=False)
+        try:
+            data = preprocess_for_premarket_analysis(window.rename_axis(None))
+            compute_premarket_prices_and_changes(data)
+            computed += 1
+        except ValueError:
+            pass
+    return computed
+
+
+def main():
+    setup_logging(logging.INFO)
+    bars = synthetic_bars()
+
+    start = time.perf_counter()
+    computed = per_day(bars)
+    looped = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = compute_premarket_prices_batch(bars)
+    batched = time.perf_counter() - start
+
+    logger.info(f"{len(bars)} bars, {DAYS} days")
+    logger.info(f"per day : {looped:.3f}s ({computed} days with all anchors)")
+    logger.info(f"batch   : {batched:.3f}s ({len(batch)} trading days)")
+    logger.info(f"speedup : {looped / batched:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
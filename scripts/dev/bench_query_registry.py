@@ -0,0 +1,82 @@
+"""
+Benchmark: per-request overhead of rendering a Jinja template with the values
+inlined (how the API built its SQL before) vs. the query registry, which renders
+once and binds the values as parameters.
+
+    uv run python scripts/dev/bench_query_registry.py              # latest date
+    uv run python scripts/dev/bench_query_registry.py 2025-11-06
+"""
+
+from edge_tools.utils import setup_logging
+from edge_tools.utils.dir import get_sql_query
+from edge_tools.db import get_duckdb_connection, QUERIES
+from edge_tools.load import NY_OPEN_30_MINUTE_COLUMNS, MINUTE_BARS_RANGE
+from edge_tools.analytics.context_replay import SECTIONS_SQL_FILENAME
+
+import statistics
+import logging
+import time
+import sys
+
+logger = logging.getLogger(__name__)
+
+REPEATS = 200
+
+
+def render_inline(name: str, params: dict) -> str:
+    """Read and render the template of `name` and inline `params` as literals, the
+    work every request did before the registry."""
+    file_name, here, structure = QUERIES._sources[name]
+    sql = get_sql_query(file_name, here, **structure)
+    for key, value in params.items():
+        sql = sql.replace(f"${key}", f"'{value}'")
+    return sql
+
+
+def median_us(call) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e6
+
+
+def main():
+    setup_logging(logging.INFO)
+    logging.getLogger("edge_tools").setLevel(logging.WARNING)
+
+    with get_duckdb_connection(read_only=True) as con:
+        if len(sys.argv) > 1:
+            date = sys.argv[1]
+        else:
+            date = str(con.execute("SELECT max(time)::date FROM ohlcv_minute").fetchone()[0])
+
+        cases = {
+            "candles": (NY_OPEN_30_MINUTE_COLUMNS, {"datestring": date}),
+            "context replay": (
+                SECTIONS_SQL_FILENAME,
+                {"symbol": "US500", "start_date": date, "end_date": date},
+            ),
+            "bars slice": (
+                MINUTE_BARS_RANGE,
+                {"symbol": "US500", "start_date": date, "end_date": date},
+            ),
+        }
+        QUERIES.load_all()
+
+        logger.info(f"{date}, median of {REPEATS} runs")
+        for label, (name, params) in cases.items():
+            render = median_us(lambda: render_inline(name, params))
+            lookup = median_us(lambda: QUERIES.sql(name))
+            before = median_us(lambda: con.execute(render_inline(name, params)).fetchall())
+            after = median_us(lambda: QUERIES.execute(con, name, **params).fetchall())
+            logger.info(
+                f"{label:14}: sql text {render:7.1f}us -> {lookup:5.2f}us, "
+                f"request {before:8.1f}us -> {after:8.1f}us "
+                f"({before - after:+.1f}us saved)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: records vs. columnar payloads for a full-day context replay.
+
+    uv run python scripts/dev/bench_replay_payload.py              # latest date
+    uv run python scripts/dev/bench_replay_payload.py 2025-11-06
+"""
+
+from edge_tools.utils import setup_logging
+from edge_tools.db import get_duckdb_connection
+from edge_tools.analytics.context_replay import (
+    fetch_context_replay_data_and_calculate_metrics,
+    fetch_context_replay_columns,
+)
+
+from fastapi.encoders import jsonable_encoder
+import logging
+import json
+import time
+import sys
+
+logger = logging.getLogger(__name__)
+
+REPEATS = 10
+
+
+def time_payload(build, serialize) -> tuple[float, float, int]:
+    """Best of REPEATS for building and for serializing, plus the body size."""
+    builds, dumps = [], []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        payload = build()
+        builds.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        body = serialize(payload)
+        dumps.append(time.perf_counter() - start)
+    return min(builds), min(dumps), len(body)
+
+
+def main():
+    setup_logging(logging.INFO)
+
+    with get_duckdb_connection(read_only=True) as con:
+        if len(sys.argv) > 1:
+            date = sys.argv[1]
+        else:
+            date = str(con.execute("SELECT max(time)::date FROM ohlcv_minute").fetchone()[0])
+
+        # FastAPI runs jsonable_encoder on dict returns, the API sends columnar
+        # payloads through JSONResponse which only calls json.dumps
+        records = time_payload(
+            lambda: fetch_context_replay_data_and_calculate_metrics(con, date),
+            lambda p: json.dumps(jsonable_encoder(p)).encode(),
+        )
+        columnar = time_payload(
+            lambda: fetch_context_replay_columns(con, date),
+            lambda p: json.dumps(p).encode(),
+        )
+
+    logger.info(f"context replay {date}, best of {REPEATS}")
+    for name, (build, dump, size) in (("records", records), ("columnar", columnar)):
+        logger.info(
+            f"{name:9}: build {build * 1000:.1f}ms, serialize {dump * 1000:.1f}ms, "
+            f"{size:,} bytes"
+        )
+
+
+if __name__ == "__main__":
+    main()
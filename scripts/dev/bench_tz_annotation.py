@@ -0,0 +1,48 @@
+"""
+Benchmark: timezone annotation with datetime/time object columns vs. the compact
+int columns, time and frame memory.
+
+    uv run python scripts/dev/bench_tz_annotation.py          # 3 months of minutes
+"""
+
+from edge_tools.utils import setup_logging
+from edge_tools.time import preprocess_for_premarket_analysis
+
+import numpy as np
+import pandas as pd
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+REPEATS = 3
+
+
+def annotate(df: pd.DataFrame, compact: bool) -> tuple[float, float]:
+    """Best of REPEATS wall time and the deep memory of the result in MB."""
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        out = preprocess_for_premarket_analysis(df, compact=compact)
+        timings.append(time.perf_counter() - start)
+    return min(timings), out.memory_usage(deep=True).sum() / 1e6
+
+
+def main():
+    setup_logging(logging.INFO)
+    index = pd.date_range("2025-01-01", "2025-04-01", freq="1min")
+    df = pd.DataFrame({"time": index, "close": np.random.randn(len(index))})
+
+    full_secs, full_mb = annotate(df, compact=False)
+    compact_secs, compact_mb = annotate(df, compact=True)
+
+    logger.info(f"{len(df)} bars, 5 zones, best of {REPEATS}")
+    logger.info(f"full    : {full_secs:.3f}s {full_mb:.1f}MB")
+    logger.info(f"compact : {compact_secs:.3f}s {compact_mb:.1f}MB")
+    logger.info(
+        f"speedup : {full_secs / compact_secs:.1f}x, {full_mb / compact_mb:.1f}x less memory"
+    )
+
+
+if __name__ == "__main__":
+    main()
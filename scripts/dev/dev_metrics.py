@@ -1,8 +1,6 @@
 # base modules 
 from src.edge_tools.logger import setup_logging
 from src.edge_tools.database import get_duckdb_connection
-from src.edge_tools.utils.dir import get_sql_query
-from edge_tools.db import ensure_connection
 # importing testing modules from
 
 
@@ -10,8 +8,6 @@ from edge_tools.db import ensure_connection
 from datetime import datetime
 import logging
 import pandas as pd
-from typing import List
-import duckdb
 
 
 logger = logging.getLogger(__name__)
@@ -73,48 +69,8 @@ from src.edge_tools.metrics.compute.thirty_min_open_change import (
     compute_thirty_min_open_change_relative
     )
 
-from src.edge_tools.metrics.base import MetricDefinition
-from src.edge_tools.metrics.registry import ensure_metric_registered
-
 metrics = [metric_thirty_min_open_change_abs, metric_thirty_min_open_change_rel]
 
-def compute_metric_for_date(
-        con: duckdb.DuckDBPyConnection, 
-        metric: MetricDefinition, 
-        date_str: str, 
-        symbol: str
-    ):
-
-    if metric.dataset == "us_open_30m":
-        params = {
-            "symbol": symbol,
-            "datestring": date_str
-        }
-        query = get_sql_query("query_us_open_30_min_m1_by_symbol_and_date", **params)
-        logger.debug(query)
-        data = con.execute(query).df()
-
-    metric_id = ensure_metric_registered(con, metric)
-    value = metric.compute(data)
-    
-        # Store event
-    row = con.execute("""
-        INSERT OR IGNORE INTO metric_events (date, symbol, metric_id, metric_value)
-        VALUES (?, ?, ?, ?)
-        RETURNING date, symbol, metric_id;
-    """, [date_str, symbol, metric_id, value])
-
-    df = row.df() 
-    # the cursor if, run again, wont show the data twice, so u have to store immediately
-    # after calling row.df(), calling it a second time yields None
-
-    logger.debug(df)
-    # if df.shape
-    if df.empty:
-        logger.info(f"{metric.name} for {symbol} for {date_str} ignored due to existence of data.")
-    else:
-        logger.info(f"{metric.name} for {symbol} for {date_str} Inserted.")
-    return value
 #### creating the tables 
 
 
@@ -149,86 +105,16 @@ def calcualate_change(df, start_value: str = "open", end_value: str = "close"):
     }
 
 
-@ensure_connection
-def get_n_dates(
-    symbol: str = "US500", 
-    n: int = 50, 
-    order: str = "desc", 
-    con = None,
-    start: str = '09:30',
-    end: str = '10:00'
-):
-    """
-    description, describe the inputs
-    
-    """
-    dates = con.execute(f""" 
-        SELECT distinct (time AT TIME ZONE 'America/New_York')::date AS date
-        FROM ohlcv_minute
-        WHERE (
-                time AT TIME ZONE 'America/New_York'
-            )::time >= time '{start}'
-            AND (
-                time AT TIME ZONE 'America/New_York'
-            )::time < time '{end}'
-            AND symbol == '{symbol}'                            
-        order by date {order}
-        limit {n};                
-    """).df()["date"].to_list()
-
-    output_logger = f"""Output for function get_dates \n {dates}"""
-
-    logger.info(output_logger)
-    return dates
-
-@ensure_connection
-def check_available_dates(metric: MetricDefinition, con = None) -> List[datetime]:
-    metric_id = ensure_metric_registered(con, metric=metric)
-    
-    dates_processed = con.execute(
-        f"""
-            SELECT date from metric_events where metric_id == {metric_id} order by date
-        """
-    ).df()
-
-    return dates_processed
-
-"""
-ive written a function to check all the dates present with 
-
-goal: want to write automation, to check available dates to automate that. 
-but neither do i have an automated system nor do i need that kind of automation, so i could just manually do these 
-i could write interfaces for that.
-TODO: 
-
-"""
-
-from edge_tools.metrics import pivot_metrics
+from edge_tools.metrics import pivot_metrics, backfill_metrics
 
 def main():
     setup_logging(logging.DEBUG) 
 
     con = get_duckdb_connection()
 
-    dates_available = get_n_dates(n=60,con=con)
-
-    date_strings = [date.strftime("%Y-%m-%d") for date in dates_available]
-    # logger.debug(date_strings)
-
-    for metric in metrics:
-        logger.debug(f"Processing the following metric: {metrics}")
-        written_dates = check_available_dates(metric=metric_thirty_min_open_change_abs)["date"].to_list()
-        written_dates = [date.strftime("%Y-%m-%d") for date in written_dates]
-        logger.debug(f"Written Dates: {written_dates}")
-        pending_dates = set(date_strings) - set(written_dates)
-        logger.debug(f"Pending Dates to be processed: {pending_dates}")
-        for date in pending_dates:
-            compute_metric_for_date(
-                con, 
-                metric,
-                date_str = date,
-                symbol = "US500"
-            )
+    # one query per dataset and one insert for every pending date, see
+    # edge_tools.metrics.backfill
+    backfill_metrics(con, metrics=metrics)
 
     data = pivot_metrics(con)
     logger.info(data)
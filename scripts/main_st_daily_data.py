@@ -2,6 +2,7 @@ from src.edge_tools.logger import setup_logging
 
 from src.edge_tools.database import get_duckdb_connection
 from src.edge_tools.utils.dir import get_sql_query
+from src.edge_tools.sessions import ensure_sessions
 
 import plotly.graph_objs as go
 import logging
@@ -33,7 +34,8 @@ def get_daily_data():
     query = get_sql_query("get_ny_business_time")
 
     with get_duckdb_connection() as con:
-        df = con.execute(query).df()
+        ensure_sessions(con)
+        df = con.execute(query, {"start_date": "2025-11-02"}).df()
 
     # Ensure timestamp is a proper datetime
     df["ts_ny"] = pd.to_datetime(df["ts_ny"], utc=True).dt.tz_convert(
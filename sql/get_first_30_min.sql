@@ -1,16 +1,14 @@
-SELECT time AT TIME ZONE 'America/New_York' AS ts_ny,
-    symbol,
-    open,
-    high,
-    low,
-    close,
-    volume
-FROM ohlcv_minute
-WHERE (
-        time AT TIME ZONE 'America/New_York'
-    )::time >= time '09:30'
-    AND (
-        time AT TIME ZONE 'America/New_York'
-    )::time < time '10:00'
-    AND symbol == 'US500'
-order by ts_ny;
\ No newline at end of file
+-- each minute takes the session of the last NY open before it, UTC predicates only
+SELECT m.time AT TIME ZONE 'America/New_York' AS ts_ny,
+    m.symbol,
+    m.open,
+    m.high,
+    m.low,
+    m.close,
+    m.volume
+FROM ohlcv_minute m
+ASOF JOIN sessions s
+    ON m.time >= s.ny_open
+WHERE m.time < s.ny_open_30_end
+    AND m.symbol == 'US500'
+order by ts_ny;
@@ -1,19 +1,16 @@
-SELECT time AT TIME ZONE 'America/New_York' AS ts_ny,
-    symbol,
-    open,
-    high,
-    low,
-    close,
-    volume
-FROM ohlcv_minute
-WHERE (
-        time AT TIME ZONE 'America/New_York'
-    )::time >= time '09:30'
-    AND (
-        time AT TIME ZONE 'America/New_York'
-    )::time < time '16:00'
-    AND symbol == 'US500'
-    AND (
-        time AT TIME ZONE 'America/New_York'
-    )::date > '2025-11-01'
-order by ts_ny;
\ No newline at end of file
+-- each minute takes the session of the last NY open before it, UTC predicates only,
+-- New York dates from $start_date on
+SELECT m.time AT TIME ZONE 'America/New_York' AS ts_ny,
+    m.symbol,
+    m.open,
+    m.high,
+    m.low,
+    m.close,
+    m.volume
+FROM ohlcv_minute m
+ASOF JOIN sessions s
+    ON m.time >= s.ny_open
+WHERE m.time < s.ny_close
+    AND m.symbol == 'US500'
+    AND m.time >= timezone('America/New_York', $start_date::DATE::TIMESTAMP)
+order by ts_ny;
@@ -0,0 +1,11 @@
+SELECT epoch(time)::BIGINT AS time,
+    open,
+    high,
+    low,
+    close,
+    volume
+FROM ohlcv_minute
+WHERE symbol == $symbol
+    AND time >= timezone('America/New_York', $start_date::DATE::TIMESTAMP)
+    AND time < timezone('America/New_York', ($end_date::DATE + 1)::TIMESTAMP)
+order by time;
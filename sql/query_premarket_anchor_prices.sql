@@ -0,0 +1,68 @@
+-- close of the last bar at or before every anchor of every New York day, anchors
+-- without a bar in the `tolerance_secs` before them are NULL. has_start / has_end
+-- add the bounds on $start_date / $end_date
+WITH anchor_defs (anchor, tz, local_time) AS (
+    VALUES
+    {%- for name, anchor in anchors.items() %}
+        ('{{name}}', '{{anchor.tz}}', TIME '{{anchor.time}}'){{ "," if not loop.last }}
+    {%- endfor %}
+),
+bars AS (
+    SELECT time, close
+    FROM ohlcv_minute
+    WHERE symbol = $symbol
+    {%- if has_start %}
+        AND time >= timezone('America/New_York', $start_date::DATE - INTERVAL {{lookback_days + 1}} DAY)
+    {%- endif %}
+    {%- if has_end %}
+        AND time < timezone('America/New_York', ($end_date::DATE + 1)::TIMESTAMP)
+    {%- endif %}
+),
+days AS (
+    SELECT DISTINCT (time AT TIME ZONE 'America/New_York')::DATE AS day
+    FROM bars
+),
+anchor_times AS (
+    SELECT d.day, a.anchor, timezone(a.tz, d.day + a.local_time) AS anchor_time
+    FROM days d
+    CROSS JOIN anchor_defs a
+),
+matched AS (
+    SELECT
+        t.day,
+        t.anchor,
+        CASE
+            WHEN t.anchor_time - b.time <= INTERVAL {{tolerance_secs}} SECOND THEN b.close
+        END AS price
+    FROM anchor_times t
+    ASOF LEFT JOIN bars b
+        ON t.anchor_time >= b.time
+),
+prices AS (
+    SELECT
+        day,
+        {%- for name in anchors %}
+        max(price) FILTER (WHERE anchor = '{{name}}') AS {{name}},
+        {%- endfor %}
+        count(price) AS matched
+    FROM matched
+    GROUP BY day
+),
+with_previous AS (
+    SELECT
+        day AS date,
+        last_value(us_close_current_day IGNORE NULLS) OVER (
+            ORDER BY day ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+        ) AS us_close_previous_day,
+        {%- for name in anchors %}
+        {{name}}{{ "," if not loop.last }}
+        {%- endfor %}
+    FROM prices
+    WHERE matched > 0
+)
+SELECT *
+FROM with_previous
+{%- if has_start %}
+WHERE date >= $start_date::DATE
+{%- endif %}
+ORDER BY date
@@ -1,19 +1,17 @@
-SELECT time AT TIME ZONE 'America/New_York' AS ts_ny,
+SELECT
+{%- if epoch_time %}
+    epoch(time)::BIGINT AS time,
+{%- else %}
+    time AT TIME ZONE 'America/New_York' AS ts_ny,
     symbol,
+{%- endif %}
     open,
     high,
     low,
     close,
     volume
 FROM ohlcv_minute
-WHERE (
-        time AT TIME ZONE 'America/New_York'
-    )::time >= time '09:30'
-    AND (
-        time AT TIME ZONE 'America/New_York'
-    )::time < time '10:00'
-    AND symbol == 'US500'
-    AND (
-        time AT TIME ZONE 'America/New_York'
-    )::date == '{{datestring}}'
-order by ts_ny;
\ No newline at end of file
+WHERE symbol == 'US500'
+    AND time >= timezone('America/New_York', $datestring::DATE + TIME '09:30')
+    AND time < timezone('America/New_York', $datestring::DATE + TIME '10:00')
+order by time;
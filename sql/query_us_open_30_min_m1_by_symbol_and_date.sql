@@ -6,14 +6,7 @@ SELECT time AT TIME ZONE 'America/New_York' AS ts_ny,
     close,
     volume
 FROM ohlcv_minute
-WHERE (
-        time AT TIME ZONE 'America/New_York'
-    )::time >= time '09:30'
-    AND (
-        time AT TIME ZONE 'America/New_York'
-    )::time < time '10:00'
-    AND symbol == '{{symbol}}'
-    AND (
-        time AT TIME ZONE 'America/New_York'
-    )::date == '{{datestring}}'
-order by ts_ny;
\ No newline at end of file
+WHERE symbol == '{{symbol}}'
+    AND time >= timezone('America/New_York', DATE '{{datestring}}' + TIME '09:30')
+    AND time < timezone('America/New_York', DATE '{{datestring}}' + TIME '10:00')
+order by ts_ny;
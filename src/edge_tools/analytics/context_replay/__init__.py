@@ -9,13 +9,13 @@ from pandas.api.types import (
     is_timedelta64_dtype,
 )
 from edge_tools.utils.dir import get_sql_query
-from edge_tools.db import get_duckdb_connection
+from edge_tools.db import get_duckdb_connection, QUERIES
 from edge_tools.utils.logger import setup_logging
-from edge_tools.analytics.utils import convert_to_timestamp
+from edge_tools.analytics.utils import convert_to_timestamp, frame_to_columns
 # from edge_tools.load import ny_open_30_minute_by_date # see idea intention below
 
 from pathlib import Path
-from typing import Any, Sequence, Dict
+from typing import Any, Sequence, Dict, Iterator, Tuple
 
 import logging
 import json
@@ -24,6 +24,14 @@ logger = logging.getLogger(__name__)
 
 
 SQL_FILENAME = "query_context_replay"
+SECTIONS_SQL_FILENAME = "query_context_replay_sections"
+
+HERE = Path(__file__).resolve().parent
+
+QUERIES.register(SQL_FILENAME, SQL_FILENAME, HERE)
+QUERIES.register(SECTIONS_SQL_FILENAME, SECTIONS_SQL_FILENAME, HERE)
+
+SECTIONS = ("all", "t_minus_60", "prev_day_business_hours", "m15", "h1")
 
 #### idea intention is to add 30 min data, instead of making frontend run 2 api requests.
 # def load_thirty_minutes(con, date):
@@ -62,10 +70,7 @@ def get_context_replay_data(
     Returns:
         Context replay rows in a pandas DataFrame.
     """
-    params = {"symbol": symbol, "datestring": date}
-
-    query = read_query_in_same_directory(SQL_FILENAME, **params)
-    data = con.execute(query).df()
+    data = QUERIES.execute(con, SQL_FILENAME, symbol=symbol, datestring=date).df()
     logger.info("Fetched context replay rows", extra={"symbol": symbol, "date": date, "row_count": len(data)})
     return data
 
@@ -201,26 +206,188 @@ def resample_hourly(df: DataFrame) -> DataFrame:
     return result
 
 
-def fetch_context_replay_data_and_calculate_metrics(
+def query_context_replay_range(
+    con: DuckDBPyConnection,
+    start_date: str,
+    end_date: str,
+    symbol: str = "US500",
+) -> DataFrame:
+    """
+    Run one scan of ohlcv_minute that returns every context replay section of the
+    replay dates `start_date` to `end_date` (inclusive), partitioned by replay_date.
+
+    Args:
+        con: DuckDB connection to run the context replay query.
+        start_date: First replay date, e.g. "2025-11-03".
+        end_date: Last replay date.
+        symbol: Symbol identifier to scope the returned rows.
+
+    Returns:
+        Rows of replay_date, section, time, open, high, low, close, volume and
+        metrics (set on the one "metrics" row per date).
+    """
+    result = QUERIES.execute(
+        con,
+        SECTIONS_SQL_FILENAME,
+        symbol=symbol,
+        start_date=start_date,
+        end_date=end_date,
+    ).df()
+    logger.info(
+        "Fetched context replay range",
+        extra={"symbol": symbol, "start_date": start_date, "end_date": end_date, "row_count": len(result)},
+    )
+    return result
+
+
+def iter_context_replay_range(
+    con: DuckDBPyConnection,
+    start_date: str,
+    end_date: str,
+    symbol: str = "US500",
+    batch_rows: int = 50_000,
+) -> Iterator[DataFrame]:
+    """
+    Rows of `query_context_replay_range`, one replay date at a time.
+
+    The result is ordered by replay_date and read in chunks of about `batch_rows`
+    rows, a date is yielded once a later date shows up in the stream. Memory holds
+    one chunk and the rows of the current date instead of the whole range. DuckDB
+    still sorts the full result before the first chunk is read.
+
+    Args:
+        con: DuckDB connection to run the context replay query.
+        start_date: First replay date, e.g. "2025-11-03".
+        end_date: Last replay date.
+        symbol: Symbol identifier to scope the returned rows.
+        batch_rows: Rows fetched per chunk, rounded to DuckDB vectors of 2048.
+
+    Yields:
+        The rows of one replay_date, in date order.
+    """
+    QUERIES.execute(
+        con,
+        SECTIONS_SQL_FILENAME,
+        symbol=symbol,
+        start_date=start_date,
+        end_date=end_date,
+    )
+    vectors = max(1, batch_rows // 2048)
+    pending = None
+    dates = 0
+    while not (chunk := con.fetch_df_chunk(vectors)).empty:
+        rows = chunk if pending is None else pd.concat([pending, chunk], ignore_index=True)
+        # every date before the last one of the chunk is complete
+        complete = rows["replay_date"] != rows["replay_date"].iloc[-1]
+        for _, date_rows in rows[complete].groupby("replay_date", sort=True):
+            dates += 1
+            yield date_rows
+        pending = rows[~complete]
+    if pending is not None:
+        dates += 1
+        yield pending
+    logger.info(
+        "Streamed context replay range",
+        extra={"symbol": symbol, "start_date": start_date, "end_date": end_date, "dates": dates},
+    )
+
+
+def split_context_replay_sections(
+    result: DataFrame,
+) -> Tuple[Dict[str, DataFrame], Dict[str, Any]]:
+    """
+    Split the rows of one replay date into section frames and metrics.
+
+    Args:
+        result: Rows of `query_context_replay_range` for a single replay_date.
+
+    Returns:
+        Frames with UTC `time` columns keyed by section name, plus the
+        previous-day metrics ({} without a previous session).
+    """
+    metrics_rows = result.loc[result["section"] == "metrics", "metrics"]
+    prev_day_metrics = metrics_rows.iloc[0] if len(metrics_rows) else {}
+    if not prev_day_metrics:
+        logger.warning("Previous day business hours slice is empty, cannot compute metrics")
+
+    bars = result[result["section"] != "metrics"].drop(columns=["replay_date", "metrics"])
+    # the metrics row holds NULL bars, which turned volume into floats
+    bars = bars.astype({"volume": "int64"})
+    by_section = dict(tuple(bars.groupby("section", sort=False)))
+
+    frames = {}
+    for section in SECTIONS:
+        frame = by_section.get(section, bars.iloc[:0])
+        frames[section] = frame.drop(columns=["section"]).reset_index(drop=True)
+    return frames, prev_day_metrics
+
+
+def iter_context_replay_frames(
+    result: DataFrame,
+) -> Iterator[Tuple[str, Dict[str, DataFrame], Dict[str, Any]]]:
+    """
+    Yield (replay date, frames, metrics) per date of a `query_context_replay_range`
+    result, dates without bars are skipped.
+    """
+    for replay_date, rows in result.groupby("replay_date", sort=True):
+        yield (
+            pd.Timestamp(replay_date).strftime("%Y-%m-%d"),
+            *split_context_replay_sections(rows),
+        )
+
+
+def build_context_replay_frames(
+    con: DuckDBPyConnection,
+    date: str,
+    symbol: str = "US500",
+) -> Tuple[Dict[str, DataFrame], Dict[str, Any]]:
+    """
+    Build every context replay section and the previous-day metrics for `date` in
+    one DuckDB statement. Sections are cut by timestamp (t-60 is 08:30 - 09:30,
+    the previous session 09:30 - 16:00 New York), not by row position.
+
+    Args:
+        con: DuckDB connection to run the context replay query.
+        date: Date string parameter that matches the dataset query.
+        symbol: Symbol identifier to scope the returned rows.
+
+    Returns:
+        Frames with UTC `time` columns keyed by section name, plus the
+        previous-day metrics.
+    """
+    result = query_context_replay_range(con, date, date, symbol=symbol)
+    frames, prev_day_metrics = split_context_replay_sections(result)
+
+    logger.info(
+        "Built derived dataset for context replay",
+        extra={f"{section}_rows": len(frame) for section, frame in frames.items()},
+    )
+    return frames, prev_day_metrics
+
+
+def build_context_replay_frames_pandas(
     con: DuckDBPyConnection,
     date: str
-) -> Dict[str, Any]:
+) -> Tuple[Dict[str, DataFrame], Dict[str, Any]]:
     """
-    Load context replay rows for `date` then resample and compute previous-day metrics.
+    Load context replay rows for `date` then resample and compute previous-day
+    metrics in pandas. Reference for `build_context_replay_frames`, kept for
+    benchmarks.
 
     Args:
         con: DuckDB connection to run the context replay query.
         date: Date string parameter that matches the dataset query.
 
     Returns:
-        A payload with raw, sliced, and resampled data plus previous-day metrics.
+        Raw, sliced, and resampled frames with UTC `time` columns keyed by section
+        name, plus the previous-day metrics.
     """
 
     data = get_context_replay_data(con, date=date)
     data.rename(columns={"ts_ny": "time"}, inplace=True)
     logger.info(data.head())
     data.drop(columns=["symbol"], inplace=True)
-    data = convert_to_timestamp(data)
+    data["time"] = data["time"].dt.tz_localize("America/New_York").dt.tz_convert("UTC")
     logger.info(data.head())
     data_t_minus_sixty = slice_last_sixty_minutes(data)
     data_prev_day_business_hours = resample_mfifteen(get_prev_day_business_hours(data))
@@ -273,25 +440,140 @@ def fetch_context_replay_data_and_calculate_metrics(
             # "prev_day_avg_candle_size" : prev_day_avg_candle_size
         }
 
+    logger.info("Context replay prev day metrics", extra={"prev_day": prev_day_metrics})
+
+    frames = {
+        "all": data,
+        "t_minus_60": data_t_minus_sixty,
+        "prev_day_business_hours": data_prev_day_business_hours,
+        "m15": data_resampled_m15,
+        "h1": data_resampled_hourly,
+    }
+    return frames, prev_day_metrics
+
+
+def records_payload(
+    frames: Dict[str, DataFrame], prev_day_metrics: Dict[str, Any], time_format: str = "iso"
+) -> Dict[str, Any]:
+    """Context replay payload with one record per bar."""
+
     ###############
     ### Response ###
     ###############
 
-    response = {
+    return {
         "symbol": "US500",
         "data": {
-            "all": data.to_dict("records"),
-            "t_minus_60": data_t_minus_sixty.to_dict("records"),
-            "prev_day_business_hours": data_prev_day_business_hours.to_dict("records"),
-            "m15": data_resampled_m15.to_dict("records"),
-            "h1": data_resampled_hourly.to_dict("records"),
+            name: convert_to_timestamp(frame.copy(), time_format).to_dict("records")
+            for name, frame in frames.items()
         },
         "metrics": {"prev_day": prev_day_metrics},
     }
 
-    logger.info("Context replay prev day metrics", extra={"prev_day": prev_day_metrics})
-    return response
 
+def columns_payload(
+    frames: Dict[str, DataFrame], prev_day_metrics: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Context replay payload with parallel arrays per section."""
+    return {
+        "symbol": "US500",
+        "format": "columnar",
+        "data": {name: frame_to_columns(frame) for name, frame in frames.items()},
+        "metrics": {"prev_day": prev_day_metrics},
+    }
+
+
+def fetch_context_replay_data_and_calculate_metrics(
+    con: DuckDBPyConnection,
+    date: str,
+    time_format: str = "iso",
+) -> Dict[str, Any]:
+    """
+    Build the context replay payload for `date` with one record per bar.
+
+    Args:
+        con: DuckDB connection to run the context replay query.
+        date: Date string parameter that matches the dataset query.
+        time_format: "iso" for UTC time strings, "epoch" for epoch seconds.
+
+    Returns:
+        A payload with raw, sliced, and resampled data plus previous-day metrics.
+    """
+    frames, prev_day_metrics = build_context_replay_frames(con, date)
+    return records_payload(frames, prev_day_metrics, time_format)
+
+
+def fetch_context_replay_columns(
+    con: DuckDBPyConnection,
+    date: str
+) -> Dict[str, Any]:
+    """
+    Build the context replay payload for `date` as parallel arrays per section,
+    times as epoch seconds. Skips the per-bar dicts of the records payload.
+
+    Args:
+        con: DuckDB connection to run the context replay query.
+        date: Date string parameter that matches the dataset query.
+
+    Returns:
+        A payload shaped like the records one with a column mapping per section.
+    """
+    frames, prev_day_metrics = build_context_replay_frames(con, date)
+    return columns_payload(frames, prev_day_metrics)
+
+
+
+def iter_context_replay_payloads(
+    result: DataFrame,
+    format: str = "records",
+    time_format: str = "iso",
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield one payload per replay date of a `query_context_replay_range` result,
+    shaped like the single date payloads plus a "date" key.
+
+    Args:
+        result: Rows of `query_context_replay_range`.
+        format: "records" or "columnar".
+        time_format: "iso" or "epoch", records only.
+    """
+    for replay_date, frames, prev_day_metrics in iter_context_replay_frames(result):
+        if format == "columnar":
+            payload = columns_payload(frames, prev_day_metrics)
+        else:
+            payload = records_payload(frames, prev_day_metrics, time_format)
+        yield {"date": replay_date, **payload}
+
+
+def fetch_context_replay_range(
+    con: DuckDBPyConnection,
+    start_date: str,
+    end_date: str,
+    format: str = "records",
+    time_format: str = "iso",
+    batch_rows: int = 50_000,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Context replay payloads for every replay date from `start_date` to `end_date`
+    from a single scan, instead of one query and resample per date. A payload is
+    built as soon as the rows of its date are read, see
+    `iter_context_replay_range`.
+
+    Args:
+        con: DuckDB connection to run the context replay query.
+        start_date: First replay date, e.g. "2025-11-03".
+        end_date: Last replay date.
+        format: "records" or "columnar".
+        time_format: "iso" or "epoch", records only.
+        batch_rows: Rows read from the scan at a time.
+
+    Yields:
+        One payload per date with bars, in date order.
+    """
+    for rows in iter_context_replay_range(
+        con, start_date, end_date, batch_rows=batch_rows
+    ):
+        yield from iter_context_replay_payloads(rows, format, time_format)
 
 if __name__ == "__main__":
     setup_logging(logging.DEBUG)
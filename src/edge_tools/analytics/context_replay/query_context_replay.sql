@@ -7,10 +7,8 @@ SELECT time AT TIME ZONE 'America/New_York' AS ts_ny,
     volume
 FROM ohlcv_minute
 WHERE
-    ts_ny >= (CAST((DATE('{{datestring}}') - INTERVAL '1 day') AS DATE)
-              + TIME '09:30')
+    time >= timezone('America/New_York', ($datestring::DATE - 1) + TIME '09:30')
     AND
-    ts_ny <  (CAST(DATE('{{datestring}}') AS DATE)
-              + TIME '09:30')
-    AND symbol = '{{symbol}}'
+    time < timezone('America/New_York', $datestring::DATE + TIME '09:30')
+    AND symbol = $symbol
 ORDER BY ts_ny;
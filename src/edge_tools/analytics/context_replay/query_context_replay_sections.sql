@@ -0,0 +1,92 @@
+-- every context replay section for the replay dates $start_date to $end_date in one scan.
+-- The replay of day d runs from d-1 09:30 to d 09:30 (New York), so shifting the local
+-- time back by 09:30 and adding a day gives each minute its replay_date partition.
+WITH minutes AS (
+    SELECT
+        ((time AT TIME ZONE 'America/New_York') - INTERVAL '9 hours 30 minutes')::DATE + 1 AS replay_date,
+        time AT TIME ZONE 'America/New_York' AS ts_ny,
+        time,
+        open,
+        high,
+        low,
+        close,
+        volume
+    FROM ohlcv_minute
+    WHERE symbol = $symbol
+        AND time >= timezone('America/New_York', ($start_date::DATE - 1) + TIME '09:30')
+        AND time < timezone('America/New_York', $end_date::DATE + TIME '09:30')
+),
+m15 AS (
+    SELECT
+        replay_date,
+        time_bucket(INTERVAL '15 minutes', time) AS time,
+        arg_min(open, time) AS open,
+        max(high) AS high,
+        min(low) AS low,
+        arg_max(close, time) AS close,
+        sum(volume)::BIGINT AS volume
+    FROM minutes
+    GROUP BY 1, 2
+),
+h1 AS (
+    SELECT
+        replay_date,
+        time_bucket(INTERVAL '1 hour', time) AS time,
+        arg_min(open, time) AS open,
+        max(high) AS high,
+        min(low) AS low,
+        arg_max(close, time) AS close,
+        sum(volume)::BIGINT AS volume
+    FROM minutes
+    GROUP BY 1, 2
+),
+prev_day AS (
+    -- the previous session ends at 16:00 on the day before the replay date
+    SELECT *
+    FROM m15
+    WHERE (time AT TIME ZONE 'America/New_York') < (replay_date - 1) + TIME '16:00'
+),
+prev_day_summary AS (
+    SELECT
+        replay_date,
+        arg_min(open, time) AS open,
+        max(high) AS high,
+        min(low) AS low,
+        arg_max(close, time) AS close
+    FROM prev_day
+    GROUP BY replay_date
+),
+metrics AS (
+    SELECT
+        replay_date,
+        {
+            'prev_day_open': open,
+            'prev_day_high': high,
+            'prev_day_low': low,
+            'prev_day_close': close,
+            'prev_day_change': round(close - open, 2),
+            'prev_day_change_perc': round(round(close - open, 2) / open * 100, 2),
+            'prev_day_range': round(high - low, 2),
+            'prev_day_change_to_range': abs(round(round(close - open, 2) / round(high - low, 2), 2))
+        } AS metrics
+    FROM prev_day_summary
+)
+SELECT replay_date, 'all' AS section, time, open, high, low, close, volume, NULL AS metrics
+FROM minutes
+UNION ALL
+SELECT replay_date, 't_minus_60', time, open, high, low, close, volume, NULL
+FROM minutes
+WHERE ts_ny >= replay_date + TIME '08:30'
+UNION ALL
+SELECT replay_date, 'prev_day_business_hours', time, open, high, low, close, volume, NULL
+FROM prev_day
+UNION ALL
+SELECT replay_date, 'm15', time, open, high, low, close, volume, NULL
+FROM m15
+UNION ALL
+SELECT replay_date, 'h1', time, open, high, low, close, volume, NULL
+FROM h1
+UNION ALL
+SELECT replay_date, 'metrics', NULL, NULL, NULL, NULL, NULL, NULL, metrics
+FROM metrics
+ORDER BY replay_date, section, time;
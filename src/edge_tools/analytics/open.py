@@ -3,6 +3,7 @@ import pandas as pd
 import mplfinance as mpf
 from .utils import get_data_from_specific_date, get_available_dates
 from ..db import get_duckdb_connection
+from ..sessions import ensure_sessions
 from ..utils.dir import get_sql_query
 from datetime import date
 
@@ -11,6 +12,7 @@ logger = logging.getLogger(__name__)
 
 def ny_open_30_minute():
     with get_duckdb_connection() as con:
+        ensure_sessions(con)
         query = get_sql_query("get_first_30_min.sql")
         result = con.execute(query).df()
         logger.debug(f"Last 5 df results: {result.tail()}")
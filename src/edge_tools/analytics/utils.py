@@ -18,13 +18,45 @@ def get_available_dates(df: pd.DataFrame) -> List[datetime]:
     logger.debug(f"Last 5 Entries of available dates: {dates[-5:]}")
     return dates
 
-def convert_to_timestamp(df):
+def to_epoch_seconds(values: pd.Series) -> pd.Series:
+    """
+    Integer UTC epoch seconds of a datetime column, naive values are New York time.
+
+    Reads the int64 representation of the whole column instead of formatting rows.
+    """
+    if values.dt.tz is None:
+        values = values.dt.tz_localize("America/New_York")
+    return values.dt.tz_convert("UTC").dt.as_unit("s").astype("int64")
+
+
+def convert_to_timestamp(df, time_format="iso"):
     """
     convert ny time zone to utc, need to rename
+
+    time_format "iso" writes "%Y-%m-%dT%H:%M:%SZ" strings, "epoch" integer
+    epoch seconds, which skips the slow per row strftime.
     """
+    if time_format == "epoch":
+        df["time"] = to_epoch_seconds(df["time"])
+        return df
     if df["time"].dt.tz is None:
         df["time"] = df["time"].dt.tz_localize("America/New_York")
     df["time"] = df["time"].dt.tz_convert("UTC")
     df["time"] = df["time"].dt.strftime("%Y-%m-%dT%H:%M:%SZ")
     logger.debug(f"Converted datetime to timestamp   \n {df.head(10)}")
-    return df
\ No newline at end of file
+    return df
+
+
+def frame_to_columns(df: pd.DataFrame, time_col: str = "time") -> dict:
+    """
+    Turn a bar frame into parallel lists, `time_col` as integer epoch seconds.
+
+    Converts whole columns at once instead of building a dict per row.
+    """
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if col == time_col:
+            values = to_epoch_seconds(values)
+        columns[col] = values.to_numpy().tolist()
+    return columns
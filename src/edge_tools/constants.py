@@ -7,3 +7,12 @@ DATAPATH = os.getenv("DUCKDB_PATH", "/Users/ducjeremyvu/trading/price_data")
 
 # alternative below makes it OS independent
 # DATAPATH = Path(os.getenv("DATAPATH", "/Users/ducjeremyvu/trading/price_data")).expanduser()
+
+# cursors the API may run in parallel, one per core by default
+DUCKDB_POOL_SIZE = int(os.getenv("DUCKDB_POOL_SIZE", os.cpu_count() or 4))
+
+# folder for the API's persistent response cache of past days, unset disables it
+API_DISK_CACHE_DIR = os.getenv("API_DISK_CACHE_DIR")
+
+# ingests that add at least this many rows to an ohlcv table re-sort it afterwards
+COMPACT_AFTER_ROWS = int(os.getenv("COMPACT_AFTER_ROWS", 500_000))
@@ -1,3 +1,13 @@
+from .pool import CursorPool, PoolTimeout
+from .versions import bump_data_version, get_data_version
+from .queries import QueryRegistry, QUERIES
+from .maintenance import (
+    compact_table,
+    compact_ohlcv,
+    compact_after_ingest,
+    rowgroup_stats,
+)
+
 import logging
 import duckdb
 import functools
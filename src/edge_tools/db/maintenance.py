@@ -0,0 +1,155 @@
+"""
+Storage maintenance for the OHLCV tables.
+
+Ingest appends rows in arrival order, so the min/max zone map of every row group
+covers a wide span of `time` and a one day lookup has to read most of the table.
+`compact_table` rewrites a table ordered by (symbol, time), afterwards each row
+group holds a narrow time range and a day lookup reads only a handful of them.
+`rowgroup_stats` reports how well a table is clustered. `table_compactions`
+counts the rows appended since the last rewrite.
+"""
+
+from ..constants import COMPACT_AFTER_ROWS
+from ..utils.dir import get_sql_query
+
+from duckdb import DuckDBPyConnection
+from pathlib import Path
+import logging
+import time
+
+HERE = Path(__file__).resolve().parent
+
+STATS_QUERY = "rowgroup_stats"
+
+OHLCV_TABLES = ["ohlcv_minute", "ohlcv_hour", "ohlcv_daily", "ohlcv_weekly"]
+CLUSTER_KEY = ("symbol", "time")
+
+logger = logging.getLogger(__name__)
+
+
+def rowgroup_stats(con: DuckDBPyConnection, table: str, column: str = "time") -> dict:
+    """
+    Row group statistics of `table` from DuckDB's storage info.
+
+    Args:
+        con (DuckDBPyConnection): DuckDB connection.
+        table (str): Table to inspect.
+        column (str, optional): Timestamp column of the zone maps. Defaults to "time".
+
+    Returns:
+        dict: table, rows, row_groups and row_groups_per_day_avg / _max, the
+        number of row groups whose `column` range overlaps one UTC day.
+    """
+    row_groups, rows, per_day_avg, per_day_max = con.execute(
+        get_sql_query(STATS_QUERY, HERE, table=table, column=column)
+    ).fetchone()
+    return {
+        "table": table,
+        "rows": rows,
+        "row_groups": row_groups,
+        "row_groups_per_day_avg": per_day_avg,
+        "row_groups_per_day_max": per_day_max,
+    }
+
+
+def compact_table(
+    con: DuckDBPyConnection, table: str, order_by: tuple[str, ...] = CLUSTER_KEY
+) -> dict:
+    """
+    Rewrite `table` sorted by `order_by` and checkpoint, in its own transaction,
+    and reset its count of appended rows.
+
+    The table is recreated from its own DDL (keys, defaults and indexes stay)
+    and refilled in order, the old row groups are dropped instead of being kept
+    around as deleted rows.
+
+    Args:
+        con (DuckDBPyConnection): Writable DuckDB connection, not in a transaction.
+        table (str): Table to rewrite.
+        order_by (tuple[str, ...], optional): Sort key. Defaults to (symbol, time).
+
+    Returns:
+        dict: `rowgroup_stats` before and after plus the elapsed seconds.
+    """
+    before = rowgroup_stats(con, table)
+    table_sql = con.execute(
+        "SELECT sql FROM duckdb_tables() WHERE table_name = ?", [table]
+    ).fetchone()[0]
+    indexes = con.execute(
+        "SELECT index_name, sql FROM duckdb_indexes() WHERE table_name = ?", [table]
+    ).fetchall()
+    unsorted = f"{table}__unsorted"
+
+    start = time.perf_counter()
+    con.execute("BEGIN TRANSACTION")
+    try:
+        # DuckDB does not rename tables that indexes depend on
+        for index_name, _ in indexes:
+            con.execute(f"DROP INDEX {index_name}")
+        con.execute(f"ALTER TABLE {table} RENAME TO {unsorted}")
+        con.execute(table_sql)
+        con.execute(
+            f"INSERT INTO {table} SELECT * FROM {unsorted} ORDER BY {', '.join(order_by)}"
+        )
+        con.execute(f"DROP TABLE {unsorted}")
+        for _, index_sql in indexes:
+            con.execute(index_sql)
+        con.execute(
+            """
+            INSERT INTO table_compactions (table_name, rows_added, compacted_at)
+            VALUES (?, 0, NOW())
+            ON CONFLICT (table_name) DO UPDATE
+            SET rows_added = 0, compacted_at = EXCLUDED.compacted_at
+            """,
+            [table],
+        )
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    con.execute("CHECKPOINT")
+    elapsed = time.perf_counter() - start
+
+    after = rowgroup_stats(con, table)
+    logger.info(
+        f"Compacted {table} ({after['rows']} rows) in {elapsed:.2f}s, row groups per "
+        f"day {before['row_groups_per_day_avg']} -> {after['row_groups_per_day_avg']}"
+    )
+    return {"before": before, "after": after, "seconds": round(elapsed, 2)}
+
+
+def compact_ohlcv(con: DuckDBPyConnection, tables: list[str] = None) -> list[dict]:
+    """Compact every table of `tables` (default OHLCV_TABLES) that exists."""
+    existing = {
+        row[0] for row in con.execute("SELECT table_name FROM duckdb_tables()").fetchall()
+    }
+    return [
+        compact_table(con, table)
+        for table in tables or OHLCV_TABLES
+        if table in existing
+    ]
+
+
+def compact_after_ingest(
+    con: DuckDBPyConnection, table: str, inserted: int, threshold: int = None
+) -> dict | None:
+    """Add the `inserted` rows of an ingest to the rows appended to `table` since
+    its last compaction and compact it once they reach `threshold` (default
+    COMPACT_AFTER_ROWS). Fewer appended rows leave the order mostly intact."""
+    threshold = COMPACT_AFTER_ROWS if threshold is None else threshold
+    rows_added = con.execute(
+        """
+        INSERT INTO table_compactions (table_name, rows_added)
+        VALUES (?, ?)
+        ON CONFLICT (table_name) DO UPDATE
+        SET rows_added = table_compactions.rows_added + EXCLUDED.rows_added
+        RETURNING rows_added
+        """,
+        [table, inserted],
+    ).fetchone()[0]
+    if rows_added < threshold:
+        return None
+    logger.info(
+        f"{rows_added} rows added to {table} since its last compaction, compacting it"
+    )
+    return compact_table(con, table)
@@ -1,5 +1,6 @@
 from edge_tools.utils.dir import load_query_path
 from edge_tools.db import get_duckdb_connection
+from edge_tools.sessions import ensure_sessions
 import logging
 from pathlib import Path
 
@@ -7,12 +8,23 @@ logger = logging.getLogger(__name__)
 
 HERE = Path(__file__).resolve().parent
 
-TABLE_REGISTRY = ["create_table_ohlcv_minute", "create_table_metrics"]
+TABLE_REGISTRY = [
+    "create_table_ohlcv_minute",
+    "create_table_metrics",
+    "create_table_ingest_manifest",
+    "create_table_ohlcv_rollups",
+    "create_table_data_versions",
+    "create_table_sessions",
+    "create_table_compactions",
+]
 
 
 def load_all_tables():
     for table in TABLE_REGISTRY:
         create_tables_from_query(table)
+    # databases from before the sessions table get their history filled
+    with get_duckdb_connection() as con:
+        ensure_sessions(con)
 
 
 def create_tables_from_query(query_name: str) -> None:
@@ -0,0 +1,14 @@
+/*
+
+One row per compacted table, written by edge_tools.db.maintenance.
+
+rows_added counts the rows ingest appended since compacted_at, many small
+appends blur the zone maps as much as one large one.
+
+*/
+
+CREATE TABLE IF NOT EXISTS table_compactions (
+    table_name   TEXT PRIMARY KEY NOT NULL,
+    rows_added   BIGINT NOT NULL DEFAULT 0,
+    compacted_at TIMESTAMPTZ
+);
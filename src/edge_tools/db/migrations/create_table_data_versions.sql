@@ -0,0 +1,16 @@
+/*
+
+One row per ingest that changed ohlcv_minute. generation only grows, readers
+key caches on the highest generation overlapping the range they read.
+
+*/
+
+CREATE SEQUENCE IF NOT EXISTS data_generation_seq START 1;
+
+CREATE TABLE IF NOT EXISTS data_versions (
+    generation BIGINT PRIMARY KEY DEFAULT nextval('data_generation_seq'),
+    symbol     TEXT NOT NULL,
+    start_time TIMESTAMPTZ NOT NULL,
+    end_time   TIMESTAMPTZ NOT NULL,
+    added_at TIMESTAMPTZ DEFAULT (NOW() AT TIME ZONE 'UTC')
+);
@@ -0,0 +1,32 @@
+/*
+
+One row per ingested csv file, replaces the "_done" rename.
+
+status:
+    loading -> picked up, transaction not committed yet (crash leaves it here)
+    done    -> bars and this row were committed together
+    failed  -> last attempt raised, see error
+
+content_hash is the sha256 of the last full load, NULL after a tail load
+
+*/
+
+CREATE TABLE IF NOT EXISTS ingest_manifest (
+    path TEXT PRIMARY KEY NOT NULL,
+    symbol TEXT NOT NULL,
+    timeframe TEXT NOT NULL,
+    size_bytes BIGINT,
+    mtime TIMESTAMPTZ,
+    content_hash TEXT,
+    row_count BIGINT,
+    min_time TIMESTAMPTZ,
+    max_time TIMESTAMPTZ,
+    status TEXT NOT NULL,
+    error TEXT,
+    updated_at TIMESTAMPTZ DEFAULT (NOW() AT TIME ZONE 'UTC')
+);
+
+-- tail ingest: bytes consumed so far and a hash of the bytes right before them
+ALTER TABLE ingest_manifest ADD COLUMN IF NOT EXISTS byte_offset BIGINT;
+ALTER TABLE ingest_manifest ADD COLUMN IF NOT EXISTS tail_hash TEXT;
+
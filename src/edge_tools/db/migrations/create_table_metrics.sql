@@ -27,8 +27,26 @@ CREATE TABLE IF NOT EXISTS metric_events (
     metric_id INTEGER NOT NULL,
     metric_value DOUBLE,
     added_at TIMESTAMPTZ DEFAULT (NOW() AT TIME ZONE 'UTC'),
+    data_version BIGINT, -- data_versions generation of the date when computed
+    code_version TEXT, -- hash of the metric definition when computed
     FOREIGN KEY(metric_id) REFERENCES metrics(metric_id),
     PRIMARY KEY (date, symbol, metric_id)
 );
 
+-- metric_events of databases created before the version columns
+ALTER TABLE metric_events ADD COLUMN IF NOT EXISTS data_version BIGINT;
+ALTER TABLE metric_events ADD COLUMN IF NOT EXISTS code_version TEXT;
+
+-- per metric and symbol, the code version and the highest data generation of the
+-- last full evaluation, only dates of later generations are looked at again
+CREATE TABLE IF NOT EXISTS metric_state (
+    metric_id INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    code_version TEXT NOT NULL,
+    data_version BIGINT NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT (NOW() AT TIME ZONE 'UTC'),
+    FOREIGN KEY(metric_id) REFERENCES metrics(metric_id),
+    PRIMARY KEY (metric_id, symbol)
+);
+
 
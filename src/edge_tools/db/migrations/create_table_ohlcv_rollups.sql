@@ -0,0 +1,56 @@
+/*
+
+Bars aggregated from ohlcv_minute by edge_tools.rollup, kept apart from
+ohlcv_hour / ohlcv_daily / ohlcv_weekly which hold broker exports.
+
+session:
+    full        -> 24h, the trading day rolls at 18:00 New York
+    ny_business -> 09:30 - 16:00 New York only
+
+time is the bucket start.
+
+*/
+
+CREATE TABLE IF NOT EXISTS ohlcv_rollup_hour (
+    symbol    TEXT NOT NULL,
+    session   TEXT NOT NULL,
+    time      TIMESTAMPTZ NOT NULL,
+    open      DOUBLE,
+    high      DOUBLE,
+    low       DOUBLE,
+    close     DOUBLE,
+    volume    BIGINT,
+    bar_count INTEGER,
+    added_at TIMESTAMPTZ DEFAULT (NOW() AT TIME ZONE 'UTC'),
+    PRIMARY KEY (symbol, session, time)
+);
+
+
+CREATE TABLE IF NOT EXISTS ohlcv_rollup_daily (
+    symbol    TEXT NOT NULL,
+    session   TEXT NOT NULL,
+    time      TIMESTAMPTZ NOT NULL,
+    open      DOUBLE,
+    high      DOUBLE,
+    low       DOUBLE,
+    close     DOUBLE,
+    volume    BIGINT,
+    bar_count INTEGER,
+    added_at TIMESTAMPTZ DEFAULT (NOW() AT TIME ZONE 'UTC'),
+    PRIMARY KEY (symbol, session, time)
+);
+
+
+CREATE TABLE IF NOT EXISTS ohlcv_rollup_weekly (
+    symbol    TEXT NOT NULL,
+    session   TEXT NOT NULL,
+    time      TIMESTAMPTZ NOT NULL,
+    open      DOUBLE,
+    high      DOUBLE,
+    low       DOUBLE,
+    close     DOUBLE,
+    volume    BIGINT,
+    bar_count INTEGER,
+    added_at TIMESTAMPTZ DEFAULT (NOW() AT TIME ZONE 'UTC'),
+    PRIMARY KEY (symbol, session, time)
+);
@@ -0,0 +1,28 @@
+/*
+
+Session calendar written by edge_tools.sessions, one row per New York date.
+
+Every boundary is the UTC instant of a local wall clock time on that date, DST
+is resolved once here so queries can filter ohlcv_minute with plain UTC range
+predicates instead of converting every row to New York time.
+
+is_trading_day is false on weekends and NYSE holidays, the boundaries are
+filled for every date anyway (the CFDs trade around the cash session).
+
+*/
+
+CREATE TABLE IF NOT EXISTS sessions (
+    date            DATE NOT NULL,
+    is_trading_day  BOOLEAN NOT NULL,
+    ny_day_start    TIMESTAMPTZ NOT NULL, -- 00:00 New York
+    ny_day_end      TIMESTAMPTZ NOT NULL, -- 00:00 New York of the next date
+    tokyo_open      TIMESTAMPTZ NOT NULL, -- 09:00 Tokyo
+    london_open     TIMESTAMPTZ NOT NULL, -- 09:00 London
+    premarket_start TIMESTAMPTZ NOT NULL, -- 04:00 New York
+    t_minus_60      TIMESTAMPTZ NOT NULL, -- 08:30 New York
+    ny_open         TIMESTAMPTZ NOT NULL, -- 09:30 New York
+    ny_open_30_end  TIMESTAMPTZ NOT NULL, -- 10:00 New York
+    ny_close        TIMESTAMPTZ NOT NULL, -- 16:00 New York
+    added_at        TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (date)
+);
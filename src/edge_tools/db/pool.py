@@ -0,0 +1,124 @@
+from contextlib import contextmanager
+from queue import Queue, Empty
+import threading
+import logging
+import duckdb
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(TimeoutError):
+    """No cursor became available within the checkout timeout."""
+
+
+class CursorPool:
+    """
+    Bounded pool of DuckDB cursors on one database connection.
+
+    A DuckDB connection must not be used by several threads at once, but cursors
+    opened from it are independent connections to the same database and run in
+    parallel. Requests check a cursor out, use it on their own thread and hand it
+    back, waiting when all `size` cursors are busy.
+
+    Args:
+        duck_db_path (str, optional): Path to the DuckDB database file.
+            Defaults to "local.duckdb".
+        size (int, optional): Number of cursors. Defaults to 4.
+        read_only (bool, optional): Open the database read only. Defaults to True.
+        timeout (float, optional): Seconds to wait for a free cursor before
+            raising PoolTimeout, None waits forever. Defaults to 30.
+    """
+
+    def __init__(
+        self,
+        duck_db_path: str = "local.duckdb",
+        size: int = 4,
+        read_only: bool = True,
+        timeout: float | None = 30,
+    ):
+        if size < 1:
+            raise ValueError(f"Pool size must be at least 1, got {size}")
+        self.size = size
+        self.timeout = timeout
+        self.con = duckdb.connect(duck_db_path, read_only=read_only)
+        self._cursors: Queue = Queue(maxsize=size)
+        for _ in range(size):
+            self._cursors.put(self.con.cursor())
+
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._wait_time = 0.0
+        self._max_wait_time = 0.0
+        logger.info(f"Opened cursor pool of {size} on {duck_db_path}")
+
+    @contextmanager
+    def checkout(self, timeout: float | None = None):
+        """
+        Borrow a cursor for the duration of the block.
+
+        Args:
+            timeout (float, optional): Overrides the pool timeout.
+
+        Yields:
+            duckdb.DuckDBPyConnection: A cursor no other thread is using.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        start = time.perf_counter()
+        try:
+            cursor = self._cursors.get_nowait()
+            waited = None
+        except Empty:
+            try:
+                cursor = self._cursors.get(timeout=timeout)
+            except Empty:
+                with self._lock:
+                    self._timeouts += 1
+                raise PoolTimeout(
+                    f"No DuckDB cursor free after {timeout}s ({self.size} in use)"
+                ) from None
+            waited = time.perf_counter() - start
+
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            if waited is not None:
+                self._waits += 1
+                self._wait_time += waited
+                self._max_wait_time = max(self._max_wait_time, waited)
+        if waited is not None:
+            logger.debug(f"Waited {waited:.4f}s for a DuckDB cursor")
+
+        try:
+            yield cursor
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._cursors.put(cursor)
+
+    def stats(self) -> dict:
+        """Return pool health: size, in_use, checkouts, waits, timeouts and wait times in seconds."""
+        with self._lock:
+            return {
+                "size": self.size,
+                "in_use": self._in_use,
+                "available": self.size - self._in_use,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "wait_time_total": round(self._wait_time, 6),
+                "wait_time_max": round(self._max_wait_time, 6),
+            }
+
+    def close(self) -> None:
+        """Close all cursors and the underlying connection."""
+        while True:
+            try:
+                self._cursors.get_nowait().close()
+            except Empty:
+                break
+        self.con.close()
+        logger.info("Closed cursor pool")
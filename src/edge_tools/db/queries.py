@@ -0,0 +1,93 @@
+from ..utils.dir import SQL_DIR, check_if_sql_suffix, load_query
+
+from duckdb import DuckDBPyConnection
+from pathlib import Path
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class QueryRegistry:
+    """
+    Named SQL statements rendered once and run with bound parameters.
+
+    Jinja only shapes a statement (which columns, which branches), runtime values
+    such as dates and symbols are `$name` parameters in the template and are bound
+    by DuckDB on every call. A request therefore never reads, compiles or renders a
+    template, and values never end up inside the SQL text.
+
+    Register at import time next to the code that runs the query, the text is
+    rendered on first use or by `load_all` at startup.
+    """
+
+    def __init__(self):
+        self._sources: dict[str, tuple[str, Path, dict]] = {}
+        self._sql: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.renders = 0
+        self.executions = 0
+
+    def register(self, name: str, file_name: str, here: Path = SQL_DIR, **structure) -> None:
+        """Register the template `file_name` in `here` under `name`.
+
+        Args:
+            name (str): Name callers execute the statement by.
+            file_name (str): Template filename, ".sql" is optional.
+            here (Path, optional): Folder of the template. Defaults to the root sql folder.
+            **structure: Template variables that shape the statement, rendered once.
+                Runtime values belong in `$name` parameters instead.
+        """
+        source = (check_if_sql_suffix(file_name), Path(here), structure)
+        with self._lock:
+            if self._sources.get(name, source) != source:
+                raise ValueError(f"Query {name} is already registered with another template")
+            self._sources[name] = source
+        logger.debug(f"Registered query {name}: {source[0]} {structure}")
+
+    def sql(self, name: str) -> str:
+        """Rendered text of `name`, without the trailing semicolon so it can be used
+        as a subquery."""
+        sql = self._sql.get(name)
+        if sql is not None:
+            return sql
+        with self._lock:
+            if name not in self._sql:
+                file_name, here, structure = self._sources[name]
+                rendered = load_query(file_name, here).render(**structure)
+                self._sql[name] = rendered.strip().rstrip(";")
+                self.renders += 1
+            return self._sql[name]
+
+    def execute(self, con: DuckDBPyConnection, name: str, **params) -> DuckDBPyConnection:
+        """Run `name` on `con` with `params` bound to its `$name` parameters.
+
+        DuckDB keeps the result on `con`, fetch it with .df(), .fetchall(), ...
+        """
+        sql = self.sql(name)
+        self.executions += 1
+        return con.execute(sql, params or None)
+
+    def load_all(self) -> int:
+        """Render every registered query, so a missing template or a broken one
+        fails at startup instead of on the first request.
+
+        Returns:
+            int: Number of registered queries.
+        """
+        for name in list(self._sources):
+            self.sql(name)
+        logger.info(f"Loaded {len(self._sources)} queries")
+        return len(self._sources)
+
+    def stats(self) -> dict:
+        return {
+            "registered": len(self._sources),
+            "rendered": len(self._sql),
+            "renders": self.renders,
+            "executions": self.executions,
+        }
+
+
+# queries of the API hot path, registered by the modules that run them
+QUERIES = QueryRegistry()
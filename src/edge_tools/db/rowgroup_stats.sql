@@ -0,0 +1,37 @@
+-- zone map ranges of {{column}} per row group of {{table}}, and how many row groups
+-- a lookup of one UTC day has to read (all symbols)
+WITH segments AS (
+    SELECT
+        row_group_id,
+        count,
+        regexp_extract(stats, 'Min: ([^,\]]+), Max: ([^,\]]+)', ['lo', 'hi']) AS bounds
+    FROM pragma_storage_info('{{table}}')
+    WHERE column_name = '{{column}}'
+        AND segment_type <> 'VALIDITY'
+),
+row_groups AS (
+    SELECT
+        row_group_id,
+        sum(count) AS rows,
+        min(bounds.lo::TIMESTAMPTZ) AS lo,
+        max(bounds.hi::TIMESTAMPTZ) AS hi
+    FROM segments
+    GROUP BY row_group_id
+),
+days AS (
+    SELECT unnest(generate_series(date_trunc('day', min(lo)), max(hi), INTERVAL 1 DAY)) AS day
+    FROM row_groups
+),
+per_day AS (
+    SELECT day, count(row_group_id) AS row_groups
+    FROM days
+    LEFT JOIN row_groups
+        ON lo < day + INTERVAL 1 DAY AND hi >= day
+    GROUP BY day
+)
+SELECT
+    (SELECT count(*) FROM row_groups) AS row_groups,
+    (SELECT coalesce(sum(rows), 0) FROM row_groups)::BIGINT AS rows,
+    round(avg(row_groups), 2) AS row_groups_per_day_avg,
+    max(row_groups) AS row_groups_per_day_max
+FROM per_day
@@ -0,0 +1,69 @@
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+import logging
+import duckdb
+
+logger = logging.getLogger(__name__)
+
+NY = ZoneInfo("America/New_York")
+
+
+def bump_data_version(
+    con: duckdb.DuckDBPyConnection, symbol: str, start: datetime, end: datetime
+) -> int:
+    """
+    Record that the minute bars of `symbol` between `start` and `end` changed.
+    Call it in the transaction that writes the bars.
+
+    Args:
+        con (duckdb.DuckDBPyConnection): Writable DuckDB connection.
+        symbol (str): Symbol of the written bars.
+        start (datetime): First written bar, timezone aware.
+        end (datetime): Last written bar, timezone aware.
+
+    Returns:
+        int: The new generation.
+    """
+    generation = con.execute(
+        """
+        INSERT INTO data_versions (symbol, start_time, end_time)
+        VALUES (?, ?, ?)
+        RETURNING generation
+        """,
+        [symbol, start, end],
+    ).fetchone()[0]
+    logger.debug(f"Data version of {symbol} {start} - {end} is now {generation}")
+    return generation
+
+
+def get_data_version(
+    con: duckdb.DuckDBPyConnection,
+    symbol: str,
+    start_date: str | date,
+    end_date: str | date = None,
+) -> int:
+    """
+    Highest generation that touched `symbol` on the New York days from
+    `start_date` to `end_date` (inclusive), 0 if nothing was recorded.
+
+    Args:
+        con (duckdb.DuckDBPyConnection): DuckDB connection.
+        symbol (str): Symbol, e.g. "US500".
+        start_date (str | date): First day, e.g. "2025-11-06".
+        end_date (str | date, optional): Last day. Defaults to start_date.
+
+    Returns:
+        int: The data version of that range.
+    """
+    start_date = date.fromisoformat(str(start_date))
+    end_date = date.fromisoformat(str(end_date)) if end_date else start_date
+    start = datetime.combine(start_date, time(), tzinfo=NY)
+    end = datetime.combine(end_date + timedelta(days=1), time(), tzinfo=NY)
+    return con.execute(
+        """
+        SELECT coalesce(max(generation), 0)
+        FROM data_versions
+        WHERE symbol = ? AND start_time < ? AND end_time >= ?
+        """,
+        [symbol, end, start],
+    ).fetchone()[0]
@@ -0,0 +1,223 @@
+from .files import assign_data_path, TIMEFRAMES
+from .tail import csv_source
+from .manifest import (
+    get_pending_files,
+    mark_file_loading,
+    mark_file_done,
+    mark_file_failed,
+    record_minute_changes,
+)
+from ..db import get_duckdb_connection, compact_after_ingest
+from ..utils.dir import get_sql_query
+
+from collections import defaultdict
+from contextlib import ExitStack
+from duckdb import DuckDBPyConnection
+from pathlib import Path
+import logging
+import time
+
+HERE = Path(__file__).resolve().parent
+
+STAGE_QUERY = "stage_csv_files"
+STAGING_QUERY = "create_staging_table"
+MERGE_QUERY = "merge_staging_into_ohlcv"
+
+logger = logging.getLogger(__name__)
+
+
+def stage_csv_files(
+    con: DuckDBPyConnection, entries: list[dict], staging_table: str
+) -> dict[str, int]:
+    """Read every pending file into `staging_table` without leaving DuckDB.
+
+    Files that share a reader layout (csv schema, full or tail read) are read by
+    one `read_csv` over the file list, which DuckDB parallelizes itself.
+
+    Args:
+        con (DuckDBPyConnection): Connection holding the staging table.
+        entries (list[dict]): Pending files as returned by `get_pending_files`.
+        staging_table (str): Table created by `create_staging_table.sql`.
+
+    Returns:
+        dict[str, int]: Byte offset to commit, by manifest path.
+    """
+    offsets = {}
+    with ExitStack() as stack:
+        layouts = defaultdict(list)
+        for entry in entries:
+            source = stack.enter_context(csv_source(entry))
+            offsets[entry["key"]] = source["byte_offset"]
+            layouts[source["reader_options"]].append((entry, source["file_path_csv"]))
+
+        for reader_options, files in layouts.items():
+            query = get_sql_query(
+                STAGE_QUERY,
+                HERE,
+                staging_table=staging_table,
+                reader_options=reader_options,
+            )
+            con.execute(
+                query,
+                {
+                    "files": [file for _, file in files],
+                    "paths": [entry["key"] for entry, _ in files],
+                    "symbols": [entry["symbol"] for entry, _ in files],
+                },
+            )
+    return offsets
+
+
+def ingest_files_bulk(
+    con: DuckDBPyConnection, entries: list[dict], timeframe: str
+) -> list[dict]:
+    """Stage `entries` with one read per reader layout and merge once into
+    ohlcv_{timeframe}.
+
+    The merge, all manifest rows and, for minute files, the refreshed rollup
+    buckets and data versions are committed in one transaction. Large merges
+    re-sort the table afterwards, see `compact_after_ingest`.
+
+    Args:
+        con (DuckDBPyConnection): Writable DuckDB connection.
+        entries (list[dict]): Pending files of a single timeframe.
+        timeframe (str): Timeframe as used in the filenames, e.g. "Minute".
+
+    Files of one reader layout are parsed by the same `read_csv` scan, so there
+    is no separate parse time per file. A file's rate is its staged rows over
+    the time of the whole staging step.
+
+    Returns:
+        list[dict]: Per-file stats (symbol, path, rows read, byte_offset,
+        stage_secs shared by the batch, rows_per_sec).
+    """
+    timeframe_lower = timeframe.lower()
+    staging_table = f"staging_ohlcv_{timeframe_lower}"
+    params = {"timeframe": timeframe_lower, "staging_table": staging_table}
+
+    con.execute(get_sql_query(STAGING_QUERY, HERE, **params))
+    for entry in entries:
+        mark_file_loading(con, entry)
+
+    start = time.perf_counter()
+    con.execute("BEGIN TRANSACTION")
+    try:
+        offsets = stage_csv_files(con, entries, staging_table)
+        stage_secs = time.perf_counter() - start
+        file_stats = {
+            path: stats
+            for path, *stats in con.execute(
+                f"""
+                SELECT path, count(*), min(time), max(time)
+                FROM {staging_table}
+                GROUP BY path
+                """
+            ).fetchall()
+        }
+        staged_rows = sum(stats[0] for stats in file_stats.values())
+        logger.debug(
+            f"Staged {staged_rows} rows from {len(entries)} {timeframe} files in "
+            f"{stage_secs:.2f}s"
+        )
+        # bars at or before the last committed bar of their file are stored
+        con.execute(
+            f"""
+            DELETE FROM {staging_table} s
+            USING (
+                SELECT unnest($paths) AS path,
+                    unnest($resume_after::TIMESTAMPTZ[]) AS resume_after
+            ) r
+            WHERE s.path = r.path AND s.time <= r.resume_after
+            """,
+            {
+                "paths": [entry["key"] for entry in entries],
+                "resume_after": [entry["resume_after"] for entry in entries],
+            },
+        )
+
+        # resume_after is applied per file above
+        inserted = con.execute(
+            get_sql_query(MERGE_QUERY, HERE, **params), {"resume_after": None}
+        ).fetchone()[0]
+        if timeframe_lower == "minute" and inserted:
+            touched = con.execute(
+                f"SELECT symbol, min(time), max(time) FROM {staging_table} GROUP BY symbol"
+            ).fetchall()
+            for symbol, start_time, end_time in touched:
+                record_minute_changes(con, symbol, start_time, end_time)
+        for entry in entries:
+            mark_file_done(
+                con,
+                entry,
+                file_stats.get(entry["key"], (0, None, None)),
+                offsets[entry["key"]],
+            )
+        con.execute("COMMIT")
+    except Exception as e:
+        con.execute("ROLLBACK")
+        for entry in entries:
+            mark_file_failed(con, entry, e)
+        raise
+    finally:
+        con.execute(f"DROP TABLE IF EXISTS {staging_table}")
+    elapsed = time.perf_counter() - start
+
+    logger.info(
+        f"Merged {inserted} new of {staged_rows} staged rows from {len(entries)} files "
+        f"into ohlcv_{timeframe_lower} in {elapsed:.2f}s "
+        f"({round(staged_rows / elapsed) if elapsed > 0 else None} rows/sec)"
+    )
+    compact_after_ingest(con, f"ohlcv_{timeframe_lower}", inserted)
+
+    stats = []
+    for entry in entries:
+        rows = file_stats.get(entry["key"], (0,))[0]
+        rows_per_sec = round(rows / stage_secs) if stage_secs > 0 else None
+        logger.debug(
+            f"Staged {rows} rows from {entry['path']} ({rows_per_sec} rows/sec)"
+        )
+        stats.append(
+            {
+                "symbol": entry["symbol"],
+                "path": entry["path"],
+                "rows": rows,
+                "byte_offset": offsets[entry["key"]],
+                "stage_secs": round(stage_secs, 3),
+                "rows_per_sec": rows_per_sec,
+            }
+        )
+    return stats
+
+
+def insert_file_data_bulk(
+    timeframes: list[str] = None,
+    datapath: str = None,
+) -> list[dict]:
+    """
+    Bulk variant of `insert_file_data`. For every timeframe all new or changed files are
+    read by one multi-file `read_csv` into a temp table and merged with a single
+    set-based insert instead of one statement per file.
+
+    Args:
+        timeframes (list[str], optional): Timeframes to ingest. Defaults to TIMEFRAMES.
+        datapath (str, optional): Custom data folder. Defaults to DATAPATH.
+
+    Returns:
+        list[dict]: Per-file stats as returned by `ingest_files_bulk`.
+    """
+    timeframes = timeframes or TIMEFRAMES
+    folder = assign_data_path(datapath)
+
+    stats = []
+    with get_duckdb_connection() as con:
+        for timeframe in timeframes:
+            logger.debug(f"Running bulk ingest for Timeframe: {timeframe}")
+            entries = get_pending_files(con, folder, interval=timeframe)
+
+            if entries == []:
+                logger.info(f"No new {timeframe} files to process.")
+                continue
+
+            stats.extend(ingest_files_bulk(con, entries, timeframe))
+
+    return stats
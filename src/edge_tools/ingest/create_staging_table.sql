@@ -0,0 +1,12 @@
+
+CREATE OR REPLACE TEMP TABLE {{staging_table}} (
+    path   TEXT NOT NULL, -- ingest_manifest path of the source file
+    symbol TEXT NOT NULL,
+    time   TIMESTAMPTZ NOT NULL,
+    open   DOUBLE,
+    high   DOUBLE,
+    low    DOUBLE,
+    close  DOUBLE,
+    volume BIGINT
+);
+
@@ -1,11 +1,19 @@
 from ..constants import DATAPATH
 
+import hashlib
 import logging
 from pathlib import Path
 
 
 logger = logging.getLogger(__name__)
 
+TIMEFRAMES = ["Minute", "Daily", "Weekly", "Hour"]
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# bytes right before the committed offset that must be unchanged for a tail read
+ANCHOR_SIZE = 64 * 1024
+
 
 def assign_data_path(datapath: str = None) -> Path:
     """Assigns the data path for price data storage.
@@ -20,27 +28,6 @@ def assign_data_path(datapath: str = None) -> Path:
     return Path(datapath).expanduser()
 
 
-def get_unwritten_files(folder: Path, interval: str = "Minute") -> list[Path]:
-    """Retrieves a list of files in the specified folder that have not been marked as done.
-    Args:
-        folder (Path): The folder to search for files.
-        symbol (str, optional): The symbol to filter files. Defaults to "US500".
-        interval (str, optional): The interval to filter files. Defaults to "Minute".
-    Returns:
-        list[Path]: A list of Path objects representing the unwritten files.
-    """
-    files = [
-        f
-        for f in folder.iterdir()
-        if f.is_file()
-        and f"_{interval}_" in f.name
-        and "_done" not in f.name
-        and f.name.endswith(".csv")
-    ]
-    logger.debug(f"Unwritten files found: {[str(f) for f in files]}")
-    return files
-
-
 def extract_symbol_from_filename(filename: Path) -> str:
     """Extracts the symbol from a given filename.
     Args:
@@ -52,16 +39,15 @@ def extract_symbol_from_filename(filename: Path) -> str:
     return symbol
 
 
-# Dict comprehension: map symbol (from filename) to Path object
-def map_symbols_to_files(files: list[Path]) -> dict[str, Path]:
-    """
-    Creates a dictionary mapping symbols (extracted from filenames) to their Path objects.
+def extract_interval_from_filename(filename: Path) -> str:
+    """Extracts the interval (Minute, Hour, Daily, Weekly) from a given filename.
     Args:
-        files (list[Path]): List of file paths.
+        filename (Path): The filename to extract the interval from.
     Returns:
-        dict[str, Path]: Dictionary mapping symbol to Path.
+        str: The extracted interval.
     """
-    return {extract_symbol_from_filename(f): f for f in files}
+    interval = filename.name.split("_")[1]
+    return interval
 
 
 def get_absolute_filepath(path: Path) -> str:
@@ -76,38 +62,47 @@ def get_absolute_filepath(path: Path) -> str:
     return str(path.absolute())
 
 
-def build_symbol_file_records(symbol_file_map: dict[str, Path]) -> list[dict]:
-    """Convert a mapping of symbol -> Path into a list of dicts:
-    [{ "path": Path object, "parameter": {"symbol": symbol, "file_path_csv": path_str} }, ...]
+def hash_file(path: Path) -> str:
+    """Return the sha256 hex digest of the file content."""
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_anchor(path: Path, offset: int) -> str:
+    """Hash the ANCHOR_SIZE bytes before `offset`.
+
+    Matching anchors mean the file was appended to rather than rewritten, without
+    reading the whole history.
+
+    Args:
+        path (Path): The file.
+        offset (int): Byte offset the anchor ends at.
+
+    Returns:
+        str: sha256 hex digest of the anchor bytes.
     """
-    records: list[dict] = []
-    for symbol, path_obj in symbol_file_map.items():
-        path_str = (
-            get_absolute_filepath(path_obj)
-            if isinstance(path_obj, Path)
-            else str(path_obj)
-        )
-        records.append(
-            {
-                "path": path_obj,
-                "parameter": {"symbol": symbol, "file_path_csv": path_str},
-            }
-        )
-    logger.debug(f"Built symbol file records: {records}")
-    return records
-
-
-def mark_file_as_done(file_path: Path) -> Path:
-    """Renames a file by appending '_done' before the extension.
+    start = max(0, offset - ANCHOR_SIZE)
+    with path.open("rb") as f:
+        f.seek(start)
+        return hashlib.sha256(f.read(offset - start)).hexdigest()
+
+
+def read_complete_tail(path: Path, offset: int) -> bytes:
+    """Read from `offset` to the last newline, a partially written last line is left
+    for the next run.
 
     Args:
-        file_path (Path): Path object of the file to rename
+        path (Path): The file.
+        offset (int): Byte offset to start reading at.
 
     Returns:
-        Path: Path object of the renamed file
+        bytes: Complete lines after `offset`, may be empty.
     """
-    new_name = file_path.stem + "_done" + file_path.suffix
-    new_path = file_path.parent / new_name
-    file_path.rename(new_path)
-    logger.debug(f"File renamed from {file_path} to {new_path}")
-    return new_path
+    with path.open("rb") as f:
+        f.seek(offset)
+        tail = f.read()
+    end = tail.rfind(b"\n")
+    return tail[: end + 1] if end >= 0 else b""
@@ -0,0 +1,327 @@
+from .files import (
+    extract_symbol_from_filename,
+    get_absolute_filepath,
+    hash_file,
+    hash_anchor,
+)
+from .tail import csv_source
+from ..rollup import refresh_rollups
+from ..sessions import refresh_sessions
+from ..db import bump_data_version
+from ..utils.dir import get_sql_query
+
+from datetime import datetime, timezone
+from duckdb import DuckDBPyConnection
+from pathlib import Path
+import logging
+
+HERE = Path(__file__).resolve().parent
+
+SELECT_QUERY = "select_data_with_symbol_from_csv"
+MERGE_QUERY = "merge_staging_into_ohlcv"
+
+STAGED_FILE_TABLE = "staged_file"
+
+logger = logging.getLogger(__name__)
+
+
+def scan_csv_files(folder: Path, interval: str = "Minute") -> list[Path]:
+    """List every csv export of `interval` in `folder`, processed or not.
+
+    Files renamed with the old "_done" suffix are included, the manifest decides
+    whether they still need work.
+
+    Args:
+        folder (Path): The folder to search for files.
+        interval (str, optional): The interval to filter files. Defaults to "Minute".
+    Returns:
+        list[Path]: Sorted csv files of that interval.
+    """
+    files = sorted(
+        f
+        for f in folder.iterdir()
+        if f.is_file() and f"_{interval}_" in f.name and f.name.endswith(".csv")
+    )
+    logger.debug(f"Csv files found for {interval}: {[str(f) for f in files]}")
+    return files
+
+
+def file_fingerprint(path: Path) -> dict:
+    """Size and mtime of a file, cheap enough to run on every scan."""
+    stat = path.stat()
+    return {
+        "size_bytes": stat.st_size,
+        "mtime": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+    }
+
+
+def load_manifest(con: DuckDBPyConnection, timeframe: str) -> dict[str, dict]:
+    """Return manifest rows of `timeframe` keyed by absolute path."""
+    columns = [
+        "path",
+        "size_bytes",
+        "mtime",
+        "content_hash",
+        "row_count",
+        "min_time",
+        "max_time",
+        "byte_offset",
+        "tail_hash",
+        "status",
+    ]
+    rows = con.execute(
+        f"""
+        SELECT {", ".join(columns)}
+        FROM ingest_manifest
+        WHERE timeframe = ?
+        """,
+        [timeframe],
+    ).fetchall()
+    return {row[0]: dict(zip(columns, row)) for row in rows}
+
+
+def get_pending_files(
+    con: DuckDBPyConnection, folder: Path, interval: str = "Minute"
+) -> list[dict]:
+    """
+    Compare the folder against `ingest_manifest` and return files that are new,
+    changed, or whose last attempt did not commit.
+
+    Unchanged size and mtime skips a file without reading it. If the bytes right
+    before the committed `byte_offset` are unchanged a grown file was only appended
+    to and is loaded in tail mode (entry["tail_offset"]). Same size with a new mtime
+    (a re-download) is settled by the content hash, or by the anchor for files
+    whose last load was a tail read. Anything else is loaded in full.
+
+    Args:
+        con (DuckDBPyConnection): Connection holding the manifest.
+        folder (Path): The data folder.
+        interval (str, optional): Interval in the filenames. Defaults to "Minute".
+
+    Returns:
+        list[dict]: One entry per pending file with path, symbol, timeframe,
+        fingerprint, content_hash, `tail_offset` and `resume_after`, the last
+        committed timestamp of that file (None for new files).
+    """
+    timeframe = interval.lower()
+    manifest = load_manifest(con, timeframe)
+
+    pending = []
+    for path in scan_csv_files(folder, interval):
+        key = get_absolute_filepath(path)
+        fingerprint = file_fingerprint(path)
+        previous = manifest.get(key)
+
+        entry = {
+            "path": path,
+            "key": key,
+            "symbol": extract_symbol_from_filename(path),
+            "timeframe": timeframe,
+            **fingerprint,
+            "content_hash": None,
+            "tail_offset": None,
+            "previous": previous,
+            "resume_after": previous["max_time"] if previous else None,
+        }
+
+        if previous and previous["status"] == "done":
+            if (
+                previous["size_bytes"] == fingerprint["size_bytes"]
+                and previous["mtime"] == fingerprint["mtime"]
+            ):
+                continue
+
+            offset = previous["byte_offset"]
+            if (
+                offset is not None
+                and fingerprint["size_bytes"] > offset
+                and hash_anchor(path, offset) == previous["tail_hash"]
+            ):
+                # a full-file hash would mean reading the history again
+                entry["tail_offset"] = offset
+                pending.append(entry)
+                continue
+
+            if previous["size_bytes"] == fingerprint["size_bytes"]:
+                if previous["content_hash"] is None:
+                    unchanged = hash_anchor(path, offset) == previous["tail_hash"]
+                else:
+                    entry["content_hash"] = hash_file(path)
+                    unchanged = entry["content_hash"] == previous["content_hash"]
+                if unchanged:
+                    con.execute(
+                        "UPDATE ingest_manifest SET mtime = ? WHERE path = ?",
+                        [fingerprint["mtime"], key],
+                    )
+                    logger.debug(f"{path.name} re-downloaded without changes")
+                    continue
+
+        if entry["content_hash"] is None:
+            entry["content_hash"] = hash_file(path)
+        pending.append(entry)
+
+    logger.info(f"{len(pending)} new or changed {interval} files to process.")
+    return pending
+
+
+def mark_file_loading(con: DuckDBPyConnection, entry: dict) -> None:
+    """Record that `entry` was picked up, keeping the last committed stats."""
+    con.execute(
+        """
+        INSERT INTO ingest_manifest (path, symbol, timeframe, status)
+        VALUES (?, ?, ?, 'loading')
+        ON CONFLICT (path) DO UPDATE SET
+            status = 'loading',
+            error = NULL,
+            updated_at = NOW()
+        """,
+        [entry["key"], entry["symbol"], entry["timeframe"]],
+    )
+
+
+def combine_file_stats(entry: dict, stats: tuple) -> tuple:
+    """Add the stats of a tail load to the committed stats of the file.
+
+    Args:
+        entry (dict): Pending file as returned by `get_pending_files`.
+        stats (tuple): (row_count, min_time, max_time) of the rows just read.
+
+    Returns:
+        tuple: (row_count, min_time, max_time) of the whole file.
+    """
+    if entry["tail_offset"] is None:
+        return stats
+    previous = entry["previous"]
+    row_count, min_time, max_time = stats
+    times_min = [t for t in (previous["min_time"], min_time) if t is not None]
+    times_max = [t for t in (previous["max_time"], max_time) if t is not None]
+    return (
+        (previous["row_count"] or 0) + row_count,
+        min(times_min) if times_min else None,
+        max(times_max) if times_max else None,
+    )
+
+
+def mark_file_done(
+    con: DuckDBPyConnection, entry: dict, stats: tuple, byte_offset: int
+) -> None:
+    """Store fingerprint, (row_count, min_time, max_time) and the consumed byte offset
+    of a committed file."""
+    row_count, min_time, max_time = combine_file_stats(entry, stats)
+    con.execute(
+        """
+        INSERT INTO ingest_manifest (
+            path, symbol, timeframe, size_bytes, mtime, content_hash,
+            row_count, min_time, max_time, byte_offset, tail_hash, status
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'done')
+        ON CONFLICT (path) DO UPDATE SET
+            size_bytes = excluded.size_bytes,
+            mtime = excluded.mtime,
+            content_hash = excluded.content_hash,
+            row_count = excluded.row_count,
+            min_time = excluded.min_time,
+            max_time = excluded.max_time,
+            byte_offset = excluded.byte_offset,
+            tail_hash = excluded.tail_hash,
+            status = 'done',
+            error = NULL,
+            updated_at = NOW()
+        """,
+        [
+            entry["key"],
+            entry["symbol"],
+            entry["timeframe"],
+            entry["size_bytes"],
+            entry["mtime"],
+            entry["content_hash"],
+            row_count,
+            min_time,
+            max_time,
+            byte_offset,
+            hash_anchor(entry["path"], byte_offset),
+        ],
+    )
+
+
+def mark_file_failed(con: DuckDBPyConnection, entry: dict, error: Exception) -> None:
+    """Flag the file as failed, it is retried on the next run."""
+    con.execute(
+        """
+        UPDATE ingest_manifest
+        SET status = 'failed', error = ?, updated_at = NOW()
+        WHERE path = ?
+        """,
+        [str(error), entry["key"]],
+    )
+
+
+def record_minute_changes(
+    con: DuckDBPyConnection, symbol: str, start: datetime, end: datetime
+) -> None:
+    """Refresh the rollups and sessions and bump the data version for newly written
+    minute bars, inside the transaction that wrote them."""
+    refresh_rollups(con, symbol, start, end)
+    refresh_sessions(con, start, end)
+    bump_data_version(con, symbol, start, end)
+
+
+def ingest_file(con: DuckDBPyConnection, entry: dict) -> int:
+    """
+    Load one pending file into ohlcv_{timeframe} and commit it together with its
+    manifest row. Appended files are read from their committed byte offset, bars
+    at or before `resume_after` are skipped in either mode. Minute loads refresh
+    the rollup buckets they touched and bump the data version in the same
+    transaction.
+
+    Args:
+        con (DuckDBPyConnection): Writable DuckDB connection.
+        entry (dict): Pending file as returned by `get_pending_files`.
+
+    Returns:
+        int: Number of inserted rows.
+    """
+    path = entry["path"]
+    params = {
+        "symbol": entry["symbol"],
+        "timeframe": entry["timeframe"],
+        "staging_table": STAGED_FILE_TABLE,
+    }
+
+    mark_file_loading(con, entry)
+    con.execute("BEGIN TRANSACTION")
+    try:
+        with csv_source(entry) as source:
+            select = get_sql_query(SELECT_QUERY, HERE, **params, **source)
+            con.execute(f"CREATE OR REPLACE TEMP TABLE {STAGED_FILE_TABLE} AS {select}")
+        inserted = con.execute(
+            get_sql_query(MERGE_QUERY, HERE, **params),
+            {"resume_after": entry["resume_after"]},
+        ).fetchone()[0]
+        stats = con.execute(
+            f"SELECT count(*), min(time), max(time) FROM {STAGED_FILE_TABLE}"
+        ).fetchone()
+        if entry["timeframe"] == "minute" and inserted:
+            touched = con.execute(
+                f"""
+                SELECT min(time), max(time) FROM {STAGED_FILE_TABLE}
+                WHERE ?::TIMESTAMPTZ IS NULL OR time > ?::TIMESTAMPTZ
+                """,
+                [entry["resume_after"], entry["resume_after"]],
+            ).fetchone()
+            record_minute_changes(con, entry["symbol"], *touched)
+        mark_file_done(con, entry, stats, source["byte_offset"])
+        con.execute(f"DROP TABLE {STAGED_FILE_TABLE}")
+        con.execute("COMMIT")
+    except Exception as e:
+        con.execute("ROLLBACK")
+        mark_file_failed(con, entry, e)
+        logger.error(f"Failed to ingest {path.name}: {e}")
+        raise
+
+    mode = "tail" if entry["tail_offset"] is not None else "full"
+    logger.info(
+        f"Inserted {inserted} of {stats[0]} rows for symbol: {entry['symbol']}, "
+        f"timeframe: {entry['timeframe']} from file: {path.name} ({mode} read)"
+    )
+    return inserted
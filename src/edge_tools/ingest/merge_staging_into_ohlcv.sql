@@ -0,0 +1,17 @@
+
+-- overlapping exports carry the same bars, keep one row per (symbol, time)
+INSERT INTO ohlcv_{{timeframe}} (symbol, time, open, high, low, close, volume)
+SELECT DISTINCT ON (symbol, time)
+    symbol,
+    time,
+    open,
+    high,
+    low,
+    close,
+    volume
+FROM {{staging_table}}
+-- bars at or before $resume_after, the last committed bar of the file, are stored
+WHERE $resume_after::TIMESTAMPTZ IS NULL OR time > $resume_after::TIMESTAMPTZ
+ORDER BY symbol, time
+ON CONFLICT (symbol, time) DO NOTHING;
+
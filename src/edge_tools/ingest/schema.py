@@ -0,0 +1,92 @@
+from .files import extract_symbol_from_filename, extract_interval_from_filename
+
+from dataclasses import dataclass, field
+from pathlib import Path
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CsvSchema:
+    """Declared layout of a broker CSV export.
+
+    Column names are the names the import queries select from (Time, Open, ...),
+    they replace whatever the header says, so only order and types have to match
+    the file. Leave `timestamp_format` unset for ISO timestamps, DuckDB's native
+    parser is faster than a strptime format.
+    """
+
+    columns: dict[str, str]
+    timestamp_format: str | None = None
+    delimiter: str = ","
+    header: bool = True
+    extra: dict[str, str] = field(default_factory=dict)
+
+    def reader_options(self) -> str:
+        """Render the schema as keyword arguments for DuckDB `read_csv`.
+
+        Returns:
+            str: e.g. "columns = {'Time': 'TIMESTAMP', ...}, header = true, ..."
+        """
+        columns = ", ".join(f"'{name}': '{dtype}'" for name, dtype in self.columns.items())
+        options = {
+            "columns": "{" + columns + "}",
+            "header": "true" if self.header else "false",
+            "delim": f"'{self.delimiter}'",
+            "auto_detect": "false",
+            **self.extra,
+        }
+        if self.timestamp_format:
+            options["timestampformat"] = f"'{self.timestamp_format}'"
+        return ", ".join(f"{key} = {value}" for key, value in options.items())
+
+
+OHLCV_COLUMNS = {
+    "Time": "TIMESTAMP",
+    "Open": "DOUBLE",
+    "High": "DOUBLE",
+    "Low": "DOUBLE",
+    "Close": "DOUBLE",
+    "Volume": "BIGINT",
+}
+
+BROKER_OHLCV = CsvSchema(columns=OHLCV_COLUMNS)
+
+# keyed by (symbol, interval) as parsed from "{SYMBOL}_{Interval}_..." filenames,
+# "*" matches any symbol of that interval
+CSV_SCHEMAS: dict[tuple[str, str], CsvSchema] = {
+    ("*", "Minute"): BROKER_OHLCV,
+    ("*", "Hour"): BROKER_OHLCV,
+    ("*", "Daily"): BROKER_OHLCV,
+    ("*", "Weekly"): BROKER_OHLCV,
+}
+
+
+def register_csv_schema(symbol: str, interval: str, schema: CsvSchema) -> None:
+    """Register a schema for files named "{symbol}_{interval}_...csv".
+
+    Args:
+        symbol (str): Symbol from the filename or "*" for all symbols.
+        interval (str): Interval from the filename, e.g. "Minute".
+        schema (CsvSchema): Layout of those files.
+    """
+    CSV_SCHEMAS[(symbol, interval)] = schema
+    logger.debug(f"Registered csv schema for {symbol}/{interval}: {schema}")
+
+
+def get_csv_schema(path: Path) -> CsvSchema:
+    """Look up the declared schema for a CSV file by its filename convention.
+
+    Args:
+        path (Path): The CSV file.
+
+    Returns:
+        CsvSchema: Symbol specific schema if registered, else the interval default.
+    """
+    symbol = extract_symbol_from_filename(path)
+    interval = extract_interval_from_filename(path)
+    for key in ((symbol, interval), ("*", interval)):
+        if key in CSV_SCHEMAS:
+            return CSV_SCHEMAS[key]
+    raise KeyError(f"No csv schema registered for {path.name} ({symbol}, {interval})")
@@ -0,0 +1,11 @@
+
+SELECT
+    '{{symbol}}' AS symbol,  -- << your asset name here
+    Time AT TIME ZONE 'UTC' AS time,
+    Open AS open,
+    High AS high,
+    Low AS low,
+    Close AS close,
+    Volume AS volume
+FROM read_csv('{{file_path_csv}}', {{reader_options}})
+
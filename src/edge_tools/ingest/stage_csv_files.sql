@@ -0,0 +1,19 @@
+-- every file of one reader layout in a single read_csv, rows are tagged with the
+-- manifest path and symbol of their file
+INSERT INTO {{staging_table}} (path, symbol, time, open, high, low, close, volume)
+WITH files AS (
+    SELECT unnest($files) AS filename,
+        unnest($paths) AS path,
+        unnest($symbols) AS symbol
+)
+SELECT
+    f.path,
+    f.symbol,
+    r.Time AT TIME ZONE 'UTC' AS time,
+    r.Open AS open,
+    r.High AS high,
+    r.Low AS low,
+    r.Close AS close,
+    r.Volume AS volume
+FROM read_csv($files, {{reader_options}}, filename = true) r
+JOIN files f USING (filename);
@@ -0,0 +1,56 @@
+from .files import read_complete_tail
+from .schema import get_csv_schema
+
+from contextlib import contextmanager
+from dataclasses import replace
+from pathlib import Path
+import tempfile
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def csv_source(entry: dict):
+    """
+    Yield what the import queries should read for a pending file.
+
+    Full loads read the file itself. Tail loads (entry["tail_offset"] set) copy the
+    complete lines after the committed byte offset into a temp file, so parsing
+    cost scales with the appended rows instead of the file history.
+
+    Args:
+        entry (dict): Pending file as returned by `get_pending_files`.
+
+    Yields:
+        dict: file_path_csv, reader_options and byte_offset, the offset that is
+        committed once the rows are stored.
+    """
+    path: Path = entry["path"]
+    schema = get_csv_schema(path)
+    offset = entry.get("tail_offset")
+
+    if offset is None:
+        yield {
+            "file_path_csv": entry["key"],
+            "reader_options": schema.reader_options(),
+            "byte_offset": entry["size_bytes"],
+        }
+        return
+
+    tail = read_complete_tail(path, offset)
+    logger.debug(f"Reading {len(tail)} appended bytes of {path.name} from offset {offset}")
+
+    fd, tmp_path = tempfile.mkstemp(suffix=".csv")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            # an export without trailing newline gets the next row on a new line
+            f.write(tail.lstrip(b"\r\n"))
+        yield {
+            "file_path_csv": tmp_path,
+            "reader_options": replace(schema, header=False).reader_options(),
+            "byte_offset": offset + len(tail),
+        }
+    finally:
+        os.remove(tmp_path)
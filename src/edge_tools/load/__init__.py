@@ -1,5 +1,5 @@
-from ..db import get_duckdb_connection
-from ..utils.dir import get_sql_query
+from ..db import get_duckdb_connection, QUERIES
+from ..rollup import get_rollup_bars
 
 from duckdb import DuckDBPyConnection
 import pandas as pd
@@ -9,6 +9,17 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+NY_OPEN_30_MINUTE = "ny_open_30_minute"
+NY_OPEN_30_MINUTE_COLUMNS = "ny_open_30_minute_columns"
+MINUTE_BARS_RANGE = "minute_bars_range"
+
+QUERIES.register(NY_OPEN_30_MINUTE, "query_us500_first_30_min_by_date")
+QUERIES.register(
+    NY_OPEN_30_MINUTE_COLUMNS, "query_us500_first_30_min_by_date", epoch_time=True
+)
+QUERIES.register(MINUTE_BARS_RANGE, "query_minute_bars_by_range")
+
+
 def ny_open_30_minute_by_date(con: DuckDBPyConnection, datestring: str) -> pd.DataFrame:
     """
     This function downloads first US Open data for 30 Minutes for the CFD US500
@@ -20,14 +31,39 @@ def ny_open_30_minute_by_date(con: DuckDBPyConnection, datestring: str) -> pd.Da
 
     """
 
-    params = {"datestring": datestring}
-    query = get_sql_query("query_us500_first_30_min_by_date", **params)
-    result = con.execute(query).df()
+    result = QUERIES.execute(con, NY_OPEN_30_MINUTE, datestring=datestring).df()
     logger.debug(f"Last 5 df results: {result.tail()}")
     result.rename(columns={"ts_ny": "time"}, inplace=True)
     return result.drop(columns=["symbol"])
 
 
+def ny_open_30_minute_columns(
+    con: DuckDBPyConnection, datestring: str
+) -> DuckDBPyConnection:
+    """
+    Run the query for the same bars as `ny_open_30_minute_by_date` with `time` as
+    UTC epoch seconds, for payloads that are built from the DuckDB result without
+    pandas. Fetch the result from the returned connection.
+    """
+    return QUERIES.execute(con, NY_OPEN_30_MINUTE_COLUMNS, datestring=datestring)
+
+
+def minute_bars_range_query(
+    start_date: str, end_date: str, symbol: str = "US500"
+) -> tuple[str, dict]:
+    """
+    SQL and parameters for every minute bar of `symbol` from the start of
+    `start_date` to the end of `end_date` (New York days), ordered by `time` in UTC
+    epoch seconds.
+
+    The range is a plain predicate on `time`, so long ranges can be split into
+    smaller ordered queries without re-reading anything. The SQL is the same for
+    every range, only the parameters change.
+    """
+    params = {"symbol": symbol, "start_date": start_date, "end_date": end_date}
+    return QUERIES.sql(MINUTE_BARS_RANGE), params
+
+
 def load_us_open_thirty_minute_data():
     """
     Loads all data of the first 30 min after us open
@@ -37,40 +73,25 @@ def load_us_open_thirty_minute_data():
 
 
 
-def get_daily_data():
+def get_daily_data(
+    symbol: str = "US500", session: str = "ny_business", start: str = "2025-11-02"
+) -> pd.DataFrame:
     """
-    Pull minute data from DuckDB, convert timestamp to NY timezone,
-    resample to daily OHLCV, and return a clean DataFrame.
+    Read daily OHLCV bars from the ohlcv_rollup_daily table, which ingest keeps in
+    sync with ohlcv_minute.
+
+    Args:
+        symbol (str, optional): Symbol to read. Defaults to "US500".
+        session (str, optional): "ny_business" (09:30 - 16:00) or "full".
+            Defaults to "ny_business".
+        start (str, optional): First day to return, None for the whole history.
+            Defaults to "2025-11-02", the first day the daily view used to show.
+
+    Returns:
+        pd.DataFrame: open, high, low, close, volume indexed by the New York day.
     """
-    query = get_sql_query("get_ny_business_time")
-
     with get_duckdb_connection() as con:
-        df = con.execute(query).df()
-
-    # Ensure timestamp is a proper datetime
-    df["ts_ny"] = (
-        pd
-        .to_datetime(df["ts_ny"], utc=True)
-        .dt
-        .tz_convert("America/New_York")
-    )
-
-    # Use timestamp as index
-    df = df.set_index("ts_ny").sort_index()
-
-    logger.debug("Minute data preview:\n%s", df.tail())
-
-    # Resample to daily OHLCV
-    daily = df.resample("1D").agg({
-        "open": "first",
-        "high": "max",
-        "low": "min",
-        "close": "last",
-        "volume": "sum",
-    })
-
-    # Drop days with no data (weekends, holidays)
-    daily = daily.dropna(subset=["open"])
+        daily = get_rollup_bars(con, symbol, "daily", session, start=start)
 
     logger.debug("Daily data preview:\n%s", daily.tail())
 
@@ -1,3 +1,5 @@
+from .backfill import backfill_metrics
+
 import logging 
 
 logger = logging.getLogger(__name__)
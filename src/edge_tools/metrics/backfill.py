@@ -0,0 +1,527 @@
+from .base import MetricDefinition
+from .graph import resolve_metrics, metric_layers, code_versions
+from .registry import ALL_METRICS, register_metrics
+from ..db import QUERIES
+from ..utils.dir import get_sql_query
+
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from duckdb import DuckDBPyConnection
+from pathlib import Path
+import pandas as pd
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+HERE = Path(__file__).resolve().parent
+
+DATASET_QUERY = "query_metric_dataset"
+SQL_METRICS_QUERY = "insert_sql_metrics"
+
+# session columns (window start, window end) of the bars each dataset or SQL
+# metric window holds
+DATASET_WINDOWS = {
+    "us_open_30m": ("ny_open", "ny_open_30_end"),
+    "us_business_hours": ("ny_open", "ny_close"),
+    "intraday": ("ny_day_start", "ny_day_end"),
+    "all": ("ny_day_start", "ny_day_end"),
+}
+
+for _dataset, (_start, _end) in DATASET_WINDOWS.items():
+    QUERIES.register(
+        f"metric_dataset_{_dataset}",
+        DATASET_QUERY,
+        HERE,
+        window_start=_start,
+        window_end=_end,
+    )
+
+METRIC_RESULTS_TABLE = "metric_results"
+METRIC_DATES_TABLE = "metric_dates"
+
+
+def load_dataset(
+    con: DuckDBPyConnection,
+    dataset: str,
+    symbol: str,
+    start_date: str | date,
+    end_date: str | date,
+) -> pd.DataFrame:
+    """
+    Minute bars of `dataset` for every session date from `start_date` to
+    `end_date` in one query, the bars of a date are its session window (e.g.
+    09:30 - 10:00 New York for "us_open_30m").
+
+    Returns:
+        pd.DataFrame: date, window_start, symbol, time (UTC), open, high, low,
+        close, volume ordered by date and time.
+    """
+    if dataset not in DATASET_WINDOWS:
+        raise ValueError(f"No loader for metric dataset {dataset}")
+    return QUERIES.execute(
+        con,
+        f"metric_dataset_{dataset}",
+        symbol=symbol,
+        start_date=str(start_date),
+        end_date=str(end_date),
+    ).df()
+
+
+def load_dependencies(
+    con: DuckDBPyConnection,
+    metric: MetricDefinition,
+    symbol: str,
+    end_date: str | date,
+) -> pd.DataFrame:
+    """
+    Stored values of the metrics `metric` depends on, every date up to
+    `end_date` so metrics over a history (e.g. z-scores) see earlier dates too.
+
+    Returns:
+        pd.DataFrame: date, symbol and one column per dependency, ordered by date.
+    """
+    values = con.execute(
+        """
+        SELECT e.date, e.symbol, m.metric_name, e.metric_value
+        FROM metric_events e
+        JOIN metrics m USING (metric_id)
+        WHERE e.symbol = ?
+            AND list_contains(?, m.metric_name)
+            AND e.date <= ?::DATE
+        """,
+        [symbol, list(metric.depends_on), str(end_date)],
+    ).df()
+    if values.empty:
+        return values
+    wide = values.pivot_table(
+        index=["date", "symbol"],
+        columns="metric_name",
+        values="metric_value",
+        aggfunc="first",
+        dropna=False,
+    )
+    return wide.reindex(columns=list(metric.depends_on)).sort_index().reset_index()
+
+
+def date_versions(
+    con: DuckDBPyConnection, symbol: str, start_date: str | date, end_date: str | date
+) -> dict[date, int]:
+    """Data version of every session date, the highest generation of
+    data_versions overlapping its New York day (0 if none was recorded), like
+    `get_data_version` for one date."""
+    rows = con.execute(
+        """
+        SELECT s.date, coalesce(max(v.generation), 0)
+        FROM sessions s
+        LEFT JOIN data_versions v
+            ON v.symbol = ?
+            AND v.start_time < s.ny_day_end
+            AND v.end_time >= s.ny_day_start
+        WHERE s.date BETWEEN ?::DATE AND ?::DATE
+        GROUP BY s.date
+        """,
+        [symbol, str(start_date), str(end_date)],
+    ).fetchall()
+    return dict(rows)
+
+
+def stored_versions(
+    con: DuckDBPyConnection,
+    metric_ids: list[int],
+    symbol: str,
+    start_date: str | date,
+    end_date: str | date,
+) -> dict[int, dict[date, tuple]]:
+    """(data_version, code_version) of every stored value, by metric_id and date."""
+    rows = con.execute(
+        """
+        SELECT metric_id, date, data_version, code_version
+        FROM metric_events
+        WHERE symbol = ?
+            AND list_contains(?, metric_id)
+            AND date BETWEEN ?::DATE AND ?::DATE
+        """,
+        [symbol, metric_ids, str(start_date), str(end_date)],
+    ).fetchall()
+    stored = defaultdict(dict)
+    for metric_id, day, data_version, code_version in rows:
+        stored[metric_id][day] = (data_version, code_version)
+    return stored
+
+
+def metric_states(
+    con: DuckDBPyConnection, metric_ids: list[int], symbol: str
+) -> dict[int, tuple[str, int]]:
+    """(code_version, data_version) of the last full evaluation, by metric_id."""
+    rows = con.execute(
+        """
+        SELECT metric_id, code_version, data_version
+        FROM metric_state
+        WHERE symbol = ? AND list_contains(?, metric_id)
+        """,
+        [symbol, metric_ids],
+    ).fetchall()
+    return {metric_id: (code, version) for metric_id, code, version in rows}
+
+
+def pending_dates(
+    versions: dict[date, int],
+    stored: dict[date, tuple],
+    code_version: str,
+    state: tuple[str, int] | None,
+) -> list[date]:
+    """
+    Dates of one metric to compute: stored values whose data or code version is
+    out of date, and dates without a value whose data is newer than the last
+    full evaluation. Dates that had no bars in that evaluation are not looked at
+    again until their data changes. Without a state for the current code version
+    every date without a value is pending.
+    """
+    watermark = state[1] if state and state[0] == code_version else -1
+    return sorted(
+        day
+        for day, data_version in versions.items()
+        if (
+            stored[day] != (data_version, code_version)
+            if day in stored
+            else data_version > watermark
+        )
+    )
+
+
+def default_date_range(con: DuckDBPyConnection, symbol: str) -> tuple[date, date] | None:
+    """First and last New York date of `symbol` in ohlcv_minute."""
+    return con.execute(
+        """
+        SELECT (min(time) AT TIME ZONE 'America/New_York')::DATE,
+            (max(time) AT TIME ZONE 'America/New_York')::DATE
+        FROM ohlcv_minute
+        WHERE symbol = ?
+        """,
+        [symbol],
+    ).fetchone()
+
+
+def compute_dataset_metrics(
+    con: DuckDBPyConnection,
+    dataset: str,
+    work: list[tuple[MetricDefinition, list[date]]],
+    symbol: str,
+) -> dict[str, pd.Series]:
+    """Load `dataset` once for the pending dates of every metric in `work` and
+    compute each metric on its own pending dates."""
+    first = min(days[0] for _, days in work)
+    last = max(days[-1] for _, days in work)
+    data = load_dataset(con, dataset, symbol, first, last)
+    if data.empty:
+        logger.warning(
+            f"No {dataset} bars for {symbol} from {first} to {last}, "
+            "are the sessions built? (python cli.py sessions)"
+        )
+        return {}
+    days = data["date"].dt.date
+    return {
+        metric.name: metric.compute_grouped(data[days.isin(pending)])
+        for metric, pending in work
+        if days.isin(pending).any()
+    }
+
+
+def compute_derived_metric(
+    con: DuckDBPyConnection, metric: MetricDefinition, pending: list[date], symbol: str
+) -> dict[str, pd.Series]:
+    """Compute a "metrics" dataset metric from the stored values of its
+    dependencies and keep the pending dates."""
+    values = load_dependencies(con, metric, symbol, pending[-1])
+    if values.empty:
+        return {}
+    result = metric.compute_grouped(values)
+    keep = pd.Index(result.index.get_level_values("date")).date
+    return {metric.name: result[pd.Index(keep).isin(pending)]}
+
+
+def backfill_metrics(
+    con: DuckDBPyConnection,
+    metrics: list[MetricDefinition] | None = None,
+    symbol: str = "US500",
+    start_date: str | date | None = None,
+    end_date: str | date | None = None,
+    full: bool = False,
+    max_workers: int = 4,
+) -> int:
+    """
+    Bring the stored metric values of `symbol` up to date: compute values that
+    are missing and recompute values whose input data (data_versions) or metric
+    code changed since they were stored. Untouched history is skipped.
+
+    Metrics run in dependency order, layer by layer (see `metric_layers`), the
+    dependencies of the requested metrics are included. Within a layer the
+    datasets and derived metrics are computed in parallel on their own cursors,
+    each dataset is loaded once for the pending dates of all its metrics, SQL
+    metrics run inside DuckDB. Every layer is written in one transaction.
+
+    Args:
+        con (DuckDBPyConnection): Writable DuckDB connection.
+        metrics (list[MetricDefinition], optional): Defaults to ALL_METRICS.
+        symbol (str, optional): Defaults to "US500".
+        start_date (str | date, optional): First date, defaults to the first
+            date of `symbol` in ohlcv_minute.
+        end_date (str | date, optional): Last date, defaults to the last date.
+        full (bool, optional): Recompute every date of the range.
+        max_workers (int, optional): Parallel tasks per layer. Defaults to 4.
+
+    Returns:
+        int: Number of written metric_events rows.
+    """
+    requested = ALL_METRICS if metrics is None else metrics
+    by_name = resolve_metrics(requested, ALL_METRICS)
+    # only a run over all dates may move the watermark of a metric
+    complete = start_date is None and end_date is None
+    if start_date is None or end_date is None:
+        first, last = default_date_range(con, symbol)
+        if first is None:
+            logger.info(f"No bars for {symbol}, nothing to backfill")
+            return 0
+        start_date = start_date or first
+        end_date = end_date or last
+
+    started = time.perf_counter()
+    metric_ids = register_metrics(con, list(by_name.values()))
+    codes = code_versions(by_name)
+    versions = date_versions(con, symbol, start_date, end_date)
+    generation = max(versions.values(), default=0)
+    if complete and len(versions) < (end_date - start_date).days + 1:
+        # dates without a session row are not evaluated, a watermark would skip
+        # them once the sessions are built
+        logger.warning(
+            f"Sessions cover {len(versions)} of the dates from {start_date} to "
+            f"{end_date}, metric state is not updated (python cli.py sessions)"
+        )
+        complete = False
+    ids = list(metric_ids.values())
+    if full:
+        stored, states = defaultdict(dict), {}
+    else:
+        stored = stored_versions(con, ids, symbol, start_date, end_date)
+        states = metric_states(con, ids, symbol)
+
+    written = 0
+    for depth, layer in enumerate(metric_layers(by_name)):
+        pending = {}
+        for metric in layer:
+            metric_id = metric_ids[metric.name]
+            days = pending_dates(
+                versions, stored[metric_id], codes[metric.name], states.get(metric_id)
+            )
+            if days:
+                pending[metric.name] = days
+
+        values = compute_layer(con, layer, pending, symbol, max_workers)
+        sql_work = [(m, pending[m.name]) for m in layer if m.sql and m.name in pending]
+
+        con.execute("BEGIN TRANSACTION")
+        try:
+            count = 0
+            if values:
+                rows = metric_rows(values, metric_ids, codes, versions)
+                count += insert_metric_events(con, rows)
+            if sql_work:
+                count += insert_sql_metrics(
+                    con, sql_work, metric_ids, codes, versions, symbol
+                )
+            if complete:
+                update_metric_states(con, layer, metric_ids, codes, symbol, generation)
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+
+        logger.debug(
+            f"Layer {depth}: {len(layer)} metrics, {len(pending)} with pending "
+            f"dates, {count} values written"
+        )
+        written += count
+
+    logger.info(
+        f"Wrote {written} metric values for {symbol} from {start_date} to "
+        f"{end_date} in {time.perf_counter() - started:.2f}s"
+    )
+    return written
+
+
+def compute_layer(
+    con: DuckDBPyConnection,
+    layer: list[MetricDefinition],
+    pending: dict[str, list[date]],
+    symbol: str,
+    max_workers: int,
+) -> dict[str, pd.Series]:
+    """
+    Compute the Python metrics of one layer in parallel, one task per dataset
+    and one per derived metric, each on its own cursor. SQL metrics are left
+    to `insert_sql_metrics`.
+
+    Returns:
+        dict[str, pd.Series]: Values indexed by (date, symbol), by metric name.
+    """
+    by_dataset = defaultdict(list)
+    derived = []
+    for metric in layer:
+        if metric.name not in pending or metric.sql is not None:
+            continue
+        if metric.depends_on:
+            derived.append(metric)
+        else:
+            by_dataset[metric.dataset].append((metric, pending[metric.name]))
+
+    tasks = [
+        (compute_dataset_metrics, dataset, work) for dataset, work in by_dataset.items()
+    ]
+    tasks += [
+        (compute_derived_metric, metric, pending[metric.name]) for metric in derived
+    ]
+    if not tasks:
+        return {}
+
+    cursors = [con.cursor() for _ in tasks]
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(task, cursor, subject, work, symbol)
+                for cursor, (task, subject, work) in zip(cursors, tasks)
+            ]
+            values = {}
+            for future in futures:
+                values.update(future.result())
+    finally:
+        for cursor in cursors:
+            cursor.close()
+    return values
+
+
+def metric_rows(
+    values: dict[str, pd.Series],
+    metric_ids: dict[str, int],
+    codes: dict[str, str],
+    versions: dict[date, int],
+) -> pd.DataFrame:
+    """metric_events rows of computed values, stamped with the data version of
+    their date and the code version of their metric."""
+    frames = []
+    for name, series in values.items():
+        frame = series.rename("metric_value").reset_index()
+        frame["metric_id"] = metric_ids[name]
+        frame["data_version"] = frame["date"].dt.date.map(versions)
+        frame["code_version"] = codes[name]
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def insert_metric_events(con: DuckDBPyConnection, results: pd.DataFrame) -> int:
+    """Write (date, symbol, metric_id, metric_value, data_version, code_version)
+    rows in the caller's transaction, replacing stored values of the same cells.
+
+    Returns:
+        int: Number of written rows.
+    """
+    con.register(METRIC_RESULTS_TABLE, results)
+    try:
+        return con.execute(
+            f"""
+            INSERT OR REPLACE INTO metric_events (
+                date, symbol, metric_id, metric_value, data_version, code_version
+            )
+            SELECT date::DATE, symbol, metric_id, metric_value, data_version,
+                code_version
+            FROM {METRIC_RESULTS_TABLE}
+            """
+        ).fetchone()[0]
+    finally:
+        con.unregister(METRIC_RESULTS_TABLE)
+
+
+def insert_sql_metrics(
+    con: DuckDBPyConnection,
+    work: list[tuple[MetricDefinition, list[date]]],
+    metric_ids: dict[str, int],
+    codes: dict[str, str],
+    versions: dict[date, int],
+    symbol: str,
+) -> int:
+    """
+    Compute SQL metrics inside DuckDB, in the caller's transaction. The metrics
+    of one window are compiled into one GROUP BY over the window's bars on their
+    pending dates, whose pending cells are unpivoted, stamped with the data and
+    code versions and written to metric_events by the same statement, no values
+    pass through Python.
+
+    Returns:
+        int: Number of written rows.
+    """
+    by_window = defaultdict(list)
+    for metric, days in work:
+        if metric.sql_window not in DATASET_WINDOWS:
+            raise ValueError(
+                f"No window {metric.sql_window} for SQL metric {metric.name}"
+            )
+        by_window[metric.sql_window].append((metric, days))
+
+    written = 0
+    for window, group in by_window.items():
+        dates = pd.DataFrame(
+            [
+                (metric_ids[metric.name], day, versions[day])
+                for metric, days in group
+                for day in days
+            ],
+            columns=["metric_id", "date", "data_version"],
+        )
+        query = get_sql_query(
+            SQL_METRICS_QUERY,
+            HERE,
+            bars=QUERIES.sql(f"metric_dataset_{window}"),
+            dates_table=METRIC_DATES_TABLE,
+            expressions=[(metric_ids[m.name], m.sql) for m, _ in group],
+            code_versions=[(metric_ids[m.name], codes[m.name]) for m, _ in group],
+        )
+        con.register(METRIC_DATES_TABLE, dates)
+        try:
+            count = con.execute(
+                query,
+                {
+                    "symbol": symbol,
+                    "start_date": str(dates["date"].min()),
+                    "end_date": str(dates["date"].max()),
+                },
+            ).fetchone()[0]
+        finally:
+            con.unregister(METRIC_DATES_TABLE)
+        logger.debug(f"{len(group)} SQL metrics over {window}: {count} values")
+        written += count
+    return written
+
+
+def update_metric_states(
+    con: DuckDBPyConnection,
+    metrics: list[MetricDefinition],
+    metric_ids: dict[str, int],
+    codes: dict[str, str],
+    symbol: str,
+    generation: int,
+) -> None:
+    """Record that `metrics` are evaluated for every date up to data generation
+    `generation` with their current code."""
+    con.executemany(
+        """
+        INSERT OR REPLACE INTO metric_state (
+            metric_id, symbol, code_version, data_version
+        )
+        VALUES (?, ?, ?, ?)
+        """,
+        [
+            [metric_ids[metric.name], symbol, codes[metric.name], generation]
+            for metric in metrics
+        ],
+    )
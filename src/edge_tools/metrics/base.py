@@ -1,13 +1,55 @@
 from dataclasses import dataclass
 from typing import Callable, Literal
+import pandas as pd
+
+# a batch compute gets the bars of many dates and returns one value per group
+BATCH_KEYS = ["date", "symbol"]
 
 
 @dataclass
 class MetricDefinition:
     name: str
     description: str
-    dataset: Literal["intraday", "daily", "us_open_30m"]  # which data source
+    # which data source, "metrics" reads the values of `depends_on`
+    dataset: Literal["intraday", "daily", "us_open_30m", "metrics"]
     window: Literal["all", "us_open_30m", "us_business_hours"] = ""
     unit: str = ""
     category: str = ""
-    compute: Callable = None
+    compute: Callable = None  # bars of one date -> value
+    compute_batch: Callable = None  # bars of many dates -> value per (date, symbol)
+    # aggregate expression over the bars of `window` (or `dataset`), runs in DuckDB
+    sql: str = None
+    # names of the metrics a "metrics" dataset metric is computed from
+    depends_on: tuple[str, ...] = ()
+
+    @property
+    def sql_window(self) -> str:
+        """Window whose bars the `sql` expression aggregates."""
+        return self.window or self.dataset
+
+    def compute_grouped(self, data: pd.DataFrame) -> pd.Series:
+        """
+        Values of every (date, symbol) group of `data`, the bars of the metric's
+        dataset ordered by time, or for "metrics" dataset metrics one row per
+        date with a column per dependency. Uses `compute_batch` when the metric
+        declares one, else runs `compute` once per group.
+
+        Returns:
+            pd.Series: Values indexed by (date, symbol), named after the metric.
+        """
+        batch = self.compute_batch or per_day_batch(self.compute)
+        return batch(data).astype("float64").rename(self.name)
+
+
+def per_day_batch(compute: Callable) -> Callable:
+    """Adapt a per-day `compute(bars) -> value` to the batch contract."""
+
+    def batch(data: pd.DataFrame) -> pd.Series:
+        values = {
+            key: compute(bars.reset_index(drop=True))
+            for key, bars in data.groupby(BATCH_KEYS, sort=True)
+        }
+        index = pd.MultiIndex.from_tuples(list(values), names=BATCH_KEYS)
+        return pd.Series(list(values.values()), index=index, dtype="float64")
+
+    return batch
@@ -0,0 +1,24 @@
+from ..base import MetricDefinition, BATCH_KEYS
+import pandas as pd
+
+# metrics of the "metrics" dataset get date, symbol and one column per dependency
+
+
+def compute_opening_range_share_batch(values: pd.DataFrame) -> pd.Series:
+    values = values.set_index(BATCH_KEYS)
+    opening_range = values["us_open_30m_high"] - values["us_open_30m_low"]
+    first_hour_range = values["us_first_hour_range"].where(
+        values["us_first_hour_range"] != 0
+    )
+    return (100 * opening_range / first_hour_range).round(2)
+
+
+metric_us_open_30m_range_share = MetricDefinition(
+    name="us_open_30m_range_share",
+    description="Range of the first 30 minutes as % of the first hour range",
+    dataset="metrics",
+    unit="%",
+    category="opening_range",
+    compute_batch=compute_opening_range_share_batch,
+    depends_on=("us_open_30m_high", "us_open_30m_low", "us_first_hour_range"),
+)
@@ -0,0 +1,52 @@
+from ..base import MetricDefinition
+
+# SQL metrics aggregate the bars of one session window per (date, symbol), columns:
+# time, window_start, open, high, low, close, volume
+
+metric_us_open_30m_high = MetricDefinition(
+    name="us_open_30m_high",
+    description="High of the first 30 minutes after the US open",
+    dataset="us_open_30m",
+    window="us_open_30m",
+    unit="$",
+    category="opening_range",
+    sql="max(high)",
+)
+
+metric_us_open_30m_low = MetricDefinition(
+    name="us_open_30m_low",
+    description="Low of the first 30 minutes after the US open",
+    dataset="us_open_30m",
+    window="us_open_30m",
+    unit="$",
+    category="opening_range",
+    sql="min(low)",
+)
+
+metric_us_first_hour_range = MetricDefinition(
+    name="us_first_hour_range",
+    description="High - low of the first hour after the US open",
+    dataset="intraday",
+    window="us_business_hours",
+    unit="$",
+    category="volatility",
+    sql="""round(
+        max(high) FILTER (WHERE time < window_start + INTERVAL 1 HOUR)
+        - min(low) FILTER (WHERE time < window_start + INTERVAL 1 HOUR),
+        2
+    )""",
+)
+
+metric_us_open_30m_volume_share = MetricDefinition(
+    name="us_open_30m_volume_share",
+    description="Share of the US business hours volume traded in the first 30 minutes",
+    dataset="intraday",
+    window="us_business_hours",
+    unit="%",
+    category="volume",
+    sql="""round(
+        100 * sum(volume) FILTER (WHERE time < window_start + INTERVAL 30 MINUTE)
+        / nullif(sum(volume), 0),
+        2
+    )""",
+)
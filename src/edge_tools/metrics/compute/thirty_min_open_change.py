@@ -1,4 +1,5 @@
-from ..base import MetricDefinition
+from ..base import MetricDefinition, BATCH_KEYS
+import pandas as pd
 import logging
 
 logger = logging.getLogger(__name__)
@@ -33,6 +34,32 @@ def calculate_change(df, start_value: str = "open", end_value: str = "close"):
     }
 
 
+def calculate_change_batch(
+    data: pd.DataFrame, start_value: str = "open", end_value: str = "close"
+) -> pd.DataFrame:
+    """
+    `calculate_change` for every (date, symbol) group of `data` at once, rows
+    ordered by time within each group.
+
+    Returns:
+        pd.DataFrame: absolute_change and relative_change indexed by
+        (date, symbol).
+    """
+    groups = data.groupby(BATCH_KEYS, sort=True)
+    starting_price = groups[start_value].first()
+    ending_price = groups[end_value].last()
+
+    absolute_change = ending_price - starting_price
+    relative_change = absolute_change / starting_price
+
+    return pd.DataFrame(
+        {
+            "absolute_change": absolute_change.round(2),
+            "relative_change": relative_change.round(4),
+        }
+    )
+
+
 def compute_thirty_min_open_change_absolute(df):
     return calculate_change(df)["absolute_change"]
 
@@ -41,12 +68,21 @@ def compute_thirty_min_open_change_relative(df):
     return calculate_change(df)["relative_change"] * 100
 
 
+def compute_thirty_min_open_change_absolute_batch(data):
+    return calculate_change_batch(data)["absolute_change"]
+
+
+def compute_thirty_min_open_change_relative_batch(data):
+    return calculate_change_batch(data)["relative_change"] * 100
+
+
 metric_thirty_min_open_change_abs = MetricDefinition(
     name="thirty_min_us_open_change_abs",
     description="Absolute $ change from US open to 30-minute close",
     dataset="us_open_30m",
     unit="$",
     compute=compute_thirty_min_open_change_absolute,
+    compute_batch=compute_thirty_min_open_change_absolute_batch,
 )
 
 metric_thirty_min_open_change_rel = MetricDefinition(
@@ -55,4 +91,5 @@ metric_thirty_min_open_change_rel = MetricDefinition(
     dataset="us_open_30m",
     unit="%",
     compute=compute_thirty_min_open_change_relative,
+    compute_batch=compute_thirty_min_open_change_relative_batch,
 )
@@ -0,0 +1,87 @@
+from .base import MetricDefinition
+
+from graphlib import TopologicalSorter
+import hashlib
+import inspect
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_metrics(
+    metrics: list[MetricDefinition], available: list[MetricDefinition]
+) -> dict[str, MetricDefinition]:
+    """
+    `metrics` plus every metric they depend on, directly or not, looked up by name
+    in `metrics` first and `available` second.
+
+    Returns:
+        dict[str, MetricDefinition]: Metrics by name.
+    """
+    known = {metric.name: metric for metric in available}
+    known.update({metric.name: metric for metric in metrics})
+    resolved = {}
+    pending = [metric.name for metric in metrics]
+    while pending:
+        name = pending.pop()
+        if name in resolved:
+            continue
+        if name not in known:
+            raise ValueError(f"Unknown metric {name}, is it in ALL_METRICS?")
+        resolved[name] = known[name]
+        pending.extend(resolved[name].depends_on)
+    return resolved
+
+
+def metric_layers(metrics: dict[str, MetricDefinition]) -> list[list[MetricDefinition]]:
+    """
+    Order `metrics` (by name, dependencies included) into layers. Every metric
+    comes after the metrics it depends on, the metrics of one layer are
+    independent of each other and can run in parallel.
+
+    Raises:
+        graphlib.CycleError: If the dependencies contain a cycle.
+    """
+    graph = TopologicalSorter(
+        {name: metric.depends_on for name, metric in metrics.items()}
+    )
+    graph.prepare()
+    layers = []
+    while graph.is_active():
+        ready = sorted(graph.get_ready())
+        layers.append([metrics[name] for name in ready])
+        graph.done(*ready)
+    return layers
+
+
+def _source(function) -> str:
+    """Source of the module that defines `function`, so helpers it calls in the
+    same module count as part of the metric."""
+    try:
+        return inspect.getsource(inspect.getmodule(function))
+    except (OSError, TypeError):
+        return function.__code__.co_code.hex()
+
+
+def code_versions(metrics: dict[str, MetricDefinition]) -> dict[str, str]:
+    """
+    Hash of every metric definition: name, dataset, window, SQL expression and
+    the source of its compute functions. A metric with dependencies also hashes
+    their versions, so changing a metric invalidates everything built on it.
+
+    Returns:
+        dict[str, str]: Code version by metric name.
+    """
+    versions = {}
+    for layer in metric_layers(metrics):
+        for metric in layer:
+            digest = hashlib.sha256()
+            for part in (metric.name, metric.dataset, metric.window, metric.sql or ""):
+                digest.update(part.encode())
+            for function in (metric.compute, metric.compute_batch):
+                if function is not None:
+                    digest.update(_source(function).encode())
+            for dependency in sorted(metric.depends_on):
+                digest.update(versions[dependency].encode())
+            versions[metric.name] = digest.hexdigest()[:12]
+    return versions
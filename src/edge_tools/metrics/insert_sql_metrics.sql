@@ -0,0 +1,37 @@
+-- every SQL metric of one window in a single GROUP BY over its bars on the pending
+-- dates of {{ dates_table }} (metric_id, date, data_version), unpivoted and kept for
+-- the pending cells, stamped with the data version of the date and the code version
+-- of the metric
+INSERT OR REPLACE INTO metric_events (
+    date, symbol, metric_id, metric_value, data_version, code_version
+)
+WITH bars AS (
+    {{ bars }}
+),
+code_versions (metric_id, code_version) AS (
+    VALUES
+    {%- for metric_id, code_version in code_versions %}
+    ({{ metric_id }}, '{{ code_version }}'){{ "," if not loop.last }}
+    {%- endfor %}
+),
+computed AS (
+    SELECT date,
+        symbol,
+        {%- for metric_id, expression in expressions %}
+        ({{ expression }})::DOUBLE AS "{{ metric_id }}"{{ "," if not loop.last }}
+        {%- endfor %}
+    FROM bars
+    WHERE date IN (SELECT date FROM {{ dates_table }})
+    GROUP BY date, symbol
+),
+metric_values AS (
+    SELECT date, symbol, metric_id::INTEGER AS metric_id, metric_value
+    FROM computed
+    UNPIVOT INCLUDE NULLS (
+        metric_value FOR metric_id IN (COLUMNS(* EXCLUDE (date, symbol)))
+    )
+)
+SELECT v.date, v.symbol, v.metric_id, v.metric_value, d.data_version, c.code_version
+FROM metric_values v
+JOIN {{ dates_table }} d USING (metric_id, date)
+JOIN code_versions c USING (metric_id);
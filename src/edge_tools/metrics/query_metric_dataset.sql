@@ -0,0 +1,25 @@
+-- minute bars between {{window_start}} and {{window_end}} of every session date from
+-- $start_date to $end_date, each minute takes the session of the last window start
+-- before it, UTC predicates only
+WITH windows AS (
+    SELECT date, {{window_start}} AS window_start, {{window_end}} AS window_end
+    FROM sessions
+    WHERE date BETWEEN $start_date::DATE AND $end_date::DATE
+)
+SELECT w.date,
+    w.window_start,
+    m.symbol,
+    m.time,
+    m.open,
+    m.high,
+    m.low,
+    m.close,
+    m.volume
+FROM ohlcv_minute m
+ASOF JOIN windows w
+    ON m.time >= w.window_start
+WHERE m.time < w.window_end
+    AND m.symbol = $symbol
+    AND m.time >= timezone('America/New_York', $start_date::DATE::TIMESTAMP)
+    AND m.time < timezone('America/New_York', ($end_date::DATE + 1)::TIMESTAMP)
+ORDER BY w.date, m.time;
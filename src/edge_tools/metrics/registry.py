@@ -1,12 +1,29 @@
 from .base import MetricDefinition
+from .compute.thirty_min_open_change import (
+    metric_thirty_min_open_change_abs,
+    metric_thirty_min_open_change_rel,
+)
+from .compute.session_aggregates import (
+    metric_us_open_30m_high,
+    metric_us_open_30m_low,
+    metric_us_first_hour_range,
+    metric_us_open_30m_volume_share,
+)
+from .compute.ratios import metric_us_open_30m_range_share
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-# List every metric module here
+# List every metric here
 ALL_METRICS = [
-    # thirty_min_open_change,
+    metric_thirty_min_open_change_abs,
+    metric_thirty_min_open_change_rel,
+    metric_us_open_30m_high,
+    metric_us_open_30m_low,
+    metric_us_first_hour_range,
+    metric_us_open_30m_volume_share,
+    metric_us_open_30m_range_share,
     # add more metrics here
 ]
 
@@ -39,3 +56,28 @@ def ensure_metric_registered(conn, metric: MetricDefinition):
     ).fetchone()[0]
 
     return metric_id
+
+
+def register_metrics(conn, metrics: list[MetricDefinition]) -> dict[str, int]:
+    """
+    Register every metric of `metrics` that is not in the metrics table yet, with
+    one insert and one select for the whole list.
+
+    Returns:
+        dict[str, int]: metric_id by metric name.
+    """
+    conn.executemany(
+        """
+            INSERT OR IGNORE INTO metrics (metric_name, description, dataset, time_window, unit, category)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        [
+            [m.name, m.description, m.dataset, m.window, m.unit, m.category]
+            for m in metrics
+        ],
+    )
+    rows = conn.execute(
+        "SELECT metric_name, metric_id FROM metrics WHERE list_contains(?, metric_name)",
+        [[m.name for m in metrics]],
+    ).fetchall()
+    return dict(rows)
@@ -42,6 +42,30 @@ def ohlcv_for_date_and_prev(
     return data
 
 
+def ohlcv_for_date_range(
+    symbol: str,
+    start_date: str | int | float | datetime | date,
+    end_date: str | int | float | datetime | date,
+) -> pd.DataFrame:
+    """Minute bars of `symbol` from the start of `start_date` to the end of
+    `end_date` (UTC days), one query for the whole range."""
+    start_date = to_datetime(start_date).date()
+    end_date = to_datetime(end_date).date() + pd.Timedelta(days=1)
+
+    params = {
+        "symbol": symbol,
+        "start_date": start_date.strftime("%Y-%m-%d"),
+        "end_date": end_date.strftime("%Y-%m-%d"),
+    }
+    logger.debug(f"SQL Query Parameters: {params}")
+
+    query = get_sql_query("ohlcv_data__by_ticker_and_date.sql", **params)
+
+    with duckdb.connect("./local.duckdb") as con:
+        data = con.execute(query).df()
+    return data
+
+
 def normalize_ohlcv(df: pd.DataFrame, style: str = "capitalized") -> pd.DataFrame:
     if style not in {"capitalized", "lowercase"}:
         raise ValueError("style must be 'capitalized' or 'lowercase'")
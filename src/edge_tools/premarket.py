@@ -1,12 +1,91 @@
-from .time import preprocess_for_premarket_analysis
-from .ohlcv import ohlcv_for_date_and_prev, normalize_ohlcv
+from .time import preprocess_for_premarket_analysis, convert_index_to_utc
+from .ohlcv import ohlcv_for_date_and_prev, ohlcv_for_date_range, normalize_ohlcv
+from .db import QUERIES
 from datetime import time
+from duckdb import DuckDBPyConnection
+import numpy as np
 import pandas as pd
 
 import logging
 
 logger = logging.getLogger(__name__)
 
+ANCHOR_PRICES_QUERY = "query_premarket_anchor_prices"
+
+# price = close of the minute bar at `time` local to `tz` (column_name is the
+# preprocessed column of that zone), on the previous (0) or the selected (-1) date
+PREMARKET_ANCHORS = {
+    "us_close_previous_day": {
+        "date_select": 0,
+        "column_name": "ny_time",
+        "tz": "America/New_York",
+        "time": time(16),
+    },
+    "tokyo_open": {
+        "date_select": -1,
+        "column_name": "tokyo_time",
+        "tz": "Asia/Tokyo",
+        "time": time(9),
+    },
+    "london_open": {
+        "date_select": -1,
+        "column_name": "london_time",
+        "tz": "Europe/London",
+        "time": time(9),
+    },
+    "t_minus_60": {
+        "date_select": -1,
+        "column_name": "ny_time",
+        "tz": "America/New_York",
+        "time": time(8, 30),
+    },
+    "t_minus_30": {
+        "date_select": -1,
+        "column_name": "ny_time",
+        "tz": "America/New_York",
+        "time": time(9, 0),
+    },
+    "t_minus_15": {
+        "date_select": -1,
+        "column_name": "ny_time",
+        "tz": "America/New_York",
+        "time": time(9, 15),
+    },
+    "us_open_current_day": {
+        "date_select": -1,
+        "column_name": "ny_time",
+        "tz": "America/New_York",
+        "time": time(9, 30),
+    },
+    "us_close_current_day": {
+        "date_select": -1,
+        "column_name": "ny_time",
+        "tz": "America/New_York",
+        "time": time(16),
+    },
+}
+
+# change column -> (price, reference price)
+PREMARKET_CHANGES = {
+    "tokyo_change_percent": ("tokyo_open", "us_close_previous_day"),
+    "london_change_percent": ("london_open", "us_close_previous_day"),
+    "t_minus_60_change_percent": ("t_minus_60", "us_close_previous_day"),
+    "t_minus_30_change_percent": ("t_minus_30", "us_close_previous_day"),
+    "t_minus_15_change_percent": ("t_minus_15", "us_close_previous_day"),
+    "prev_close_to_us_open_change_percent": (
+        "us_open_current_day",
+        "us_close_previous_day",
+    ),
+    "prev_close_to_us_close_change_percent": (
+        "us_close_current_day",
+        "us_close_previous_day",
+    ),
+    "us_open_to_us_close_change_percent_current_day": (
+        "us_close_current_day",
+        "us_open_current_day",
+    ),
+}
+
 
 class PremarketPriceCalculator:
     def __init__(self, data: pd.DataFrame):
@@ -22,48 +101,7 @@ class PremarketPriceCalculator:
             raise ValueError(
                 "Data contains more than two trading dates. Please provide data for only the selected date and previous date."
             )
-        self._selections = {
-            "us_close_previous_day": {
-                "date_select": 0,
-                "column_name": "ny_time",
-                "time": time(16),
-            },
-            "tokyo_open": {
-                "date_select": -1,
-                "column_name": "tokyo_time",
-                "time": time(9),
-            },
-            "london_open": {
-                "date_select": -1,
-                "column_name": "london_time",
-                "time": time(9),
-            },
-            "t_minus_60": {
-                "date_select": -1,
-                "column_name": "ny_time",
-                "time": time(8, 30),
-            },
-            "t_minus_30": {
-                "date_select": -1,
-                "column_name": "ny_time",
-                "time": time(9, 0),
-            },
-            "t_minus_15": {
-                "date_select": -1,
-                "column_name": "ny_time",
-                "time": time(9, 15),
-            },
-            "us_open_current_day": {
-                "date_select": -1,
-                "column_name": "ny_time",
-                "time": time(9, 30),
-            },
-            "us_close_current_day": {
-                "date_select": -1,
-                "column_name": "ny_time",
-                "time": time(16),
-            },
-        }
+        self._selections = PREMARKET_ANCHORS
 
     def compute_price(self, selection_key: str) -> float:
         """
@@ -168,26 +206,9 @@ def compute_changes(premarket_prices):
             return None
         return round(((a - b) / b) * 100, 2)
 
-    prev_close = premarket_prices.get("us_close_previous_day")
-    tokyo_open = premarket_prices.get("tokyo_open")
-    london_open = premarket_prices.get("london_open")
-    t_minus_60_price = premarket_prices.get("t_minus_60")
-    t_minus_30_price = premarket_prices.get("t_minus_30")
-    t_minus_15_price = premarket_prices.get("t_minus_15")
-    us_open_price = premarket_prices.get("us_open_current_day")
-    us_close_price = premarket_prices.get("us_close_current_day")
-
     return {
-        "tokyo_change_percent": pct(tokyo_open, prev_close),
-        "london_change_percent": pct(london_open, prev_close),
-        "t_minus_60_change_percent": pct(t_minus_60_price, prev_close),
-        "t_minus_30_change_percent": pct(t_minus_30_price, prev_close),
-        "t_minus_15_change_percent": pct(t_minus_15_price, prev_close),
-        "prev_close_to_us_open_change_percent": pct(us_open_price, prev_close),
-        "prev_close_to_us_close_change_percent": pct(us_close_price, prev_close),
-        "us_open_to_us_close_change_percent_current_day": pct(
-            us_close_price, us_open_price
-        ),
+        name: pct(premarket_prices.get(price), premarket_prices.get(reference))
+        for name, (price, reference) in PREMARKET_CHANGES.items()
     }
 
 
@@ -221,6 +242,158 @@ def compute_metrics(symbol="US500", selected_date=None):
     return {**premarket_prices, **changes}, data
 
 
+def add_premarket_changes(prices: pd.DataFrame) -> pd.DataFrame:
+    """Add the PREMARKET_CHANGES columns to a frame of anchor prices, NaN where
+    a price or its reference is missing or the reference is 0."""
+    out = prices.copy()
+    for name, (price, reference) in PREMARKET_CHANGES.items():
+        base = out[reference].where(out[reference] != 0)
+        out[name] = ((out[price] - base) / base * 100).round(2)
+    return out
+
+
+def _anchor_targets(days: pd.DatetimeIndex, anchor: dict) -> np.ndarray:
+    """UTC nanoseconds of the anchor's local time on every day of `days`."""
+    at = anchor["time"]
+    local = days + pd.Timedelta(hours=at.hour, minutes=at.minute)
+    return local.tz_localize(anchor["tz"]).tz_convert("UTC").as_unit("ns").asi8
+
+
+def compute_premarket_prices_batch(
+    data: pd.DataFrame, start_date=None, end_date=None
+) -> pd.DataFrame:
+    """
+    Premarket prices and changes for every trading day in `data` in one pass.
+
+    The minute bars are sorted once, then each anchor of PREMARKET_ANCHORS is
+    looked up for all days with a single searchsorted. An anchor without a bar
+    at exactly that minute is NaN, like the ValueError of `compute_price`.
+    `us_close_previous_day` is the US close of the last earlier day that has
+    one, so Mondays and days after holidays compare against the last session.
+
+    Parameters:
+    data (pd.DataFrame): OHLCV minute bars with a UTC `time` column, e.g. from
+        `ohlcv_for_date_range`. Include a few days before `start_date` for the
+        previous close.
+    start_date, end_date (optional): First and last New York date to return,
+        defaults to the first and last New York date in `data`.
+
+    Returns:
+    pd.DataFrame: One row per trading day indexed by `date`, the price columns
+    of `compute_premarket_prices` and the change columns of `compute_changes`.
+    """
+    columns = list(PREMARKET_ANCHORS) + list(PREMARKET_CHANGES)
+    df = convert_index_to_utc(normalize_ohlcv(data, style="lowercase")).sort_index()
+    if df.empty:
+        return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name="date"))
+
+    times = df.index.as_unit("ns").asi8
+    closes = df["close"].to_numpy(dtype=float)
+    ny_dates = df.index.tz_convert("America/New_York").normalize().tz_localize(None)
+    # tokyo opens on the evening before in New York, one day of slack
+    days = pd.date_range(ny_dates[0], ny_dates[-1] + pd.Timedelta(days=1), freq="D")
+
+    prices = {}
+    for key, anchor in PREMARKET_ANCHORS.items():
+        if anchor["date_select"] == 0:
+            continue
+        targets = _anchor_targets(days, anchor)
+        pos = np.minimum(times.searchsorted(targets), len(times) - 1)
+        hit = times[pos] == targets
+        prices[key] = np.where(hit, closes[pos], np.nan)
+
+    result = pd.DataFrame(prices, index=days.rename("date"))
+    traded = result.notna().any(axis=1)
+    result.insert(
+        0,
+        "us_close_previous_day",
+        result["us_close_current_day"].ffill().shift(1),
+    )
+    result = add_premarket_changes(result[traded])
+
+    if start_date is not None:
+        result = result[result.index >= pd.Timestamp(start_date)]
+    # the slack day only has the Tokyo open of the evening before, drop it
+    last_day = ny_dates[-1] if end_date is None else pd.Timestamp(end_date)
+    result = result[result.index <= last_day]
+    return result[columns]
+
+
+def compute_metrics_range(
+    symbol="US500", start_date=None, end_date=None, lookback_days=7
+):
+    """
+    Computes pre-market prices and changes for every trading day from start_date
+    to end_date with one query and one pass over the bars.
+    Parameters:
+    symbol (str): The trading symbol (default is "US500").
+    start_date, end_date: First and last date of the range.
+    lookback_days (int): Days loaded before start_date to find the previous close.
+    Returns:    pd.DataFrame: See `compute_premarket_prices_batch`.
+    """
+    first = pd.Timestamp(start_date) - pd.Timedelta(days=lookback_days)
+    data = ohlcv_for_date_range(symbol, first.date(), pd.Timestamp(end_date).date())
+    return compute_premarket_prices_batch(data, start_date, end_date)
+
+
+def query_premarket_anchor_prices(
+    con: DuckDBPyConnection,
+    symbol: str = "US500",
+    start_date=None,
+    end_date=None,
+    tolerance: pd.Timedelta = pd.Timedelta(minutes=5),
+    lookback_days: int = 7,
+) -> pd.DataFrame:
+    """
+    Premarket prices and changes of every New York day, anchors found by DuckDB.
+
+    One query builds the anchor times of PREMARKET_ANCHORS for every day with bars
+    and ASOF JOINs them against ohlcv_minute. An anchor takes the close of the
+    last bar at or before it, so a missing minute falls back to the bar before
+    instead of raising. Bars older than `tolerance` do not count and leave the
+    anchor NaN, a zero tolerance means exact minute matches only.
+
+    Parameters:
+    con (DuckDBPyConnection): Connection with the ohlcv_minute table.
+    symbol (str): The trading symbol (default is "US500").
+    start_date, end_date (optional): First and last New York date, leave them
+        out for the full history.
+    tolerance (pd.Timedelta): Largest gap between an anchor and its bar.
+    lookback_days (int): Days read before start_date to find the previous close.
+
+    Returns:
+    pd.DataFrame: Indexed by `date`, the same columns as
+    `compute_premarket_prices_batch`.
+    """
+    anchors = {
+        key: anchor
+        for key, anchor in PREMARKET_ANCHORS.items()
+        if anchor["date_select"] != 0
+    }
+    # one statement per tolerance, lookback and set of bounds, values are bound
+    structure = {
+        "anchors": anchors,
+        "tolerance_secs": int(pd.Timedelta(tolerance).total_seconds()),
+        "lookback_days": lookback_days,
+        "has_start": bool(start_date),
+        "has_end": bool(end_date),
+    }
+    name = "{}_{tolerance_secs}s_{lookback_days}d_{has_start:d}{has_end:d}".format(
+        ANCHOR_PRICES_QUERY, **structure
+    )
+    QUERIES.register(name, ANCHOR_PRICES_QUERY, **structure)
+
+    params = {"symbol": symbol}
+    if start_date:
+        params["start_date"] = pd.Timestamp(start_date).date()
+    if end_date:
+        params["end_date"] = pd.Timestamp(end_date).date()
+    prices = QUERIES.execute(con, name, **params).df()
+    prices["date"] = pd.to_datetime(prices["date"])
+    prices = prices.set_index("date")[list(PREMARKET_ANCHORS)].astype(float)
+    return add_premarket_changes(prices)
+
+
 def filter_us_market_hours(data: pd.DataFrame, end_time: str = "16:00") -> pd.DataFrame:
     """
     Filters the DataFrame to include only rows where the US market is open (09:30 to 16:00 NY time).
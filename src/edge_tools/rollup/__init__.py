@@ -0,0 +1,161 @@
+"""
+OHLCV rollups materialized from ohlcv_minute inside DuckDB.
+
+Every period is built for two sessions:
+
+    full        24h bars, the trading day rolls at 18:00 New York
+    ny_business 09:30 - 16:00 New York
+
+Ingest refreshes only the buckets touched by the newly inserted minute bars,
+consumers read a few hundred rollup rows instead of resampling minute data.
+"""
+
+from ..db import QUERIES
+
+from datetime import datetime
+from duckdb import DuckDBPyConnection
+from pathlib import Path
+import pandas as pd
+import logging
+
+HERE = Path(__file__).resolve().parent
+
+REFRESH_QUERY = "refresh_rollup"
+SELECT_QUERY = "get_rollup_bars"
+
+# table suffix -> date_trunc part
+ROLLUP_PERIODS = {
+    "hour": "hour",
+    "daily": "day",
+    "weekly": "week",
+}
+
+# session -> shift applied before truncating, 6 hours moves 18:00 to midnight
+ROLLUP_SESSIONS = {
+    "full": "6 hours",
+    "ny_business": "0 hours",
+}
+
+logger = logging.getLogger(__name__)
+
+# the refresh is two statements, DuckDB binds parameters of a single one
+for _period, _trunc in ROLLUP_PERIODS.items():
+    QUERIES.register(f"{SELECT_QUERY}_{_period}", SELECT_QUERY, HERE, period=_period)
+    for _session, _offset in ROLLUP_SESSIONS.items():
+        for _statement in ("delete", "insert"):
+            QUERIES.register(
+                f"{REFRESH_QUERY}_{_statement}_{_period}_{_session}",
+                REFRESH_QUERY,
+                HERE,
+                statement=_statement,
+                period=_period,
+                trunc=_trunc,
+                session=_session,
+                offset=_offset,
+            )
+
+
+def refresh_rollups(
+    con: DuckDBPyConnection,
+    symbol: str,
+    start: datetime,
+    end: datetime,
+    periods: list[str] = None,
+    sessions: list[str] = None,
+) -> None:
+    """
+    Rebuild every rollup bucket of `symbol` that contains a minute between `start`
+    and `end`. Runs in the caller's transaction so ingest commits bars and rollups
+    together.
+
+    Args:
+        con (DuckDBPyConnection): Writable DuckDB connection.
+        symbol (str): Symbol of the touched minute bars.
+        start (datetime): First touched minute, timezone aware.
+        end (datetime): Last touched minute, timezone aware.
+        periods (list[str], optional): Subset of ROLLUP_PERIODS. Defaults to all.
+        sessions (list[str], optional): Subset of ROLLUP_SESSIONS. Defaults to all.
+    """
+    periods = periods or list(ROLLUP_PERIODS)
+    sessions = sessions or list(ROLLUP_SESSIONS)
+
+    for period in periods:
+        for session in sessions:
+            for statement in ("delete", "insert"):
+                QUERIES.execute(
+                    con,
+                    f"{REFRESH_QUERY}_{statement}_{period}_{session}",
+                    symbol=symbol,
+                    start=start,
+                    end=end,
+                )
+
+    logger.info(
+        f"Refreshed {', '.join(periods)} rollups of {symbol} from {start} to {end}"
+    )
+
+
+def rebuild_rollups(con: DuckDBPyConnection, symbols: list[str] = None) -> None:
+    """Rebuild all rollups from scratch, e.g. after adding the tables to an existing
+    database.
+
+    Args:
+        con (DuckDBPyConnection): Writable DuckDB connection.
+        symbols (list[str], optional): Symbols to rebuild. Defaults to all symbols
+            in ohlcv_minute.
+    """
+    con.execute("BEGIN TRANSACTION")
+    try:
+        ranges = con.execute(
+            "SELECT symbol, min(time), max(time) FROM ohlcv_minute GROUP BY symbol"
+        ).fetchall()
+        for symbol, start, end in ranges:
+            if symbols and symbol not in symbols:
+                continue
+            refresh_rollups(con, symbol, start, end)
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+
+
+def get_rollup_bars(
+    con: DuckDBPyConnection,
+    symbol: str,
+    period: str = "daily",
+    session: str = "ny_business",
+    start: str = None,
+    end: str = None,
+) -> pd.DataFrame:
+    """
+    Read rollup bars of one symbol, period and session.
+
+    Args:
+        con (DuckDBPyConnection): DuckDB connection.
+        symbol (str): Symbol, e.g. "US500".
+        period (str, optional): One of ROLLUP_PERIODS. Defaults to "daily".
+        session (str, optional): One of ROLLUP_SESSIONS. Defaults to "ny_business".
+        start (str, optional): Inclusive lower bound on the bucket start.
+        end (str, optional): Exclusive upper bound on the bucket start.
+
+    Returns:
+        pd.DataFrame: open, high, low, close, volume indexed by the bucket start
+        in New York time ("ts_ny").
+    """
+    if period not in ROLLUP_PERIODS:
+        raise ValueError(f"Unknown rollup period {period}, use one of {list(ROLLUP_PERIODS)}")
+    if session not in ROLLUP_SESSIONS:
+        raise ValueError(f"Unknown rollup session {session}, use one of {list(ROLLUP_SESSIONS)}")
+
+    df = QUERIES.execute(
+        con,
+        f"{SELECT_QUERY}_{period}",
+        symbol=symbol,
+        session=session,
+        start=start,
+        end=end,
+    ).df()
+    df["ts_ny"] = pd.to_datetime(df.pop("time"), utc=True).dt.tz_convert(
+        "America/New_York"
+    )
+    return df.set_index("ts_ny")
@@ -0,0 +1,13 @@
+SELECT
+    time,
+    open,
+    high,
+    low,
+    close,
+    volume
+FROM ohlcv_rollup_{{period}}
+WHERE symbol = $symbol
+    AND session = $session
+    AND ($start::TIMESTAMPTZ IS NULL OR time >= $start::TIMESTAMPTZ)
+    AND ($end::TIMESTAMPTZ IS NULL OR time < $end::TIMESTAMPTZ)
+ORDER BY time;
@@ -0,0 +1,52 @@
+-- rebuild the {{period}} buckets of one symbol/session between the buckets of $start
+-- and $end, "delete" and "insert" are run as two statements
+{% macro bucket(ts) -%}
+{% if trunc == 'hour' -%}
+timezone('UTC', date_trunc('hour', timezone('UTC', {{ts}})))
+{%- else -%}
+timezone('America/New_York', date_trunc('{{trunc}}', timezone('America/New_York', {{ts}}) + INTERVAL '{{offset}}') - INTERVAL '{{offset}}')
+{%- endif %}
+{%- endmacro %}
+{% set first_bucket = bucket("$start::TIMESTAMPTZ") %}
+{% set last_bucket = bucket("$end::TIMESTAMPTZ") %}
+
+{% if statement == 'delete' %}
+DELETE FROM ohlcv_rollup_{{period}}
+WHERE symbol = $symbol
+    AND session = '{{session}}'
+    AND time BETWEEN {{first_bucket}} AND {{last_bucket}};
+{% else %}
+INSERT INTO ohlcv_rollup_{{period}} (symbol, session, time, open, high, low, close, volume, bar_count)
+WITH bars AS (
+    SELECT
+        {{bucket("time")}} AS bucket,
+        time,
+        open,
+        high,
+        low,
+        close,
+        volume
+    FROM ohlcv_minute
+    WHERE symbol = $symbol
+        AND time >= {{first_bucket}}
+        -- coarse bound, the bucket filter below trims it
+        AND time < {{last_bucket}} + INTERVAL '1 {{trunc}}' + INTERVAL '2 hours'
+    {% if session == 'ny_business' %}
+        AND timezone('America/New_York', time)::TIME >= TIME '09:30'
+        AND timezone('America/New_York', time)::TIME < TIME '16:00'
+    {% endif %}
+)
+SELECT
+    $symbol AS symbol,
+    '{{session}}' AS session,
+    bucket AS time,
+    arg_min(open, time) AS open,
+    max(high) AS high,
+    min(low) AS low,
+    arg_max(close, time) AS close,
+    sum(volume) AS volume,
+    count(*) AS bar_count
+FROM bars
+WHERE bucket <= {{last_bucket}}
+GROUP BY bucket;
+{% endif %}
@@ -0,0 +1,152 @@
+"""
+Session calendar: UTC boundaries of the trading sessions per New York date.
+
+The `sessions` table holds the New York day, the Tokyo and London opens, the
+premarket windows and the New York cash session of every date as TIMESTAMPTZ.
+Queries join or ASOF JOIN it to select minutes with plain UTC range predicates
+on ohlcv_minute.time instead of converting every row to New York time.
+
+Ingest refreshes the dates touched by new minute bars, `rebuild_sessions`
+fills the whole history of an existing database.
+"""
+
+from ..utils.dir import get_sql_query
+
+from datetime import datetime, date
+from duckdb import DuckDBPyConnection
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar,
+    GoodFriday,
+    Holiday,
+    USLaborDay,
+    USMartinLutherKingJr,
+    USMemorialDay,
+    USPresidentsDay,
+    USThanksgivingDay,
+    nearest_workday,
+    sunday_to_monday,
+)
+from pathlib import Path
+import pandas as pd
+import logging
+
+HERE = Path(__file__).resolve().parent
+
+REFRESH_QUERY = "refresh_sessions"
+
+SESSION_DATES_TABLE = "session_dates"
+
+# one-off closures that no rule produces (national days of mourning)
+NYSE_SPECIAL_CLOSURES = ["2012-10-29", "2012-10-30", "2018-12-05", "2025-01-09"]
+
+logger = logging.getLogger(__name__)
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    """Full day NYSE holidays. A Saturday New Year's Day is not observed on the
+    Friday before, the other fixed holidays move to the nearest weekday."""
+
+    rules = [
+        Holiday("New Year's Day", month=1, day=1, observance=sunday_to_monday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday(
+            "Juneteenth",
+            month=6,
+            day=19,
+            start_date="2022-06-19",
+            observance=nearest_workday,
+        ),
+        Holiday("Independence Day", month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday("Christmas Day", month=12, day=25, observance=nearest_workday),
+    ]
+
+
+def trading_calendar(start: str | date, end: str | date) -> pd.DataFrame:
+    """
+    Every date from `start` to `end` with its NYSE trading day flag.
+
+    Args:
+        start (str | date): First date.
+        end (str | date): Last date, inclusive.
+
+    Returns:
+        pd.DataFrame: `date` and `is_trading_day`, false on weekends and holidays.
+    """
+    dates = pd.date_range(start, end, freq="D")
+    holidays = NYSEHolidayCalendar().holidays(dates.min(), dates.max())
+    holidays = holidays.union(pd.DatetimeIndex(NYSE_SPECIAL_CLOSURES))
+    return pd.DataFrame(
+        {
+            "date": dates,
+            "is_trading_day": (dates.dayofweek < 5) & ~dates.isin(holidays),
+        }
+    )
+
+
+def refresh_sessions(
+    con: DuckDBPyConnection, start: datetime | str, end: datetime | str
+) -> None:
+    """
+    Write the session rows of every New York date from `start` to `end`, plus the
+    following date whose Tokyo open lies in the New York evening of `end`. Runs
+    in the caller's transaction so ingest commits bars and sessions together.
+
+    Args:
+        con (DuckDBPyConnection): Writable DuckDB connection.
+        start (datetime | str): First touched minute (timezone aware) or date.
+        end (datetime | str): Last touched minute (timezone aware) or date.
+    """
+    first = _ny_date(start)
+    last = _ny_date(end) + pd.Timedelta(days=1)
+    calendar = trading_calendar(first, last)
+
+    con.register(SESSION_DATES_TABLE, calendar)
+    try:
+        con.execute(get_sql_query(REFRESH_QUERY, HERE, dates_table=SESSION_DATES_TABLE))
+    finally:
+        con.unregister(SESSION_DATES_TABLE)
+    logger.info(f"Refreshed sessions from {first.date()} to {last.date()}")
+
+
+def rebuild_sessions(con: DuckDBPyConnection) -> None:
+    """Write the sessions of every date in ohlcv_minute, e.g. after adding the
+    table to an existing database or changing the holiday rules."""
+    start, end = con.execute("SELECT min(time), max(time) FROM ohlcv_minute").fetchone()
+    if start is None:
+        logger.info("ohlcv_minute is empty, no sessions to build")
+        return
+    con.execute("BEGIN TRANSACTION")
+    try:
+        refresh_sessions(con, start, end)
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+
+
+def _ny_date(value: datetime | str) -> pd.Timestamp:
+    """New York date of a timezone aware instant, plain dates pass through."""
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("America/New_York").tz_localize(None)
+    return ts.normalize()
+
+
+def ensure_sessions(con: DuckDBPyConnection) -> bool:
+    """Build the sessions of every date in ohlcv_minute if the table is empty, e.g.
+    right after the migration added it to an existing database. Queries that ASOF
+    JOIN sessions return no rows until it is filled.
+
+    Returns:
+        bool: Whether the sessions were built.
+    """
+    if con.execute("SELECT count(*) FROM sessions").fetchone()[0]:
+        return False
+    logger.info("sessions is empty, building it from ohlcv_minute")
+    rebuild_sessions(con)
+    return True
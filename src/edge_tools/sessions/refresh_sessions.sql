@@ -0,0 +1,32 @@
+-- boundaries of every date in {{dates_table}}, timezone() resolves DST per date
+INSERT OR REPLACE INTO sessions (
+    date,
+    is_trading_day,
+    ny_day_start,
+    ny_day_end,
+    tokyo_open,
+    london_open,
+    premarket_start,
+    t_minus_60,
+    ny_open,
+    ny_open_30_end,
+    ny_close,
+    added_at
+)
+SELECT
+    date,
+    is_trading_day,
+    timezone('America/New_York', date + TIME '00:00'),
+    timezone('America/New_York', (date + 1) + TIME '00:00'),
+    timezone('Asia/Tokyo', date + TIME '09:00'),
+    timezone('Europe/London', date + TIME '09:00'),
+    timezone('America/New_York', date + TIME '04:00'),
+    timezone('America/New_York', date + TIME '08:30'),
+    timezone('America/New_York', date + TIME '09:30'),
+    timezone('America/New_York', date + TIME '10:00'),
+    timezone('America/New_York', date + TIME '16:00'),
+    NOW() AT TIME ZONE 'UTC'
+FROM (
+    SELECT date::DATE AS date, is_trading_day
+    FROM {{dates_table}}
+);
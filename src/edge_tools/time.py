@@ -1,6 +1,18 @@
+import numpy as np
 import pandas as pd
 from typing import List
 
+# preprocessing prefix -> IANA zone
+TIMEZONES = {
+    "ny": "America/New_York",
+    "tokyo": "Asia/Tokyo",
+    "london": "Europe/London",
+    "shanghai": "Asia/Shanghai",
+    "hongkong": "Asia/Hong_Kong",
+}
+
+MINUTES_PER_DAY = 24 * 60
+
 
 def convert_index_to_utc(data, time_col="time", tz_from="UTC"):
     """
@@ -24,22 +36,83 @@ def convert_index_to_utc(data, time_col="time", tz_from="UTC"):
     return df
 
 
-def _add_local_columns(df, tz_to, prefix):
+def _add_local_columns(df, tz_to, prefix, inplace=False):
     """
     Helper: given a DataFrame with a tz-aware index (typically UTC), add columns for a target timezone.
     Adds: {prefix}_time, {prefix}_hour, {prefix}_minute, {prefix}_time_only
-    Returns a copy of the DataFrame with new columns.
+    Returns a copy of the DataFrame with new columns, or `df` itself if inplace.
     """
     if getattr(df.index, "tz", None) is None:
         raise ValueError(
             "DataFrame index must be timezone-aware. Call convert_index_to_utc first."
         )
 
-    out = df.copy()
-    out[f"{prefix}_time"] = out.index.tz_convert(tz_to)
-    out[f"{prefix}_hour"] = out[f"{prefix}_time"].dt.hour
-    out[f"{prefix}_minute"] = out[f"{prefix}_time"].dt.minute
-    out[f"{prefix}_time_only"] = out[f"{prefix}_time"].dt.time
+    out = df if inplace else df.copy()
+    local = out.index.tz_convert(tz_to)
+    out[f"{prefix}_time"] = local
+    out[f"{prefix}_hour"] = local.hour
+    out[f"{prefix}_minute"] = local.minute
+    out[f"{prefix}_time_only"] = local.time
+    return out
+
+
+class LocalClock:
+    """
+    Local minute of day and local date of a tz-aware index, per zone on first use.
+
+    Both are plain int arrays: minutes since local midnight (int16) and days since
+    1970-01-01 in the local calendar (int32), so filtering on "09:30 New York on
+    2025-11-04" compares integers instead of Python time and date objects.
+    Zones are prefixes of TIMEZONES or IANA names.
+    """
+
+    def __init__(self, index: pd.DatetimeIndex):
+        if getattr(index, "tz", None) is None:
+            raise ValueError(
+                "Index must be timezone-aware. Call convert_index_to_utc first."
+            )
+        self.index = index
+        self._minutes: dict[str, np.ndarray] = {}
+
+    def _local_minutes(self, zone: str) -> np.ndarray:
+        """Minutes since 1970-01-01 00:00 of the local wall clock."""
+        if zone not in self._minutes:
+            tz = TIMEZONES.get(zone, zone)
+            wall = self.index.tz_convert(tz).tz_localize(None).as_unit("ns").asi8
+            self._minutes[zone] = wall // 60_000_000_000
+        return self._minutes[zone]
+
+    def minute_of_day(self, zone: str) -> np.ndarray:
+        """Local minutes since midnight, 09:30 is 570."""
+        return (self._local_minutes(zone) % MINUTES_PER_DAY).astype(np.int16)
+
+    def day(self, zone: str) -> np.ndarray:
+        """Local date as days since 1970-01-01, see `day_ordinal`."""
+        return (self._local_minutes(zone) // MINUTES_PER_DAY).astype(np.int32)
+
+    def at(self, zone: str, day, hour: int, minute: int = 0) -> np.ndarray:
+        """Boolean mask of the bars at `hour:minute` local time on `day`."""
+        return (self.day(zone) == day_ordinal(day)) & (
+            self.minute_of_day(zone) == hour * 60 + minute
+        )
+
+
+def day_ordinal(day) -> int:
+    """Days since 1970-01-01 of a date, the unit of `LocalClock.day`."""
+    return (pd.Timestamp(day).normalize() - pd.Timestamp("1970-01-01")).days
+
+
+def add_compact_local_columns(df, zones: List[str], inplace=False):
+    """
+    Compact alternative to `_add_local_columns` for several zones at once.
+    Adds: {prefix}_minute_of_day (int16) and {prefix}_day (int32) per zone.
+    Returns a copy of the DataFrame with new columns, or `df` itself if inplace.
+    """
+    clock = LocalClock(df.index)
+    out = df if inplace else df.copy()
+    for zone in zones:
+        out[f"{zone}_minute_of_day"] = clock.minute_of_day(zone)
+        out[f"{zone}_day"] = clock.day(zone)
     return out
 
 
@@ -69,7 +142,9 @@ def add_hongkong_columns(df):
 
 
 def preprocess_for_premarket_analysis(
-    df, add_tz: List[str] = ["ny", "tokyo", "london", "shanghai", "hongkong"]
+    df,
+    add_tz: List[str] = ["ny", "tokyo", "london", "shanghai", "hongkong"],
+    compact: bool = False,
 ):
     """
     Full preprocessing: convert index to UTC and add localized time columns for requested timezones.
@@ -77,32 +152,28 @@ def preprocess_for_premarket_analysis(
     Args:
         df: Input DataFrame
         add_tz: List of timezone names to add. Valid options: 'ny', 'tokyo', 'london', 'shanghai', 'hongkong'
+        compact: Add only the int columns of `add_compact_local_columns` instead of
+            the four datetime, hour, minute and time object columns per zone.
 
     Returns:
         DataFrame with UTC index and requested timezone columns
     """
 
-    # Mapping of timezone names to their processing functions
-    tz_functions = {
-        "ny": add_ny_columns,
-        "tokyo": add_tokyo_columns,
-        "london": add_london_columns,
-        "shanghai": add_shanghai_columns,
-        "hongkong": add_hongkong_columns,
-    }
-
     # Validate requested timezones
-    invalid_tz = [tz for tz in add_tz if tz not in tz_functions]
+    invalid_tz = [tz for tz in add_tz if tz not in TIMEZONES]
     if invalid_tz:
         raise ValueError(
-            f"Invalid timezone(s): {invalid_tz}. Valid options are: {list(tz_functions.keys())}"
+            f"Invalid timezone(s): {invalid_tz}. Valid options are: {list(TIMEZONES.keys())}"
         )
 
-    # Convert to UTC first
+    # Convert to UTC first, the only copy of the frame
     out = convert_index_to_utc(df)
 
+    if compact:
+        return add_compact_local_columns(out, add_tz, inplace=True)
+
     # Add requested timezone columns
     for tz in add_tz:
-        out = tz_functions[tz](out)
+        _add_local_columns(out, TIMEZONES[tz], tz, inplace=True)
 
     return out
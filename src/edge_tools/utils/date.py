@@ -1,4 +1,4 @@
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from dateutil import parser
 
 
@@ -50,3 +50,49 @@ def to_datetime(x, *, assume_tz="UTC", ms_threshold=1e11):
         return dt
 
     raise TypeError(f"Don't know how to convert type {type(x)} to datetime")
+
+
+def is_past_day(day, *, tz="America/New_York"):
+    """
+    Whether `day` lies before today in `tz`, i.e. no more bars can arrive for it.
+
+    Parameters
+    ----------
+    day : str | datetime.date
+        Day to check, e.g. "2025-11-06".
+    tz : str, optional
+        Timezone whose calendar decides what "today" is.
+
+    Returns
+    -------
+    bool
+    """
+    from zoneinfo import ZoneInfo
+
+    return date.fromisoformat(str(day)) < datetime.now(ZoneInfo(tz)).date()
+
+
+def split_date_range(start, end, days):
+    """
+    Split the inclusive day range `start` to `end` into consecutive slices.
+
+    Parameters
+    ----------
+    start, end : str | datetime.date
+        First and last day, e.g. "2025-01-02" and "2025-06-30".
+    days : int
+        Days per slice, the last slice may be shorter.
+
+    Returns
+    -------
+    list[tuple[str, str]]
+        Inclusive (first, last) ISO days of every slice, empty if `end` < `start`.
+    """
+    first = date.fromisoformat(str(start))
+    last = date.fromisoformat(str(end))
+    slices = []
+    while first <= last:
+        stop = min(first + timedelta(days=days - 1), last)
+        slices.append((first.isoformat(), stop.isoformat()))
+        first = stop + timedelta(days=1)
+    return slices
@@ -0,0 +1,69 @@
+import duckdb
+import pandas as pd
+import pytest
+from edge_tools.db.migrations import HERE as MIGRATIONS, TABLE_REGISTRY
+
+OHLCV_COLUMNS = "symbol, time, open, high, low, close, volume"
+
+
+@pytest.fixture
+def make_db():
+    """Open in-memory databases with the given migrations, e.g.
+    make_db("create_table_ohlcv_minute"), all of TABLE_REGISTRY by default."""
+    cons = []
+
+    def make(*migrations: str) -> duckdb.DuckDBPyConnection:
+        con = duckdb.connect()
+        for migration in migrations or TABLE_REGISTRY:
+            con.execute((MIGRATIONS / f"{migration}.sql").read_text())
+        cons.append(con)
+        return con
+
+    yield make
+    for con in cons:
+        con.close()
+
+
+@pytest.fixture
+def con(make_db) -> duckdb.DuckDBPyConnection:
+    """In-memory database with every table of TABLE_REGISTRY."""
+    return make_db()
+
+
+@pytest.fixture
+def insert_minutes():
+    """Insert a frame with the OHLCV columns and `symbol` into ohlcv_minute."""
+
+    def insert(con: duckdb.DuckDBPyConnection, frame: pd.DataFrame) -> None:
+        con.register("minute_frame", frame)
+        con.execute(
+            f"INSERT INTO ohlcv_minute ({OHLCV_COLUMNS}) "
+            f"SELECT {OHLCV_COLUMNS} FROM minute_frame"
+        )
+        con.unregister("minute_frame")
+
+    return insert
+
+
+@pytest.fixture
+def csv_rows():
+    """Lines of a broker export: `periods` minutes from `start` at `close`."""
+
+    def rows(start: str, periods: int, close: float = 6000.0) -> str:
+        times = pd.date_range(start, periods=periods, freq="1min")
+        return "".join(
+            f"{t:%Y-%m-%d %H:%M:%S},{close},{close + 1},{close - 1},{close},10\n"
+            for t in times
+        )
+
+    return rows
+
+
+@pytest.fixture
+def write_csv():
+    """Write `rows` below the header of a broker export to `path`."""
+
+    def write(path, rows: str) -> None:
+        path.write_text("Time,Open,High,Low,Close,Volume\n" + rows)
+
+    return write
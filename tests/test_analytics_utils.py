@@ -0,0 +1,26 @@
+import pandas as pd
+from edge_tools.analytics.utils import frame_to_columns, convert_to_timestamp
+
+
+def test_frame_to_columns_epoch_seconds():
+    df = pd.DataFrame(
+        {
+            "time": pd.to_datetime(["2025-11-05 09:30", "2025-11-05 09:31"]),
+            "open": [1.0, 2.0],
+            "volume": [10, 20],
+        }
+    )
+    columns = frame_to_columns(df)
+    # naive times are New York, 09:30 EST is 14:30 UTC
+    assert columns["time"] == [1762353000, 1762353060]
+    assert columns["open"] == [1.0, 2.0]
+    assert columns["volume"] == [10, 20]
+    assert all(type(v) is int for v in columns["time"])
+
+
+def test_convert_to_timestamp_formats():
+    times = pd.to_datetime(["2025-11-05 09:30"])
+    iso = convert_to_timestamp(pd.DataFrame({"time": times}))
+    epoch = convert_to_timestamp(pd.DataFrame({"time": times}), time_format="epoch")
+    assert iso["time"].tolist() == ["2025-11-05T14:30:00Z"]
+    assert epoch["time"].tolist() == [1762353000]
@@ -0,0 +1,215 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import json
+import threading
+import time
+import duckdb
+import pytest
+from api.utils import Cache, ClientDisconnected, DiskCache, QueryRunner, estimate_size
+from edge_tools.db import CursorPool
+
+
+def records(n: int) -> list[dict]:
+    return [
+        {"time": 1762180200 + 60 * i, "open": 6000.25, "close": 6001.5, "volume": 10}
+        for i in range(n)
+    ]
+
+
+def test_estimate_size_is_close_to_json():
+    for payload in (records(1), records(390), {"data": {"close": [6000.5] * 1000}}):
+        encoded = len(json.dumps(payload))
+        assert encoded / 2 < estimate_size(payload) < encoded * 2
+    assert estimate_size(b"x" * 100) == 100
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = Cache(max_items=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_their_ttl():
+    cache = Cache(ttl_secs=60)
+    cache.set("expired", 1, ttl_secs=-1)
+    cache.set("kept", 2, ttl_secs=None)
+    cache.set("default", 3)
+
+    assert cache.get("expired") is None
+    assert (cache.get("kept"), cache.get("default")) == (2, 3)
+    stats = cache.stats()
+    assert (stats["expirations"], stats["items"]) == (1, 2)
+
+
+def test_byte_budget_evicts_and_rejects():
+    cache = Cache(max_bytes=100)
+    cache.set("a", b"x" * 60)
+    cache.set("b", b"x" * 60)
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 60
+
+    cache.set("too_big", b"x" * 101)
+    assert cache.get("too_big") is None
+    assert cache.get("b") is not None
+
+
+def test_fill_computes_once_for_concurrent_callers():
+    cache = Cache()
+    calls = []
+    start = threading.Barrier(8)
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    results = []
+
+    def worker():
+        start.wait()
+        results.append(cache.get_or_compute("key", compute))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+    assert cache.key_locks == {}
+
+
+def test_disk_cache_round_trip_and_version_cleanup(tmp_path):
+    disk = DiskCache(tmp_path, code_version="abc")
+    assert disk.get("/candles/records_epoch", "US500", "2025-11-03", 1) is None
+
+    disk.set("/candles/records_epoch", "US500", "2025-11-03", 1, records(3))
+    disk.set("/candles/records_epoch", "US500", "2025-11-04", 1, records(1))
+    assert disk.get("/candles/records_epoch", "US500", "2025-11-03", 1) == records(3)
+
+    # a new data version replaces the file of that date only
+    disk.set("/candles/records_epoch", "US500", "2025-11-03", 2, records(4))
+    files = sorted(p.name for p in (tmp_path / "candles_records_epoch").iterdir())
+    assert files == [
+        "US500_2025-11-03_v2_abc.json.gz",
+        "US500_2025-11-04_v1_abc.json.gz",
+    ]
+    assert disk.get("/candles/records_epoch", "US500", "2025-11-03", 1) is None
+    assert disk.stats() | {"directory": None} == {
+        "directory": None,
+        "code_version": "abc",
+        "hits": 1,
+        "misses": 2,
+        "writes": 3,
+    }
+
+
+def test_disk_cache_drops_unreadable_files(tmp_path):
+    disk = DiskCache(tmp_path, code_version="abc")
+    disk.set("/context_replay/columnar", "US500", "2025-11-03", 1, {"a": 1})
+    (path,) = (tmp_path / "context_replay_columnar").iterdir()
+    path.write_bytes(b"not gzip")
+
+    computed = disk.get_or_compute(
+        "/context_replay/columnar", "US500", "2025-11-03", 1, lambda: {"a": 2}
+    )
+    assert computed == {"a": 2}
+    assert disk.get("/context_replay/columnar", "US500", "2025-11-03", 1) == {"a": 2}
+
+
+def test_disk_cache_counts_concurrent_lookups(tmp_path):
+    disk = DiskCache(tmp_path, code_version="abc")
+    disk.set("/candles/columnar", "US500", "2025-11-03", 1, {"a": 1})
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(
+            executor.map(
+                lambda _: disk.get("/candles/columnar", "US500", "2025-11-03", 1),
+                range(200),
+            )
+        )
+    assert disk.stats()["hits"] == 200
+
+
+class FakeRequest:
+    def __init__(self):
+        self.disconnected = False
+
+    async def is_disconnected(self) -> bool:
+        return self.disconnected
+
+
+@pytest.fixture
+def runner(tmp_path):
+    path = str(tmp_path / "runner.duckdb")
+    duckdb.connect(path).close()
+    pool = CursorPool(path, size=2, timeout=1)
+    executor = ThreadPoolExecutor(max_workers=2)
+    yield QueryRunner(pool, executor, poll_secs=0.01)
+    executor.shutdown(wait=True)
+    pool.close()
+
+
+def test_identical_queries_share_one_execution(runner):
+    release = threading.Event()
+    calls = []
+
+    def query(con, x):
+        calls.append(x)
+        assert release.wait(timeout=5)
+        return con.execute("SELECT ? * 2", [x]).fetchone()[0]
+
+    async def main():
+        requests = [FakeRequest() for _ in range(3)]
+        tasks = [
+            asyncio.create_task(runner.run(request, "double:21", query, 21))
+            for request in requests
+        ]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(main()) == [42, 42, 42]
+    assert calls == [21]
+    assert (runner.executed, runner.coalesced) == (1, 2)
+    assert runner.inflight == {}
+
+
+def test_disconnect_interrupts_the_query(runner):
+    started = threading.Event()
+    outcome = {}
+
+    def slow_query(con):
+        started.set()
+        begin = time.perf_counter()
+        try:
+            con.execute(
+                "SELECT sum(a.range * b.range) FROM range(100000) a, range(100000) b"
+            ).fetchall()
+        except duckdb.InterruptException:
+            outcome["interrupted_after"] = time.perf_counter() - begin
+            raise
+
+    async def run_and_disconnect():
+        request = FakeRequest()
+        task = asyncio.create_task(runner.run(request, "slow", slow_query))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        # let the query get going before the client leaves
+        await asyncio.sleep(0.1)
+        request.disconnected = True
+        await task
+
+    with pytest.raises(ClientDisconnected):
+        asyncio.run(run_and_disconnect())
+    runner.executor.shutdown(wait=True)
+
+    assert outcome["interrupted_after"] < 5
+    assert runner.cancelled == 1
+    assert runner.inflight == {}
+    assert runner.pool.stats()["in_use"] == 0
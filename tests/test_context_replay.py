@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+from edge_tools.analytics.context_replay import (
+    build_context_replay_frames,
+    build_context_replay_frames_pandas,
+    fetch_context_replay_range,
+    fetch_context_replay_data_and_calculate_metrics,
+)
+
+
+@pytest.fixture
+def con(make_db, insert_minutes):
+    con = make_db("create_table_ohlcv_minute")
+    minutes = pd.date_range(
+        "2025-10-31 00:00", "2025-11-05 23:59", freq="1min", tz="America/New_York"
+    )
+    close = 6000 + np.cumsum(np.random.default_rng(0).standard_normal(len(minutes)))
+    frame = pd.DataFrame(
+        {
+            "symbol": "US500",
+            "time": minutes,
+            "open": close - 0.25,
+            "high": close + 1,
+            "low": close - 1,
+            "close": close,
+            "volume": np.arange(len(minutes)) % 50,
+        }
+    )
+    insert_minutes(con, frame)
+    return con
+
+
+def test_sql_replay_matches_pandas_path(con):
+    frames, metrics = build_context_replay_frames(con, "2025-11-05")
+    expected_frames, expected_metrics = build_context_replay_frames_pandas(con, "2025-11-05")
+
+    assert frames.keys() == expected_frames.keys()
+    for name, frame in frames.items():
+        expected = expected_frames[name].reset_index(drop=True)
+        pd.testing.assert_frame_equal(
+            frame, expected, check_dtype=False, check_index_type=False
+        )
+    assert metrics == expected_metrics
+
+
+def test_sections_are_cut_by_time(con):
+    frames, _ = build_context_replay_frames(con, "2025-11-05")
+    ny = frames["t_minus_60"]["time"].dt.tz_convert("America/New_York")
+    assert ny.iloc[0].strftime("%H:%M") == "08:30"
+    assert ny.iloc[-1].strftime("%H:%M") == "09:29"
+    prev = frames["prev_day_business_hours"]["time"].dt.tz_convert("America/New_York")
+    assert prev.iloc[0].strftime("%Y-%m-%d %H:%M") == "2025-11-04 09:30"
+    assert prev.iloc[-1].strftime("%H:%M") == "15:45"
+
+
+def test_missing_previous_day_gives_empty_metrics(con):
+    frames, metrics = build_context_replay_frames(con, "2025-10-31")
+    assert metrics == {}
+    assert frames["prev_day_business_hours"].empty
+
+
+def test_range_matches_single_dates_across_dst_change(con):
+    # New York falls back on Sunday 2025-11-02
+    payloads = list(fetch_context_replay_range(con, "2025-11-01", "2025-11-04"))
+    assert [p["date"] for p in payloads] == [
+        "2025-11-01",
+        "2025-11-02",
+        "2025-11-03",
+        "2025-11-04",
+    ]
+    for payload in payloads:
+        single = fetch_context_replay_data_and_calculate_metrics(con, payload.pop("date"))
+        assert payload == single
+
+
+def test_range_chunks_split_on_whole_dates(con):
+    whole = list(fetch_context_replay_range(con, "2025-11-01", "2025-11-04"))
+    # one DuckDB vector per chunk, dates straddle chunk boundaries
+    chunked = list(
+        fetch_context_replay_range(con, "2025-11-01", "2025-11-04", batch_rows=2048)
+    )
+    assert chunked == whole
@@ -51,3 +51,15 @@ def test_unix_timestamp_milliseconds():
 def test_invalid_type_raises():
     with pytest.raises(TypeError):
         to_datetime(object())
+
+
+def test_split_date_range_covers_every_day_once():
+    from edge_tools.utils.date import split_date_range
+
+    assert split_date_range("2025-01-01", "2025-01-10", 4) == [
+        ("2025-01-01", "2025-01-04"),
+        ("2025-01-05", "2025-01-08"),
+        ("2025-01-09", "2025-01-10"),
+    ]
+    assert split_date_range("2025-01-01", "2025-01-01", 7) == [("2025-01-01", "2025-01-01")]
+    assert split_date_range("2025-01-02", "2025-01-01", 7) == []
@@ -0,0 +1,77 @@
+import duckdb
+import pytest
+from edge_tools.db.maintenance import (
+    compact_after_ingest,
+    compact_table,
+    rowgroup_stats,
+)
+
+
+@pytest.fixture
+def make_con(make_db):
+    def make(rows: int = 400_000) -> duckdb.DuckDBPyConnection:
+        """Two symbols of minute bars inserted in shuffled batches of 2000 minutes."""
+        con = make_db("create_table_ohlcv_minute", "create_table_compactions")
+        con.execute(
+            f"""
+            INSERT INTO ohlcv_minute (symbol, time, open, high, low, close, volume)
+            SELECT
+                s, TIMESTAMPTZ '2024-01-01 00:00:00+00' + to_minutes(r), r, r, r, r, 1
+            FROM range({rows // 2}) t(r), (VALUES ('US500'), ('DE40')) v(s)
+            ORDER BY hash(r // 2000), s
+            """
+        )
+        con.execute("CREATE INDEX ohlcv_minute_added_at ON ohlcv_minute (added_at)")
+        return con
+
+    return make
+
+
+def test_compact_clusters_row_groups_by_day(make_con):
+    con = make_con()
+    result = compact_table(con, "ohlcv_minute")
+
+    assert result["before"]["rows"] == result["after"]["rows"] == 400_000
+    # shuffled batches spread every day over all 4 row groups
+    assert result["before"]["row_groups_per_day_avg"] > 3
+    # one run per symbol, a day only straddles a row group boundary sometimes
+    assert result["after"]["row_groups_per_day_max"] <= 3
+    assert result["after"]["row_groups_per_day_avg"] < 2.5
+
+    # keys, data and indexes survive the rewrite
+    assert con.execute(
+        "SELECT count(*) FROM duckdb_indexes() WHERE table_name = 'ohlcv_minute'"
+    ).fetchone() == (1,)
+    assert con.execute(
+        "SELECT count(*), sum(close) FROM ohlcv_minute WHERE symbol = 'US500'"
+    ).fetchone() == (200_000, sum(range(200_000)))
+    with pytest.raises(duckdb.ConstraintException):
+        con.execute(
+            "INSERT INTO ohlcv_minute (symbol, time) "
+            "VALUES ('US500', TIMESTAMPTZ '2024-01-01 00:00:00+00')"
+        )
+
+
+def test_compact_after_ingest_threshold(make_con):
+    con = make_con(rows=10_000)
+    assert compact_after_ingest(con, "ohlcv_minute", 10_000, threshold=10_000)
+    assert compact_after_ingest(con, "ohlcv_minute", 9_999, threshold=10_000) is None
+
+
+def test_small_appends_add_up_to_a_compaction(make_con):
+    con = make_con(rows=10_000)
+    for _ in range(3):
+        assert not compact_after_ingest(con, "ohlcv_minute", 3_000, threshold=10_000)
+    assert compact_after_ingest(con, "ohlcv_minute", 1_000, threshold=10_000)
+    # the count starts over after the rewrite
+    assert compact_after_ingest(con, "ohlcv_minute", 9_999, threshold=10_000) is None
+    assert con.execute(
+        "SELECT rows_added, compacted_at IS NOT NULL FROM table_compactions"
+    ).fetchone() == (9_999, True)
+
+
+def test_rowgroup_stats_of_empty_table(make_db):
+    con = make_db("create_table_ohlcv_minute")
+    stats = rowgroup_stats(con, "ohlcv_minute")
+    assert stats["rows"] == 0
+    assert stats["row_groups"] == 0
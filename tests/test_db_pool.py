@@ -0,0 +1,56 @@
+import threading
+import duckdb
+import pytest
+from edge_tools.db import CursorPool, PoolTimeout
+
+
+@pytest.fixture
+def pool(tmp_path):
+    path = str(tmp_path / "pool.duckdb")
+    with duckdb.connect(path) as con:
+        con.execute("CREATE TABLE t AS SELECT range AS x FROM range(10)")
+    pool = CursorPool(path, size=2, timeout=0.2)
+    yield pool
+    pool.close()
+
+
+def test_checkout_runs_queries_and_returns_cursor(pool):
+    with pool.checkout() as con:
+        assert con.execute("SELECT sum(x) FROM t").fetchone()[0] == 45
+        assert pool.stats()["in_use"] == 1
+    stats = pool.stats()
+    assert stats["in_use"] == 0
+    assert stats["checkouts"] == 1
+    assert stats["waits"] == 0
+
+
+def test_exhausted_pool_waits_then_times_out(pool):
+    with pool.checkout(), pool.checkout():
+        with pytest.raises(PoolTimeout):
+            with pool.checkout():
+                pass
+    assert pool.stats()["timeouts"] == 1
+    assert pool.stats()["available"] == 2
+
+
+def test_waiting_checkout_gets_released_cursor(pool):
+    release = threading.Event()
+    # both holders and this thread pass once the holders have their cursors
+    checked_out = threading.Barrier(3, timeout=5)
+
+    def hold():
+        with pool.checkout():
+            checked_out.wait()
+            release.wait(timeout=5)
+
+    holders = [threading.Thread(target=hold) for _ in range(2)]
+    for t in holders:
+        t.start()
+    checked_out.wait()
+    assert pool.stats()["in_use"] == 2
+    threading.Timer(0.05, release.set).start()
+    with pool.checkout() as con:
+        assert con.execute("SELECT count(*) FROM t").fetchone()[0] == 10
+    for t in holders:
+        t.join(timeout=5)
+    assert pool.stats()["waits"] == 1
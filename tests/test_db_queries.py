@@ -0,0 +1,55 @@
+import duckdb
+import pytest
+from edge_tools.db.queries import QueryRegistry
+
+
+def make_templates(tmp_path):
+    (tmp_path / "values.sql").write_text(
+        "SELECT {% if doubled %}x * 2{% else %}x{% endif %} AS x\n"
+        "FROM range(10) t(x)\n"
+        "WHERE x >= $low AND x < $high\n"
+        "ORDER BY x;\n"
+    )
+    return tmp_path
+
+
+def test_execute_binds_parameters(tmp_path):
+    registry = QueryRegistry()
+    registry.register("values", "values", make_templates(tmp_path))
+    con = duckdb.connect()
+
+    rows = registry.execute(con, "values", low=2, high=5).fetchall()
+    assert rows == [(2,), (3,), (4,)]
+    assert registry.execute(con, "values", low=8, high=20).fetchall() == [(8,), (9,)]
+
+
+def test_structure_renders_once_per_name(tmp_path):
+    registry = QueryRegistry()
+    here = make_templates(tmp_path)
+    registry.register("values", "values.sql", here)
+    registry.register("doubled", "values.sql", here, doubled=True)
+    con = duckdb.connect()
+
+    assert registry.load_all() == 2
+    for _ in range(3):
+        registry.execute(con, "doubled", low=1, high=3)
+    assert con.fetchall() == [(2,), (4,)]
+    assert not registry.sql("values").endswith(";")
+    assert registry.stats() == {
+        "registered": 2,
+        "rendered": 2,
+        "renders": 2,
+        "executions": 3,
+    }
+
+
+def test_register_conflicts_and_unknown_names(tmp_path):
+    registry = QueryRegistry()
+    here = make_templates(tmp_path)
+    registry.register("values", "values", here)
+    # importing a module twice registers the same source again
+    registry.register("values", "values", here)
+    with pytest.raises(ValueError):
+        registry.register("values", "values", here, doubled=True)
+    with pytest.raises(KeyError):
+        registry.sql("missing")
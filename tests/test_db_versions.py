@@ -0,0 +1,27 @@
+import pandas as pd
+from edge_tools.db import bump_data_version, get_data_version
+
+
+def ny(ts: str) -> pd.Timestamp:
+    return pd.Timestamp(ts, tz="America/New_York")
+
+
+def test_unknown_range_is_version_zero(con):
+    assert get_data_version(con, "US500", "2025-11-06") == 0
+
+
+def test_bump_only_changes_overlapping_days(con):
+    first = bump_data_version(con, "US500", ny("2025-11-05 09:30"), ny("2025-11-05 16:00"))
+    second = bump_data_version(con, "US500", ny("2025-11-06 18:00"), ny("2025-11-06 23:59"))
+    assert second > first
+
+    assert get_data_version(con, "US500", "2025-11-05") == first
+    assert get_data_version(con, "US500", "2025-11-06") == second
+    assert get_data_version(con, "US500", "2025-11-05", "2025-11-06") == second
+    assert get_data_version(con, "US500", "2025-11-04") == 0
+    assert get_data_version(con, "NAS100", "2025-11-05") == 0
+
+
+def test_range_ending_on_midnight_belongs_to_previous_day_only(con):
+    bump_data_version(con, "US500", ny("2025-11-05 23:00"), ny("2025-11-05 23:59"))
+    assert get_data_version(con, "US500", "2025-11-06") == 0
@@ -0,0 +1,59 @@
+import pandas as pd
+from edge_tools.ingest.bulk import ingest_files_bulk
+from edge_tools.ingest.manifest import get_pending_files
+
+
+def test_bulk_merges_overlapping_exports(tmp_path, con, csv_rows, write_csv):
+    # two US500 exports sharing 14:35 - 14:39 and one DE40 export
+    exports = {
+        "US500_Minute_20251103_1430.csv": csv_rows("2025-11-03 14:30", 10),
+        "US500_Minute_20251103_1435.csv": csv_rows("2025-11-03 14:35", 10),
+        "DE40_Minute_20251103_1430.csv": csv_rows("2025-11-03 14:30", 4, 24000),
+    }
+    for name, rows in exports.items():
+        write_csv(tmp_path / name, rows)
+
+    entries = get_pending_files(con, tmp_path)
+    stats = ingest_files_bulk(con, entries, "Minute")
+
+    assert sorted((s["symbol"], s["rows"]) for s in stats) == [
+        ("DE40", 4),
+        ("US500", 10),
+        ("US500", 10),
+    ]
+    # the files share one scan, each rate is its rows over that scan
+    assert len({s["stage_secs"] for s in stats}) == 1
+    assert all(s["rows_per_sec"] > 0 for s in stats)
+    assert con.execute(
+        "SELECT symbol, count(*), count(DISTINCT time) FROM ohlcv_minute "
+        "GROUP BY symbol ORDER BY symbol"
+    ).fetchall() == [("DE40", 4, 4), ("US500", 15, 15)]
+
+    manifest = con.execute(
+        "SELECT symbol, status, row_count, max_time FROM ingest_manifest ORDER BY path"
+    ).fetchall()
+    assert [row[:3] for row in manifest] == [
+        ("DE40", "done", 4),
+        ("US500", "done", 10),
+        ("US500", "done", 10),
+    ]
+    assert manifest[2][3] == pd.Timestamp("2025-11-03 14:44", tz="UTC")
+    assert con.execute(
+        "SELECT list(symbol ORDER BY symbol) FROM data_versions"
+    ).fetchone()[0] == ["DE40", "US500"]
+    assert get_pending_files(con, tmp_path) == []
+
+
+def test_bulk_skips_committed_bars_of_grown_files(tmp_path, con, csv_rows, write_csv):
+    path = tmp_path / "US500_Minute_20251103_1430.csv"
+    write_csv(path, csv_rows("2025-11-03 14:30", 10))
+    ingest_files_bulk(con, get_pending_files(con, tmp_path), "Minute")
+
+    # rewritten with revised history and 5 new bars, only the new bars are merged
+    write_csv(path, csv_rows("2025-11-03 14:30", 15, close=6100.0))
+    (stats,) = ingest_files_bulk(con, get_pending_files(con, tmp_path), "Minute")
+    assert stats["rows"] == 15
+    assert con.execute("SELECT row_count FROM ingest_manifest").fetchone()[0] == 15
+    assert con.execute(
+        "SELECT close, count(*) FROM ohlcv_minute GROUP BY close ORDER BY close"
+    ).fetchall() == [(6000.0, 10), (6100.0, 5)]
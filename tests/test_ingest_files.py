@@ -0,0 +1,28 @@
+from edge_tools.ingest.files import hash_anchor, read_complete_tail
+
+
+def test_read_complete_tail_skips_partial_line(tmp_path):
+    path = tmp_path / "US500_Minute_20250821_0926.csv"
+    path.write_bytes(b"Time,Open\n2025-08-21 09:26:00,1\n2025-08-21 09:27:00,2\n2025-08-2")
+    offset = len(b"Time,Open\n2025-08-21 09:26:00,1\n")
+    assert read_complete_tail(path, offset) == b"2025-08-21 09:27:00,2\n"
+
+
+def test_read_complete_tail_without_new_line(tmp_path):
+    path = tmp_path / "US500_Minute_20250821_0926.csv"
+    path.write_bytes(b"Time,Open\n2025-08-2")
+    assert read_complete_tail(path, len(b"Time,Open\n")) == b""
+
+
+def test_hash_anchor_survives_append(tmp_path):
+    path = tmp_path / "US500_Minute_20250821_0926.csv"
+    path.write_bytes(b"Time,Open\n2025-08-21 09:26:00,1\n")
+    offset = path.stat().st_size
+    before = hash_anchor(path, offset)
+
+    with path.open("ab") as f:
+        f.write(b"2025-08-21 09:27:00,2\n")
+    assert hash_anchor(path, offset) == before
+
+    path.write_bytes(b"Time,Open\n2025-08-21 09:26:00,5\n2025-08-21 09:27:00,2\n")
+    assert hash_anchor(path, offset) != before
@@ -0,0 +1,89 @@
+import os
+import duckdb
+import pandas as pd
+import pytest
+from edge_tools.ingest.manifest import get_pending_files, ingest_file
+
+FILENAME = "US500_Minute_20251103_0930.csv"
+
+
+def ingest_pending(con, folder) -> int:
+    return sum(ingest_file(con, entry) for entry in get_pending_files(con, folder))
+
+
+def manifest_row(con, path) -> tuple:
+    return con.execute(
+        "SELECT status, row_count, error FROM ingest_manifest WHERE path = ?",
+        [str(path.absolute())],
+    ).fetchone()
+
+
+def test_unchanged_files_are_skipped(tmp_path, con, csv_rows, write_csv):
+    path = tmp_path / FILENAME
+    write_csv(path, csv_rows("2025-11-03 14:30", 10))
+
+    assert ingest_pending(con, tmp_path) == 10
+    assert manifest_row(con, path)[:2] == ("done", 10)
+    assert get_pending_files(con, tmp_path) == []
+
+
+def test_same_size_is_settled_by_content_hash(tmp_path, con, csv_rows, write_csv):
+    path = tmp_path / FILENAME
+    write_csv(path, csv_rows("2025-11-03 14:30", 10))
+    ingest_pending(con, tmp_path)
+
+    # re-downloaded with identical bytes: only the new mtime is recorded
+    os.utime(path, (1_800_000_000, 1_800_000_000))
+    assert get_pending_files(con, tmp_path) == []
+    stored_mtime = con.execute("SELECT mtime FROM ingest_manifest").fetchone()[0]
+    assert stored_mtime.timestamp() == 1_800_000_000
+
+    # same size, different bytes: loaded again in full
+    write_csv(path, csv_rows("2025-11-03 14:30", 10, close=6001.0))
+    os.utime(path, (1_800_000_060, 1_800_000_060))
+    (entry,) = get_pending_files(con, tmp_path)
+    assert entry["tail_offset"] is None
+    assert entry["content_hash"] != entry["previous"]["content_hash"]
+
+
+def test_resume_after_skips_committed_bars(tmp_path, con, csv_rows, write_csv):
+    path = tmp_path / FILENAME
+    write_csv(path, csv_rows("2025-11-03 14:30", 10))
+    ingest_pending(con, tmp_path)
+
+    # rewritten export with revised history and 5 new bars
+    write_csv(path, csv_rows("2025-11-03 14:30", 15, close=6100.0))
+    (entry,) = get_pending_files(con, tmp_path)
+    assert entry["tail_offset"] is None
+    assert entry["resume_after"] == pd.Timestamp("2025-11-03 14:39", tz="UTC")
+    assert ingest_file(con, entry) == 5
+
+    closes = con.execute(
+        "SELECT close, count(*) FROM ohlcv_minute GROUP BY close ORDER BY close"
+    ).fetchall()
+    assert closes == [(6000.0, 10), (6100.0, 5)]
+
+    # appended rows are read from the committed byte offset
+    with path.open("a") as f:
+        f.write(csv_rows("2025-11-03 14:45", 3, close=6200.0))
+    (entry,) = get_pending_files(con, tmp_path)
+    assert entry["tail_offset"] is not None
+    assert ingest_file(con, entry) == 3
+    assert con.execute("SELECT count(*) FROM ohlcv_minute").fetchone()[0] == 18
+
+
+def test_failed_ingest_rolls_back(tmp_path, con, csv_rows, write_csv):
+    path = tmp_path / FILENAME
+    write_csv(path, csv_rows("2025-11-03 14:30", 5) + "not a time,1,1,1,1,1\n")
+
+    (entry,) = get_pending_files(con, tmp_path)
+    with pytest.raises(duckdb.Error):
+        ingest_file(con, entry)
+
+    status, _, error = manifest_row(con, path)
+    assert status == "failed"
+    assert error
+    for table in ("ohlcv_minute", "data_versions", "sessions"):
+        assert con.execute(f"SELECT count(*) FROM {table}").fetchone()[0] == 0
+    # retried on the next run
+    assert len(get_pending_files(con, tmp_path)) == 1
@@ -0,0 +1,43 @@
+import pytest
+from pathlib import Path
+from edge_tools.ingest.schema import (
+    CsvSchema,
+    get_csv_schema,
+    register_csv_schema,
+    CSV_SCHEMAS,
+)
+
+
+def test_default_schema_by_interval():
+    schema = get_csv_schema(Path("US500_Minute_20250821_0926.csv"))
+    assert schema.columns["Time"] == "TIMESTAMP"
+    assert schema.columns["Volume"] == "BIGINT"
+
+
+def test_reader_options_disable_sniffing():
+    schema = CsvSchema(columns={"Time": "TIMESTAMP", "Open": "DOUBLE"}, delimiter=";")
+    options = schema.reader_options()
+    assert "columns = {'Time': 'TIMESTAMP', 'Open': 'DOUBLE'}" in options
+    assert "delim = ';'" in options
+    assert "auto_detect = false" in options
+    assert "timestampformat" not in options
+
+
+def test_reader_options_timestamp_format():
+    schema = CsvSchema(columns={"Time": "TIMESTAMP"}, timestamp_format="%d.%m.%Y %H:%M")
+    assert "timestampformat = '%d.%m.%Y %H:%M'" in schema.reader_options()
+
+
+def test_symbol_specific_schema_wins():
+    custom = CsvSchema(columns={"Time": "TIMESTAMP"}, timestamp_format="%d.%m.%Y %H:%M")
+    register_csv_schema("DE40", "Minute", custom)
+    try:
+        assert get_csv_schema(Path("DE40_Minute_20250821_0926.csv")) is custom
+        assert get_csv_schema(Path("US500_Minute_20250821_0926.csv")) is not custom
+    finally:
+        CSV_SCHEMAS.pop(("DE40", "Minute"))
+
+
+def test_unknown_interval_raises():
+    with pytest.raises(KeyError):
+        get_csv_schema(Path("US500_Tick_20250821_0926.csv"))
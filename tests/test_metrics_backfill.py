@@ -0,0 +1,214 @@
+import dataclasses
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+from edge_tools.db.versions import bump_data_version
+from edge_tools.sessions import rebuild_sessions, refresh_sessions
+from edge_tools.metrics.backfill import backfill_metrics, load_dataset
+from edge_tools.metrics.base import MetricDefinition
+from edge_tools.metrics.compute.thirty_min_open_change import (
+    calculate_change,
+    metric_thirty_min_open_change_abs,
+    metric_thirty_min_open_change_rel,
+)
+from edge_tools.metrics.compute.session_aggregates import (
+    metric_us_open_30m_high,
+    metric_us_open_30m_low,
+    metric_us_first_hour_range,
+    metric_us_open_30m_volume_share,
+)
+from edge_tools.metrics.compute.ratios import metric_us_open_30m_range_share
+
+OPEN_CHANGE = [metric_thirty_min_open_change_abs, metric_thirty_min_open_change_rel]
+SESSION_AGGREGATES = [
+    metric_us_open_30m_high,
+    metric_us_open_30m_low,
+    metric_us_first_hour_range,
+    metric_us_open_30m_volume_share,
+]
+
+
+@pytest.fixture
+def frame() -> pd.DataFrame:
+    # New York leaves DST on 2025-11-02, the 09:30 window moves in UTC
+    minutes = pd.date_range(
+        "2025-10-30 00:00", "2025-11-04 23:59", freq="1min", tz="America/New_York"
+    )
+    close = 6000 + np.cumsum(np.random.default_rng(1).standard_normal(len(minutes)))
+    return pd.DataFrame(
+        {
+            "symbol": "US500",
+            "time": minutes,
+            "open": close - 0.25,
+            "high": close + 1,
+            "low": close - 1,
+            "close": close,
+            "volume": np.arange(len(minutes)) % 50,
+        }
+    )
+
+
+@pytest.fixture
+def con(make_db, insert_minutes, frame) -> duckdb.DuckDBPyConnection:
+    con = make_db(
+        "create_table_ohlcv_minute",
+        "create_table_sessions",
+        "create_table_metrics",
+        "create_table_data_versions",
+    )
+    insert_minutes(con, frame)
+    refresh_sessions(con, frame["time"].iloc[0], frame["time"].iloc[-1])
+    return con
+
+
+def stored_values(con) -> pd.DataFrame:
+    return con.execute(
+        """
+        SELECT m.metric_name, e.date, e.metric_value
+        FROM metric_events e JOIN metrics m USING (metric_id)
+        ORDER BY ALL
+        """
+    ).df()
+
+
+def test_backfill_matches_per_day_compute(con, frame):
+    assert backfill_metrics(con, metrics=OPEN_CHANGE) == 2 * 6
+
+    values = stored_values(con)
+    ny = frame["time"].dt.tz_localize(None)
+    for day, row in values.groupby("date"):
+        opening = (ny >= day + pd.Timedelta("9h30min")) & (ny < day + pd.Timedelta("10h"))
+        window = frame[opening]
+        assert len(window) == 30
+        expected = calculate_change(window.reset_index(drop=True))
+        by_name = dict(zip(row["metric_name"], row["metric_value"]))
+        assert by_name["thirty_min_us_open_change_abs"] == expected["absolute_change"]
+        assert by_name["thirty_min_us_open_change_rel"] == pytest.approx(
+            expected["relative_change"] * 100
+        )
+
+
+def ny(timestamp: str) -> pd.Timestamp:
+    return pd.Timestamp(timestamp, tz="America/New_York")
+
+
+def test_backfill_skips_untouched_dates(con):
+    assert (
+        backfill_metrics(
+            con, metrics=OPEN_CHANGE, start_date="2025-10-30", end_date="2025-11-01"
+        )
+        == 6
+    )
+    assert backfill_metrics(con, metrics=OPEN_CHANGE) == 6
+    assert backfill_metrics(con, metrics=OPEN_CHANGE) == 0
+
+    # a value removed by hand is only computed again by a full run
+    con.execute("DELETE FROM metric_events WHERE date = '2025-11-03'")
+    assert backfill_metrics(con, metrics=OPEN_CHANGE) == 0
+    assert backfill_metrics(con, metrics=OPEN_CHANGE[:1], full=True) == 6
+    assert len(stored_values(con)) == 11
+
+
+def test_backfill_before_sessions_are_built(con):
+    con.execute("DELETE FROM sessions")
+    assert backfill_metrics(con, metrics=OPEN_CHANGE) == 0
+    assert con.execute("SELECT count(*) FROM metric_state").fetchone()[0] == 0
+
+    # sessions built in one go after the upgrade, the history is still computed
+    rebuild_sessions(con)
+    assert backfill_metrics(con, metrics=OPEN_CHANGE) == 2 * 6
+
+
+def test_new_data_recomputes_touched_dates_only(con):
+    assert backfill_metrics(con, metrics=OPEN_CHANGE) == 2 * 6
+
+    con.execute(
+        "UPDATE ohlcv_minute SET close = close + 10 "
+        "WHERE time = '2025-11-03 14:59:00+00'"
+    )
+    bump_data_version(con, "US500", ny("2025-11-03 09:59"), ny("2025-11-03 09:59"))
+    before = stored_values(con)
+    assert backfill_metrics(con, metrics=OPEN_CHANGE) == 2
+    after = stored_values(con)
+
+    changed = before["metric_value"] != after["metric_value"]
+    assert set(after.loc[changed, "date"].dt.date.astype(str)) == {"2025-11-03"}
+    assert backfill_metrics(con, metrics=OPEN_CHANGE) == 0
+
+
+def test_sql_metrics_match_pandas(con, frame):
+    assert backfill_metrics(con, metrics=SESSION_AGGREGATES) == 4 * 6
+    assert backfill_metrics(con, metrics=SESSION_AGGREGATES) == 0
+
+    values = stored_values(con).pivot(
+        index="date", columns="metric_name", values="metric_value"
+    )
+    ny = frame["time"].dt.tz_localize(None)
+    for day, row in values.iterrows():
+        local = ny - day
+
+        def bars_until(end):
+            return frame[(local >= pd.Timedelta("9h30min")) & (local < pd.Timedelta(end))]
+
+        opening, first_hour, session = (bars_until(e) for e in ("10h", "10h30min", "16h"))
+        assert row["us_open_30m_high"] == opening["high"].max()
+        assert row["us_open_30m_low"] == opening["low"].min()
+        assert row["us_first_hour_range"] == round(
+            first_hour["high"].max() - first_hour["low"].min(), 2
+        )
+        assert row["us_open_30m_volume_share"] == pytest.approx(
+            round(100 * opening["volume"].sum() / session["volume"].sum(), 2)
+        )
+
+
+def test_sql_and_python_metrics_share_one_run(con, frame):
+    con.execute("DELETE FROM ohlcv_minute WHERE time >= '2025-11-04 14:00:00+00'")
+    metrics = OPEN_CHANGE + SESSION_AGGREGATES
+    # 2025-11-04 only has bars before the open
+    assert backfill_metrics(con, metrics=metrics) == len(metrics) * 5
+    assert backfill_metrics(con, metrics=metrics) == 0
+
+    # the rest of 2025-11-04 is ingested
+    late = frame[frame["time"] >= ny("2025-11-04 09:00")]
+    con.execute(
+        "INSERT INTO ohlcv_minute (symbol, time, open, high, low, close, volume) "
+        "SELECT * FROM late"
+    )
+    bump_data_version(con, "US500", late["time"].min(), late["time"].max())
+    assert backfill_metrics(con, metrics=metrics) == len(metrics)
+    assert len(stored_values(con)) == len(metrics) * 6
+
+
+def test_code_change_recomputes_metric_and_dependents(con):
+    # the dependencies of the derived metric are computed first
+    assert backfill_metrics(con, metrics=[metric_us_open_30m_range_share]) == 4 * 6
+
+    values = stored_values(con).pivot(
+        index="date", columns="metric_name", values="metric_value"
+    )
+    expected = (
+        100
+        * (values["us_open_30m_high"] - values["us_open_30m_low"])
+        / values["us_first_hour_range"]
+    ).round(2)
+    pd.testing.assert_series_equal(
+        values["us_open_30m_range_share"], expected, check_names=False
+    )
+
+    changed = dataclasses.replace(metric_us_open_30m_high, sql="max(high) + 1")
+    metrics = [changed, metric_us_open_30m_range_share]
+    assert backfill_metrics(con, metrics=metrics) == 2 * 6
+    assert backfill_metrics(con, metrics=metrics) == 0
+
+
+def test_datasets_follow_session_windows(con):
+    data = load_dataset(con, "us_business_hours", "US500", "2025-11-03", "2025-11-03")
+    ny = data["time"].dt.tz_convert("America/New_York")
+    assert len(data) == 390
+    assert ny.iloc[0].strftime("%H:%M") == "09:30"
+    assert ny.iloc[-1].strftime("%H:%M") == "15:59"
+
+    unknown = MetricDefinition(name="x", description="x", dataset="daily")
+    with pytest.raises(ValueError):
+        backfill_metrics(con, metrics=[unknown])
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+from edge_tools.metrics.base import MetricDefinition, per_day_batch
+from edge_tools.metrics.compute.thirty_min_open_change import (
+    metric_thirty_min_open_change_abs,
+    metric_thirty_min_open_change_rel,
+)
+
+
+def make_bars() -> pd.DataFrame:
+    """30 bars per date and symbol, ordered by time like a metric dataset."""
+    frames = []
+    rng = np.random.default_rng(2)
+    for symbol in ("US500", "DE40"):
+        for day in pd.date_range("2025-11-03", periods=4):
+            close = 6000 + np.cumsum(rng.standard_normal(30))
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "date": day,
+                        "symbol": symbol,
+                        "time": pd.date_range(day, periods=30, freq="1min"),
+                        "open": close - 0.5,
+                        "close": close,
+                        "volume": 10,
+                    }
+                )
+            )
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.mark.parametrize(
+    "metric", [metric_thirty_min_open_change_abs, metric_thirty_min_open_change_rel]
+)
+def test_batch_compute_matches_per_day_compute(metric):
+    bars = make_bars()
+    batch = metric.compute_grouped(bars)
+    per_day = per_day_batch(metric.compute)(bars)
+
+    assert batch.name == metric.name
+    assert len(batch) == 8
+    assert batch.index.names == ["date", "symbol"]
+    pd.testing.assert_series_equal(batch, per_day, check_names=False)
+
+
+def test_per_day_metrics_run_through_the_adapter():
+    metric = MetricDefinition(
+        name="volume_sum",
+        description="Volume of the window",
+        dataset="us_open_30m",
+        compute=lambda bars: bars["volume"].sum(),
+    )
+    values = metric.compute_grouped(make_bars())
+    assert values.dtype == "float64"
+    assert (values == 300).all()
+    assert values.loc[(pd.Timestamp("2025-11-04"), "DE40")] == 300
@@ -0,0 +1,46 @@
+import dataclasses
+from graphlib import CycleError
+import pytest
+from edge_tools.metrics.base import MetricDefinition
+from edge_tools.metrics.graph import code_versions, metric_layers, resolve_metrics
+from edge_tools.metrics.registry import ALL_METRICS
+from edge_tools.metrics.compute.ratios import metric_us_open_30m_range_share
+
+
+def metric(name: str, *depends_on: str) -> MetricDefinition:
+    return MetricDefinition(
+        name=name,
+        description=name,
+        dataset="metrics" if depends_on else "us_open_30m",
+        sql=None if depends_on else "max(high)",
+        depends_on=depends_on,
+    )
+
+
+def test_layers_follow_dependencies():
+    metrics = resolve_metrics([metric_us_open_30m_range_share], ALL_METRICS)
+    layers = [[m.name for m in layer] for layer in metric_layers(metrics)]
+    assert layers == [
+        ["us_first_hour_range", "us_open_30m_high", "us_open_30m_low"],
+        ["us_open_30m_range_share"],
+    ]
+
+
+def test_cycles_and_unknown_metrics_are_rejected():
+    cycle = [metric("a", "b"), metric("b", "a")]
+    with pytest.raises(CycleError):
+        metric_layers(resolve_metrics(cycle, []))
+    with pytest.raises(ValueError):
+        resolve_metrics([metric("a", "missing")], [])
+
+
+def test_code_versions_propagate_to_dependents():
+    metrics = [metric("base"), metric("derived", "base"), metric("other")]
+    before = code_versions(resolve_metrics(metrics, []))
+
+    metrics[0] = dataclasses.replace(metrics[0], sql="min(low)")
+    after = code_versions(resolve_metrics(metrics, []))
+
+    assert before["other"] == after["other"]
+    assert before["base"] != after["base"]
+    assert before["derived"] != after["derived"]
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from edge_tools.db import QUERIES
+from edge_tools.premarket import (
+    compute_premarket_prices_and_changes,
+    compute_premarket_prices_batch,
+    query_premarket_anchor_prices,
+)
+from edge_tools.time import preprocess_for_premarket_analysis
+
+
+def make_bars(start="2025-10-27", end="2025-11-08"):
+    """24h minute bars without Saturdays and Sundays before 22:00 UTC."""
+    time = pd.date_range(start, end, freq="1min", inclusive="left")
+    time = time[~((time.dayofweek == 5) | ((time.dayofweek == 6) & (time.hour < 22)))]
+    close = 6000 + np.cumsum(np.random.default_rng(0).normal(size=len(time)))
+    return pd.DataFrame(
+        {
+            "time": time,
+            "open": close,
+            "high": close + 1,
+            "low": close - 1,
+            "close": close,
+            "volume": 1,
+        }
+    )
+
+
+def per_day(bars: pd.DataFrame, day: str) -> dict:
+    day = pd.Timestamp(day)
+    window = bars[
+        (bars["time"] >= day - pd.Timedelta(days=1))
+        & (bars["time"] < day + pd.Timedelta(days=1))
+    ]
+    window = window.set_index("time", drop=False).rename_axis(None)
+    data = preprocess_for_premarket_analysis(window)
+    return compute_premarket_prices_and_changes(data)
+
+
+def test_batch_matches_calculator_across_dst():
+    bars = make_bars()
+    batch = compute_premarket_prices_batch(bars, "2025-10-28", "2025-11-07")
+
+    # New York leaves DST on 2025-11-02, Mondays have no previous calendar day close
+    days = ["2025-10-28", "2025-10-31", "2025-11-04", "2025-11-05", "2025-11-07"]
+    for day in days:
+        expected = per_day(bars, day)
+        row = batch.loc[day]
+        for key, value in expected.items():
+            assert row[key] == pytest.approx(value), (day, key)
+
+
+def test_batch_uses_last_close_for_mondays():
+    bars = make_bars()
+    batch = compute_premarket_prices_batch(bars)
+
+    assert pd.Timestamp("2025-11-01") not in batch.index
+    friday_close = batch.loc["2025-10-31", "us_close_current_day"]
+    assert batch.loc["2025-11-03", "us_close_previous_day"] == friday_close
+    # the first day has no previous close to compare with
+    assert np.isnan(batch.iloc[0]["tokyo_change_percent"])
+
+
+def test_batch_stops_at_the_last_date_in_data():
+    # ends after the Tokyo open of 2025-11-07, 19:00 on 2025-11-06 in New York
+    bars = make_bars(end="2025-11-07 01:00")
+    batch = compute_premarket_prices_batch(bars)
+
+    assert batch.index[-1] == pd.Timestamp("2025-11-06")
+
+
+@pytest.fixture
+def make_con(make_db, insert_minutes):
+    def make(bars: pd.DataFrame):
+        con = make_db("create_table_ohlcv_minute")
+        insert_minutes(
+            con, bars.assign(symbol="US500", time=bars["time"].dt.tz_localize("UTC"))
+        )
+        return con
+
+    return make
+
+
+def test_asof_anchors_match_batch_engine(make_con):
+    bars = make_bars()
+    con = make_con(bars)
+
+    exact = query_premarket_anchor_prices(con, tolerance=pd.Timedelta(0))
+    batch = compute_premarket_prices_batch(bars)
+    pd.testing.assert_frame_equal(exact, batch, check_freq=False)
+
+    ranged = query_premarket_anchor_prices(
+        con, start_date="2025-11-03", end_date="2025-11-05"
+    )
+    expected = batch.loc["2025-11-03":"2025-11-05"]
+    assert len(ranged) == 3
+    pd.testing.assert_frame_equal(ranged, expected, check_freq=False)
+
+
+def test_asof_anchors_fill_gaps_within_tolerance(make_con):
+    bars = make_bars()
+    # New York 09:30 on 2025-11-04 is 14:30 UTC, drop that minute and the one before
+    gap = bars["time"].isin(pd.to_datetime(["2025-11-04 14:29", "2025-11-04 14:30"]))
+    con = make_con(bars[~gap])
+    fallback = bars.loc[bars["time"] == "2025-11-04 14:28", "close"].item()
+
+    loose = query_premarket_anchor_prices(con, tolerance=pd.Timedelta(minutes=5))
+    strict = query_premarket_anchor_prices(con, tolerance=pd.Timedelta(minutes=1))
+    assert loose.loc["2025-11-04", "us_open_current_day"] == fallback
+    assert np.isnan(strict.loc["2025-11-04", "us_open_current_day"])
+    assert (
+        strict.loc["2025-11-04", "us_close_current_day"]
+        == loose.loc["2025-11-04", "us_close_current_day"]
+    )
+
+
+def test_asof_anchors_bind_symbol_and_dates(make_con):
+    con = make_con(make_bars())
+    renders = QUERIES.renders
+    for start_date in ("2025-11-03", "2025-11-04"):
+        query_premarket_anchor_prices(con, start_date=start_date, end_date="2025-11-05")
+    # both ranges run the same statement
+    assert QUERIES.renders <= renders + 1
+    assert query_premarket_anchor_prices(con, symbol="US'500").empty
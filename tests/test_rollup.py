@@ -0,0 +1,71 @@
+import pytest
+import pandas as pd
+from edge_tools.rollup import refresh_rollups, get_rollup_bars
+
+
+@pytest.fixture
+def make_con(make_db, insert_minutes):
+    def make(minutes: pd.DatetimeIndex):
+        con = make_db("create_table_ohlcv_minute", "create_table_ohlcv_rollups")
+        frame = pd.DataFrame(
+            {
+                "symbol": "US500",
+                "time": minutes,
+                "open": range(len(minutes)),
+                "high": 10_000.0,
+                "low": 0.0,
+                "close": range(len(minutes)),
+                "volume": 1,
+            }
+        )
+        insert_minutes(con, frame)
+        return con
+
+    return make
+
+
+def test_daily_business_session_bars(make_con):
+    # Mon 2025-11-03 and Tue 2025-11-04, full 24h of minutes in New York time
+    minutes = pd.date_range(
+        "2025-11-03", "2025-11-04 23:59", freq="1min", tz="America/New_York"
+    )
+    con = make_con(minutes)
+    refresh_rollups(con, "US500", minutes[0], minutes[-1])
+
+    daily = get_rollup_bars(con, "US500", "daily", "ny_business")
+    assert list(daily.index.strftime("%Y-%m-%d %H:%M")) == [
+        "2025-11-03 00:00",
+        "2025-11-04 00:00",
+    ]
+    assert list(daily["volume"]) == [390, 390]
+    first_open = minutes.get_loc(pd.Timestamp("2025-11-03 09:30", tz="America/New_York"))
+    assert daily["open"].iloc[0] == first_open
+    assert daily["close"].iloc[0] == first_open + 389
+
+
+def test_full_session_rolls_at_six_pm(make_con):
+    minutes = pd.date_range(
+        "2025-11-03", "2025-11-04 23:59", freq="1min", tz="America/New_York"
+    )
+    con = make_con(minutes)
+    refresh_rollups(con, "US500", minutes[0], minutes[-1])
+
+    daily = get_rollup_bars(con, "US500", "daily", "full")
+    assert list(daily.index.strftime("%Y-%m-%d %H:%M")) == [
+        "2025-11-02 18:00",
+        "2025-11-03 18:00",
+        "2025-11-04 18:00",
+    ]
+    assert list(daily["volume"]) == [18 * 60, 24 * 60, 6 * 60]
+
+
+def test_refresh_only_touches_given_range(make_con):
+    minutes = pd.date_range(
+        "2025-11-03", "2025-11-04 23:59", freq="1min", tz="America/New_York"
+    )
+    con = make_con(minutes)
+    tuesday = minutes[minutes.day == 4]
+    refresh_rollups(con, "US500", tuesday[0], tuesday[-1], periods=["daily"])
+
+    daily = get_rollup_bars(con, "US500", "daily", "ny_business")
+    assert list(daily.index.day) == [4]
@@ -0,0 +1,115 @@
+import pandas as pd
+import pytest
+from edge_tools.sessions import ensure_sessions, refresh_sessions, trading_calendar
+from edge_tools.utils.dir import get_sql_query
+
+# the per-row New York conversions the session templates replaced, with parameters
+PER_ROW_QUERIES = {
+    "get_first_30_min": ({}, """
+        SELECT time AT TIME ZONE 'America/New_York' AS ts_ny,
+            symbol, open, high, low, close, volume
+        FROM ohlcv_minute
+        WHERE (time AT TIME ZONE 'America/New_York')::time >= time '09:30'
+            AND (time AT TIME ZONE 'America/New_York')::time < time '10:00'
+            AND symbol == 'US500'
+        ORDER BY ts_ny
+    """),
+    "get_ny_business_time": ({"start_date": "2025-11-02"}, """
+        SELECT time AT TIME ZONE 'America/New_York' AS ts_ny,
+            symbol, open, high, low, close, volume
+        FROM ohlcv_minute
+        WHERE (time AT TIME ZONE 'America/New_York')::time >= time '09:30'
+            AND (time AT TIME ZONE 'America/New_York')::time < time '16:00'
+            AND symbol == 'US500'
+            AND (time AT TIME ZONE 'America/New_York')::date >= $start_date::DATE
+        ORDER BY ts_ny
+    """),
+}
+
+
+def test_trading_calendar_nyse_holidays():
+    calendar = trading_calendar("2025-01-01", "2025-12-31").set_index("date")
+    assert calendar["is_trading_day"].sum() == 250
+    assert not calendar.loc["2025-04-18", "is_trading_day"]  # Good Friday
+    assert not calendar.loc["2025-11-27", "is_trading_day"]  # Thanksgiving
+    assert calendar.loc["2025-11-28", "is_trading_day"]
+
+    # July 4th 2026 is a Saturday, observed on Friday
+    observed = trading_calendar("2026-07-03", "2026-07-06").set_index("date")
+    assert observed["is_trading_day"].tolist() == [False, False, False, True]
+
+
+def test_session_boundaries_follow_dst(make_db):
+    con = make_db("create_table_sessions")
+    # minutes of Friday evening to Monday evening, New York leaves DST on Sunday
+    refresh_sessions(
+        con,
+        pd.Timestamp("2025-10-31 22:00", tz="UTC"),
+        pd.Timestamp("2025-11-03 23:00", tz="UTC"),
+    )
+    sessions = con.execute(
+        """
+        SELECT date, is_trading_day, strftime(ny_open AT TIME ZONE 'UTC', '%H:%M'),
+            strftime(ny_close AT TIME ZONE 'UTC', '%H:%M'),
+            strftime(tokyo_open AT TIME ZONE 'UTC', '%d %H:%M')
+        FROM sessions ORDER BY date
+        """
+    ).fetchall()
+    days = [(str(row[0]), *row[1:]) for row in sessions]
+    assert days == [
+        ("2025-10-31", True, "13:30", "20:00", "31 00:00"),
+        ("2025-11-01", False, "13:30", "20:00", "01 00:00"),
+        ("2025-11-02", False, "14:30", "21:00", "02 00:00"),
+        ("2025-11-03", True, "14:30", "21:00", "03 00:00"),
+        ("2025-11-04", True, "14:30", "21:00", "04 00:00"),
+    ]
+
+
+def test_refresh_replaces_existing_dates(make_db):
+    con = make_db("create_table_sessions")
+    refresh_sessions(con, "2025-11-03", "2025-11-04")
+    refresh_sessions(con, "2025-11-04", "2025-11-06")
+    dates = con.execute("SELECT count(*), count(DISTINCT date) FROM sessions").fetchone()
+    assert dates == (5, 5)
+
+
+@pytest.fixture
+def con(make_db, insert_minutes):
+    con = make_db("create_table_sessions", "create_table_ohlcv_minute")
+    # every minute around the end of DST on 2025-11-02, two symbols
+    minutes = pd.date_range(
+        "2025-10-30 00:00", "2025-11-04 23:59", freq="1min", tz="America/New_York"
+    )
+    frame = pd.concat(
+        pd.DataFrame(
+            {
+                "symbol": symbol,
+                "time": minutes,
+                "open": range(len(minutes)),
+                "high": 1.0,
+                "low": 0.0,
+                "close": 0.5,
+                "volume": 1,
+            }
+        )
+        for symbol in ("US500", "DE40")
+    )
+    insert_minutes(con, frame)
+    return con
+
+
+def test_ensure_sessions_fills_an_empty_table(con):
+    assert ensure_sessions(con)
+    assert con.execute("SELECT count(*) FROM sessions").fetchone()[0] == 7
+    assert not ensure_sessions(con)
+
+
+@pytest.mark.parametrize("template", sorted(PER_ROW_QUERIES))
+def test_session_templates_match_per_row_conversion(con, template):
+    ensure_sessions(con)
+    params, per_row_query = PER_ROW_QUERIES[template]
+
+    expected = con.execute(per_row_query, params).df()
+    result = con.execute(get_sql_query(template), params).df()
+    assert len(result) > 0
+    pd.testing.assert_frame_equal(result, expected)
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from edge_tools.time import (
+    LocalClock,
+    day_ordinal,
+    preprocess_for_premarket_analysis,
+)
+
+
+def make_frame(freq="7min"):
+    # New York leaves DST on 2025-11-02, London a week earlier
+    time = pd.date_range("2025-10-24", "2025-11-05", freq=freq)
+    return pd.DataFrame({"time": time, "close": np.arange(len(time), dtype=float)})
+
+
+def test_compact_columns_match_full_columns():
+    full = preprocess_for_premarket_analysis(make_frame())
+    compact = preprocess_for_premarket_analysis(make_frame(), compact=True)
+
+    for zone in ("ny", "tokyo", "london", "shanghai", "hongkong"):
+        minutes = full[f"{zone}_hour"] * 60 + full[f"{zone}_minute"]
+        assert (compact[f"{zone}_minute_of_day"] == minutes).all()
+        dates = full[f"{zone}_time"].dt.date.map(day_ordinal)
+        assert (compact[f"{zone}_day"] == dates).all()
+        assert f"{zone}_time_only" not in compact.columns
+
+    assert compact[["ny_minute_of_day", "ny_day"]].dtypes.tolist() == [
+        np.int16,
+        np.int32,
+    ]
+
+
+def test_local_clock_masks_by_local_time():
+    data = preprocess_for_premarket_analysis(make_frame("1min"), add_tz=[])
+    clock = LocalClock(data.index)
+
+    # 09:30 New York is 13:30 UTC before the DST change and 14:30 after
+    before = data.index[clock.at("ny", "2025-10-31", 9, 30)]
+    after = data.index[clock.at("America/New_York", "2025-11-04", 9, 30)]
+    assert list(before.strftime("%H:%M")) == ["13:30"]
+    assert list(after.strftime("%H:%M")) == ["14:30"]
+
+
+def test_local_clock_needs_tz_aware_index():
+    with pytest.raises(ValueError):
+        LocalClock(pd.date_range("2025-01-01", periods=3, freq="1min"))